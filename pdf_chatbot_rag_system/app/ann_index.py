@@ -0,0 +1,99 @@
+import os
+import math
+import logging
+from typing import Dict
+
+import faiss
+import numpy as np
+
+# ---------- CONFIG ----------
+INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")  # flat | hnsw | ivf_flat | ivf_pq | ivf_sq8
+HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+IVF_NLIST = int(os.getenv("FAISS_IVF_NLIST", "0"))  # 0 = derive from corpus size
+IVF_NPROBE = int(os.getenv("FAISS_IVF_NPROBE", "8"))
+PQ_M = int(os.getenv("FAISS_PQ_M", "96"))  # sub-quantizers; must divide the embedding dim
+PQ_NBITS = int(os.getenv("FAISS_PQ_NBITS", "8"))
+# ----------------------------
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq", "ivf_sq8")
+MIN_POINTS_PER_CENTROID = 39  # below this FAISS k-means warns and clusters poorly
+
+
+def default_nlist(n: int) -> int:
+    """~4·√n inverted lists, capped so every centroid still gets enough training points."""
+    return max(1, min(int(4 * math.sqrt(n)), n // MIN_POINTS_PER_CENTROID))
+
+
+def index_params(index_type: str = INDEX_TYPE, **overrides) -> Dict:
+    """Effective construction/search parameters for an index type (env defaults + overrides)."""
+    params = {
+        "hnsw": {"M": HNSW_M, "ef_construction": HNSW_EF_CONSTRUCTION, "ef_search": HNSW_EF_SEARCH},
+        "ivf_flat": {"nlist": IVF_NLIST, "nprobe": IVF_NPROBE},
+        "ivf_pq": {"nlist": IVF_NLIST, "nprobe": IVF_NPROBE, "pq_m": PQ_M, "pq_nbits": PQ_NBITS},
+        "ivf_sq8": {"nlist": IVF_NLIST, "nprobe": IVF_NPROBE},
+    }.get(index_type, {})
+    params.update(overrides)
+    return params
+
+
+def build_index(vectors: np.ndarray, index_type: str = INDEX_TYPE, **overrides) -> faiss.Index:
+    """
+    Build (and train, if needed) an L2 FAISS index of the requested type over `vectors`.
+    "flat" is the exact IndexFlatL2 that LangChain builds by default.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unsupported FAISS index type: {index_type} (choose from {INDEX_TYPES})")
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    params = index_params(index_type, **overrides)
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params["M"])
+        index.hnsw.efConstruction = params["ef_construction"]
+    else:
+        nlist = params["nlist"] or default_nlist(n)
+        quantizer = faiss.IndexFlatL2(dim)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        elif index_type == "ivf_sq8":
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, faiss.ScalarQuantizer.QT_8bit)
+        else:
+            if dim % params["pq_m"]:
+                raise ValueError(f"pq_m={params['pq_m']} must divide the embedding dimension {dim}")
+            # PQ codebooks need ≥ 2^nbits training points per sub-quantizer
+            nbits = min(params["pq_nbits"], max(1, int(math.log2(max(n, 2)))))
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, params["pq_m"], nbits)
+        index.train(vectors)
+        # Keep a direct map so vectors can still be reconstructed by row (used by the evaluator)
+        index.set_direct_map_type(faiss.DirectMap.Array)
+
+    index.add(vectors)
+    apply_search_params(index, **params)
+    logger.info(f"📈 Built {index_type} index over {n} vectors ({index_memory_bytes(index) / 1e6:.1f} MB)")
+    return index
+
+
+def apply_search_params(index: faiss.Index, nprobe: int = None, ef_search: int = None, **_):
+    """Set query-time knobs (IVF nprobe / HNSW efSearch) on an index that supports them."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and nprobe:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+    if isinstance(index, faiss.IndexHNSW) and ef_search:
+        index.hnsw.efSearch = ef_search
+
+
+def index_memory_bytes(index: faiss.Index) -> int:
+    """Serialized size of the index, a close proxy for its resident memory."""
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def is_flat(index: faiss.Index) -> bool:
+    """Flat indexes support LangChain's positional add/delete; ANN indexes are rebuilt instead."""
+    return isinstance(index, faiss.IndexFlat)
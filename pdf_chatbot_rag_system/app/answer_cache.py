@@ -0,0 +1,151 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.lexical_index import normalize_text
+
+# ---------- CONFIG ----------
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_TTL_S = float(os.getenv("ANSWER_CACHE_TTL_S", "3600"))
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))  # cosine; > 1 disables
+# ----------------------------
+
+logger = logging.getLogger(__name__)
+
+TRAILING_PUNCT = re.compile(r'[\s?!.,:;।॥]+$')
+
+
+def normalize_question(question: str) -> str:
+    """Cache key for a question: lexical normalization, collapsed whitespace, no trailing punctuation."""
+    text = " ".join(normalize_text(question).split())
+    return TRAILING_PUNCT.sub("", text)
+
+
+class AnswerCache:
+    """
+    Size-bounded LRU cache of pipeline results with a TTL.
+    Lookups first try the normalized question exactly, then (optionally) the cached question
+    whose embedding is closest to the new one, if its cosine similarity clears the threshold
+    and it was asked in the same language (LaBSE puts translations of a question close together).
+    Every entry is tagged with the index version it was computed against; entries from
+    another version never match.
+    """
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_SIZE, ttl_s: float = ANSWER_CACHE_TTL_S,
+                 similarity_threshold: float = ANSWER_CACHE_SIMILARITY,
+                 embed_fn: Callable[[str], List[float]] = None):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        # Unit-norm question embeddings, one slot per cached entry
+        self._matrix: Optional[np.ndarray] = None
+        self._slot_keys: List[Optional[str]] = []
+        self.counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0,
+                         "expirations": 0, "invalidations": 0}
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.embed_fn is not None and self.similarity_threshold <= 1.0
+
+    def _expired(self, entry: dict) -> bool:
+        return time.monotonic() - entry["created"] > self.ttl_s
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        if entry["slot"] is not None:
+            self._slot_keys[entry["slot"]] = None
+
+    def get_exact(self, question: str, index_version: Any = None):
+        """Cheap lookup by normalized question only (safe to call on the event loop)."""
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self._expired(entry) or entry["version"] != index_version):
+                self._drop(key)
+                self.counters["expirations"] += 1
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.counters["exact_hits"] += 1
+            return entry["value"]
+
+    def embed(self, question: str, vector: List[float] = None) -> Optional[np.ndarray]:
+        """Unit-norm question embedding, or None without near-duplicate matching. `vector`: already embedded."""
+        if not self.semantic_enabled:
+            return None
+        vec = np.asarray(self.embed_fn(question) if vector is None else vector, dtype=np.float32)
+        return vec / max(float(np.linalg.norm(vec)), 1e-12)
+
+    def get_similar(self, question_vec: Optional[np.ndarray], index_version: Any = None, language: str = None):
+        """Nearest cached question in `language` by cosine similarity, if above the threshold."""
+        with self._lock:
+            if question_vec is None or self._matrix is None:
+                self.counters["misses"] += 1
+                return None
+            live = [slot for slot, key in enumerate(self._slot_keys)
+                    if key is not None and self._entries[key]["language"] == language]
+            if live:
+                sims = self._matrix[live] @ question_vec
+                best = int(np.argmax(sims))
+                if sims[best] >= self.similarity_threshold:
+                    key = self._slot_keys[live[best]]
+                    entry = self._entries[key]
+                    if not self._expired(entry) and entry["version"] == index_version:
+                        self._entries.move_to_end(key)
+                        self.counters["semantic_hits"] += 1
+                        return entry["value"]
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, question: str, value, index_version: Any = None, question_vec: Optional[np.ndarray] = None,
+            language: str = None):
+        key = normalize_question(question)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            while len(self._entries) >= self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.counters["evictions"] += 1
+
+            slot = None
+            if question_vec is not None:
+                if self._matrix is None:
+                    self._matrix = np.zeros((self.max_entries, len(question_vec)), dtype=np.float32)
+                    self._slot_keys = [None] * self.max_entries
+                slot = self._slot_keys.index(None)
+                self._matrix[slot] = question_vec
+                self._slot_keys[slot] = key
+
+            self._entries[key] = {"value": value, "created": time.monotonic(), "version": index_version,
+                                  "slot": slot, "language": language}
+
+    def invalidate(self):
+        """Drop everything, e.g. after the index has been rebuilt or swapped."""
+        with self._lock:
+            self._entries.clear()
+            self._slot_keys = [None] * len(self._slot_keys)
+            self.counters["invalidations"] += 1
+        logger.info("🧹 Answer cache invalidated")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.counters["exact_hits"] + self.counters["semantic_hits"] + self.counters["misses"]
+            hits = self.counters["exact_hits"] + self.counters["semantic_hits"]
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "similarity_threshold": self.similarity_threshold,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
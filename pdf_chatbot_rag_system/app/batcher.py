@@ -0,0 +1,145 @@
+import os
+import time
+import queue
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+# ---------- CONFIG ----------
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "5"))
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))
+# ----------------------------
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item calls into batched model calls.
+    Callers block in `submit`; a background thread waits up to `window_ms` after the first
+    pending item (or until `max_batch_size` items arrive), runs `batch_fn` once on the group,
+    and hands each caller its own result. If the batch fails, its items are retried one at a
+    time, so a bad input only fails its own caller, not the requests batched with it.
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[list], list],
+                 max_batch_size: int = BATCH_MAX_SIZE, window_ms: float = BATCH_WINDOW_MS):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.window_ms = window_ms
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._batch_sizes = Counter()
+        self._wait_total_s = 0.0
+        self._wait_max_s = 0.0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name=f"batcher-{self.name}", daemon=True)
+                    self._thread.start()
+
+    def submit(self, item):
+        """Queue one item and block until its batched result is ready."""
+        return self.submit_async(item).result()
+
+    def submit_many(self, items: list) -> list:
+        """Queue several items at once; they may be split across batches but results keep input order."""
+        futures = [self.submit_async(item) for item in items]
+        return [f.result() for f in futures]
+
+    def submit_async(self, item) -> Future:
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def _collect(self) -> list:
+        pending = [self._queue.get()]
+        deadline = time.perf_counter() + self.window_ms / 1000
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                pending.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return pending
+
+    def _loop(self):
+        while True:
+            pending = self._collect()
+            started = time.perf_counter()
+            waits = [started - enqueued for _, _, enqueued in pending]
+            self._record(len(pending), waits)
+
+            try:
+                results = self._run([item for item, _, _ in pending])
+            except Exception as e:
+                logger.warning(f"[⚠️ Batch Error] {self.name} ({len(pending)} items): {e}")
+                if len(pending) == 1:
+                    pending[0][1].set_exception(e)
+                    continue
+                for item, future, _ in pending:  # isolate the failing item(s)
+                    try:
+                        future.set_result(self._run([item])[0])
+                    except Exception as item_error:
+                        future.set_exception(item_error)
+                continue
+
+            for (_, future, _), result in zip(pending, results):
+                future.set_result(result)
+
+    def _run(self, items: list) -> list:
+        results = self.batch_fn(items)
+        if len(results) != len(items):
+            raise RuntimeError(f"batch_fn returned {len(results)} results for {len(items)} items")
+        return results
+
+    def _record(self, size: int, waits: List[float]):
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            self._batch_sizes[size] += 1
+            self._wait_total_s += sum(waits)
+            self._wait_max_s = max(self._wait_max_s, max(waits))
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                "window_ms": self.window_ms,
+                "max_batch_size": self.max_batch_size,
+                "pending": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "avg_queue_wait_ms": round(self._wait_total_s / self._items * 1000, 3) if self._items else 0.0,
+                "max_queue_wait_ms": round(self._wait_max_s * 1000, 3),
+            }
+
+
+# ---------- Registry ----------
+_batchers: Dict[str, MicroBatcher] = {}
+_registry_lock = threading.Lock()
+
+def get_batcher(name: str, batch_fn: Callable[[list], list]) -> MicroBatcher:
+    """Return the process-wide batcher for `name`, creating it on first use."""
+    with _registry_lock:
+        if name not in _batchers:
+            _batchers[name] = MicroBatcher(name, batch_fn)
+        return _batchers[name]
+
+def batching_stats() -> Dict[str, Dict]:
+    """Batch-size and queue-wait statistics for every active batcher."""
+    with _registry_lock:
+        return {name: b.stats() for name, b in _batchers.items()}
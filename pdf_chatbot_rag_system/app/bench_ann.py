@@ -0,0 +1,105 @@
+# app/bench_ann.py
+"""
+Recall-vs-latency benchmark for the FAISS index variants in app.ann_index.
+
+Uses the vectors already stored in the flat index (no model needed), plus synthetically
+scaled copies of the corpus (jittered duplicates) to see how each variant behaves as the
+number of textbooks grows. Run from the project root:
+
+    python -m app.bench_ann --scales 1 10 50 --k 10
+"""
+
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+from app.ann_index import INDEX_TYPES, build_index, index_memory_bytes
+
+# ---------- CONFIG ----------
+FAISS_INDEX_PATH = "data/faiss_langchain_index/index.faiss"
+NOISE_SCALE = 0.05  # jitter for synthetic copies / queries, relative to per-dimension std
+# ----------------------------
+
+
+def load_corpus_vectors(index_path: str = FAISS_INDEX_PATH) -> np.ndarray:
+    index = faiss.read_index(index_path)
+    return index.reconstruct_n(0, index.ntotal).astype(np.float32)
+
+
+def scale_corpus(base: np.ndarray, factor: int, rng: np.random.Generator) -> np.ndarray:
+    """Corpus plus (factor - 1) jittered copies of itself."""
+    if factor <= 1:
+        return base
+    std = base.std(axis=0, keepdims=True) * NOISE_SCALE
+    copies = [base] + [base + rng.normal(size=base.shape).astype(np.float32) * std for _ in range(factor - 1)]
+    return np.vstack(copies)
+
+
+def make_queries(base: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+    rows = rng.choice(len(base), size=min(n, len(base)), replace=False)
+    std = base.std(axis=0, keepdims=True) * NOISE_SCALE
+    return base[rows] + rng.normal(size=(len(rows), base.shape[1])).astype(np.float32) * std
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def benchmark_variant(index_type: str, corpus: np.ndarray, queries: np.ndarray,
+                      truth: np.ndarray, k: int) -> dict:
+    start = time.perf_counter()
+    index = build_index(corpus, index_type)
+    build_s = time.perf_counter() - start
+
+    latencies, found = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        _, ids = index.search(q[None, :], k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        found.append(ids[0])
+
+    return {
+        "index": index_type,
+        "build_s": build_s,
+        "recall": recall_at_k(np.array(found), truth),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "memory_mb": index_memory_bytes(index) / 1e6,
+    }
+
+
+def run_benchmark(scales, k: int, n_queries: int, variants, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    base = load_corpus_vectors()
+    queries = make_queries(base, n_queries, rng)
+    print(f"📦 Base corpus: {len(base)} vectors × {base.shape[1]} dims, {len(queries)} queries, k={k}")
+
+    results = []
+    for factor in scales:
+        corpus = scale_corpus(base, factor, rng)
+        exact = faiss.IndexFlatL2(corpus.shape[1])
+        exact.add(corpus)
+        _, truth = exact.search(queries, k)
+
+        print(f"\n📈 Corpus ×{factor} ({len(corpus)} vectors)")
+        print(f"{'index':<10} {'build s':>8} {'recall@' + str(k):>10} {'p50 ms':>8} {'p99 ms':>8} {'mem MB':>8}")
+        for index_type in variants:
+            row = benchmark_variant(index_type, corpus, queries, truth, k)
+            row["scale"] = factor
+            results.append(row)
+            print(f"{row['index']:<10} {row['build_s']:>8.2f} {row['recall']:>10.3f} "
+                  f"{row['p50_ms']:>8.3f} {row['p99_ms']:>8.3f} {row['memory_mb']:>8.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FAISS index variant benchmark")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--variants", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    args = parser.parse_args()
+    run_benchmark(args.scales, args.k, args.queries, args.variants)
@@ -0,0 +1,145 @@
+# app/bench_dedup.py
+"""
+What near-duplicate elimination (app.dedup) buys on the chunk corpus.
+
+For each similarity threshold it reports how many chunks are folded away, the FAISS index
+size with and without them, the embedding time saved (measured per chunk on the uncached
+model) and the top-k diversity of retrieval over a question sample: how many of the k
+slots are taken by a near-duplicate of a chunk already ranked higher, and the mean pairwise
+cosine similarity of the k results (lower = more varied context for the QA model).
+The chunks come straight from the PDF(s) given with --pdf (chunked without dedup), or from a
+chunk file written with `python -m app.chunker --dedup-threshold 0`. --offline uses the hashed
+bag-of-words stand-in embeddings from app.bench_pipeline. Run from the project root:
+
+    python -m app.bench_dedup --pdf data/HSC26-Bangla1st-Paper.pdf --thresholds 0.7 0.8 0.9
+    python -m app.bench_dedup --offline --chunks data/chunks_raw.jsonl --k 10
+"""
+
+import copy
+import time
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+from app.ann_index import INDEX_TYPE, INDEX_TYPES, build_index, index_memory_bytes
+from app.bench_pipeline import DEFAULT_QUESTIONS, install_stub_models, load_questions
+from app.chunker import chunk_id, iter_pdf_chunks, read_chunks
+from app.dedup import DEDUP_THRESHOLD, deduplicate
+from app.mcq_index import MCQ_INDEX_PATH, McqIndex
+
+# ---------- CONFIG ----------
+CHUNKS_PATH = "data/chunks.jsonl"
+EMBED_SAMPLE = 32  # chunks embedded without the cache to time the model
+MCQ_QUESTION_SAMPLE = 50  # textbook MCQ questions added to the question set
+# ----------------------------
+
+
+def sample_questions(path: str = None, mcq_sample: int = MCQ_QUESTION_SAMPLE) -> List[str]:
+    """The test set (or built-in questions) plus an even spread of the textbook's MCQ questions."""
+    questions = load_questions(path) if path else list(DEFAULT_QUESTIONS)
+    mcq = McqIndex.load(MCQ_INDEX_PATH)
+    if mcq and mcq.pairs and mcq_sample:
+        step = max(1, len(mcq.pairs) // mcq_sample)
+        questions += [question for question, _ in mcq.pairs[::step][:mcq_sample]]
+    return questions
+
+
+def unit_rows(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def seconds_per_chunk(embeddings, texts: List[str]) -> float:
+    """Embedding cost per chunk on the model itself, bypassing the embedding cache."""
+    model = getattr(embeddings, "base", embeddings)
+    model.embed_documents(texts[:2])  # warm-up
+    start = time.perf_counter()
+    model.embed_documents(texts)
+    return (time.perf_counter() - start) / max(1, len(texts))
+
+
+def topk_diversity(vectors: np.ndarray, ids: List[str], cluster_of: Dict[str, str],
+                   queries: np.ndarray, k: int, index_type: str) -> Dict:
+    """Search `vectors` for every query and score how varied each top-k list is."""
+    index = build_index(vectors, index_type)
+    _, rows = index.search(queries, k)
+    duplicate_slots, pairwise = [], []
+    for found in rows:
+        found = [row for row in found if row >= 0]
+        clusters = [cluster_of[ids[row]] for row in found]
+        duplicate_slots.append((len(clusters) - len(set(clusters))) / max(1, len(clusters)))
+        if len(found) > 1:
+            sims = vectors[found] @ vectors[found].T
+            pairwise.append(float(sims[np.triu_indices(len(found), 1)].mean()))
+    return {
+        "memory_mb": index_memory_bytes(index) / 1e6,
+        "duplicate_slots": float(np.mean(duplicate_slots)),
+        "mean_pairwise_cos": float(np.mean(pairwise)) if pairwise else None,
+    }
+
+
+def run_benchmark(thresholds: List[float], k: int, index_type: str, questions_path: str = None,
+                  chunks_path: str = CHUNKS_PATH, pdf_paths: List[str] = None, embed_sample: int = EMBED_SAMPLE):
+    from app.model_registry import model_registry
+
+    records = list(iter_pdf_chunks(pdf_paths) if pdf_paths else read_chunks(chunks_path))
+    for record in records:
+        record["id"] = record.get("id") or chunk_id(record["text"])
+    records = list({record["id"]: record for record in records}.values())
+    questions = sample_questions(questions_path)
+    embeddings = model_registry.get("labse")
+    print(f"📦 {len(records)} chunks, {len(questions)} questions, k={k}, {index_type} index")
+
+    texts = [record["text"] for record in records]
+    vectors = unit_rows(embeddings.embed_documents(texts))
+    queries = unit_rows(embeddings.embed_documents(questions))
+    per_chunk_s = seconds_per_chunk(embeddings, texts[:embed_sample])
+    ids = [record["id"] for record in records]
+    row_of = {doc_id: row for row, doc_id in enumerate(ids)}
+
+    results = []
+    print(f"{'threshold':>9} {'kept':>6} {'removed':>8} {'dedup s':>8} {'index MB':>9} {'embed s saved':>14} "
+          f"{'dup slots':>10} {'pair cos':>9}")
+    for threshold in sorted(thresholds):
+        start = time.perf_counter()
+        kept, stats = deduplicate(copy.deepcopy(records), threshold)
+        dedup_s = time.perf_counter() - start
+
+        # Every chunk maps to the representative it was folded into (at this threshold)
+        cluster_of = {doc_id: doc_id for doc_id in ids}
+        for record in kept:
+            for member in record.get("metadata", {}).get("duplicates", []):
+                cluster_of[member["id"]] = record["id"]
+        full = topk_diversity(vectors, ids, cluster_of, queries, k, index_type)
+        kept_rows = [row_of[record["id"]] for record in kept]
+        deduped = topk_diversity(vectors[kept_rows], [ids[row] for row in kept_rows], cluster_of,
+                                 queries, k, index_type)
+
+        row = {"threshold": threshold, **stats, "dedup_s": dedup_s,
+               "index_mb": deduped["memory_mb"], "index_mb_saved": full["memory_mb"] - deduped["memory_mb"],
+               "embed_s_saved": stats["removed"] * per_chunk_s,
+               "duplicate_slots": deduped["duplicate_slots"], "duplicate_slots_before": full["duplicate_slots"],
+               "pairwise_cos": deduped["mean_pairwise_cos"], "pairwise_cos_before": full["mean_pairwise_cos"]}
+        results.append(row)
+        print(f"{threshold:>9.2f} {row['kept']:>6} {row['removed']:>8} {dedup_s:>8.3f} "
+              f"{row['index_mb']:>9.2f} {row['embed_s_saved']:>14.2f} "
+              f"{full['duplicate_slots']:>4.3f}→{deduped['duplicate_slots']:<5.3f} "
+              f"{full['mean_pairwise_cos']:>4.3f}→{deduped['mean_pairwise_cos']:.3f}")
+    print(f"\n⏱️ Embedding cost: {per_chunk_s * 1000:.1f} ms per chunk (uncached)")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Near-duplicate chunk elimination report")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, DEDUP_THRESHOLD, 0.9])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--index-type", default=INDEX_TYPE, choices=INDEX_TYPES)
+    parser.add_argument("--questions", default=None, help="JSON array or JSONL test set (plus textbook MCQs)")
+    parser.add_argument("--chunks", default=CHUNKS_PATH, help="chunk file written without dedup")
+    parser.add_argument("--pdf", nargs="+", default=None, help="chunk these PDFs instead of reading --chunks")
+    parser.add_argument("--offline", action="store_true", help="stand-in embeddings, no model download")
+    args = parser.parse_args()
+    if args.offline:
+        install_stub_models()
+    run_benchmark(sorted(set(args.thresholds)), args.k, args.index_type, args.questions, args.chunks, args.pdf)
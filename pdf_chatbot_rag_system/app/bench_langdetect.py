@@ -0,0 +1,125 @@
+# app/bench_langdetect.py
+"""
+Accuracy and speed of the script-histogram language detector (app.language_detect)
+against plain langdetect, on labelled question sets:
+
+    textbook   questions cut from the chunk file (everything up to the first "?")   → bn
+    short      the first word or two of those questions                               → bn
+    mixed      textbook questions with an English name or term spliced in             → bn
+    english    English questions about the textbook                                   → en
+
+Run from the project root:
+
+    python -m app.bench_langdetect --repeat 200
+"""
+
+import time
+import argparse
+from typing import Callable, Dict, List, Tuple
+
+from app.chunker import read_chunks
+from app.language_detect import detect_language, SUPPORTED_LANGS
+
+# ---------- CONFIG ----------
+CHUNKS_JSON_PATH = "data/chunks.jsonl"
+ENGLISH_QUESTIONS = [
+    "Who is described as Anupam's god of fortune?",
+    "What was Kalyani's real age at the time of the wedding?",
+    "Whom does Anupam call a handsome man?",
+    "Why did Anupam's uncle break off the marriage?",
+    "Where did Anupam meet Kalyani on the train?",
+    "What did Kalyani's father do for a living?",
+    "How old was Anupam when the story was written?",
+    "Which city did Anupam travel to?",
+    "What is the name of the story's narrator?",
+    "Who wrote Aparichita?",
+    "What vow did Kalyani take after the wedding was called off?",
+    "Why is the story called Aparichita?",
+    "Age of Kalyani?",
+    "Uncle's profession?",
+]
+MIXED_TERMS = ["Anupam", "Kalyani", "Shambhunath", "Aparichita", "Rabindranath Tagore", "MCQ"]
+# ----------------------------
+
+
+def textbook_questions(path: str = CHUNKS_JSON_PATH) -> List[str]:
+    questions = []
+    for chunk in read_chunks(path):
+        text = chunk["text"]
+        if "?" in text:
+            question = text[:text.index("?") + 1].strip()
+            if len(question) > 5:
+                questions.append(question)
+    return questions
+
+
+def labelled_sets(path: str = CHUNKS_JSON_PATH) -> Dict[str, List[Tuple[str, str]]]:
+    textbook = textbook_questions(path)
+    return {
+        "textbook": [(q, "bn") for q in textbook],
+        "short": [(" ".join(q.split()[:2]), "bn") for q in textbook if q.split()],
+        "mixed": [(f"{MIXED_TERMS[i % len(MIXED_TERMS)]} {q}", "bn") for i, q in enumerate(textbook)],
+        "english": [(q, "en") for q in ENGLISH_QUESTIONS],
+    }
+
+
+def langdetect_baseline() -> Callable[[str], str]:
+    """The previous detector: langdetect on every input."""
+    from langdetect import detect, DetectorFactory
+    DetectorFactory.seed = 42
+
+    def run(text: str) -> str:
+        try:
+            lang = detect(text.strip())
+        except Exception:
+            return "unknown"
+        return lang if lang in SUPPORTED_LANGS else "unknown"
+    return run
+
+
+def accuracy(detector: Callable[[str], str], samples: List[Tuple[str, str]]) -> float:
+    return sum(detector(text) == label for text, label in samples) / len(samples) if samples else 0.0
+
+
+def us_per_call(detector: Callable[[str], str], texts: List[str], repeat: int) -> float:
+    detector(texts[0])  # first-call setup (profile loading) stays out of the timing
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            detector(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def run_benchmark(repeat: int, show: int = 5):
+    sets = labelled_sets()
+    detectors = {"script": detect_language}
+    try:
+        detectors["langdetect"] = langdetect_baseline()
+    except ImportError:
+        print("⚠️ langdetect not installed; reporting the script detector only")
+
+    print(f"{'set':<10} {'n':>5}" + "".join(f" {name + ' acc':>16}" for name in detectors))
+    for name, samples in sets.items():
+        print(f"{name:<10} {len(samples):>5}" + "".join(f" {accuracy(d, samples):>16.3f}" for d in detectors.values()))
+
+    texts = [text for samples in sets.values() for text, _ in samples]
+    print(f"\n{'detector':<12} {'µs/call':>10}")
+    for name, detector in detectors.items():
+        print(f"{name:<12} {us_per_call(detector, texts, repeat if name == 'script' else max(1, repeat // 20)):>10.2f}")
+
+    if "langdetect" in detectors:
+        baseline = detectors["langdetect"]
+        disagreements = [(text, label, detect_language(text), baseline(text))
+                         for samples in sets.values() for text, label in samples
+                         if detect_language(text) != baseline(text)]
+        print(f"\n🔀 Disagreements with langdetect: {len(disagreements)} / {len(texts)}")
+        for text, label, ours, theirs in disagreements[:show]:
+            print(f"  [{label}] script={ours} langdetect={theirs}: {text[:60]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Script-histogram vs langdetect language detection benchmark")
+    parser.add_argument("--repeat", type=int, default=200, help="timing passes over all samples")
+    parser.add_argument("--show", type=int, default=5, help="disagreements to print")
+    args = parser.parse_args()
+    run_benchmark(args.repeat, args.show)
@@ -0,0 +1,156 @@
+# app/bench_onnx.py
+"""
+Parity and cost report for the int8 ONNX backend against fp32 PyTorch.
+
+For each model, both backends run over the same inputs drawn from data/chunks.jsonl:
+    labse            embedding cosine (int8 vs fp32), per-text latency
+    qa_en            answer agreement (exact / token F1), per-question latency
+    translate_*      output agreement (exact / token F1), per-text latency
+Memory is the process RSS growth while loading each model (approximate: both backends
+share one process). Run from the project root:
+
+    python -m app.bench_onnx --samples 50 --out data/onnx_report.json
+"""
+
+import gc
+import os
+import re
+import json
+import time
+import argparse
+from collections import Counter
+
+import numpy as np
+
+from app.chunker import OUTPUT_JSONL_PATH, read_chunks
+from app.model_registry import BN_EN_MODEL, EN_BN_MODEL, QA_MODEL, EMBED_MODEL, load_embeddings, load_qa, load_translator
+from app.onnx_backend import artifact_size_mb
+
+# ---------- CONFIG ----------
+QA_QUESTIONS = ["What is this passage about?", "Who is mentioned here?", "What happened?",
+                "When did it happen?", "Why did it happen?"]
+MODELS = ("labse", "qa_en", "translate_bn2en", "translate_en2bn")
+BACKENDS = ("torch", "onnx")
+# ----------------------------
+
+BANGLA_CHARS = re.compile(r'[\u0980-\u09FF]')
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3  # peak only on non-Linux
+
+
+def token_f1(a: str, b: str) -> float:
+    a_tokens, b_tokens = a.lower().split(), b.lower().split()
+    if not a_tokens or not b_tokens:
+        return float(a_tokens == b_tokens)
+    common = sum((Counter(a_tokens) & Counter(b_tokens)).values())
+    if common == 0:
+        return 0.0
+    precision, recall = common / len(b_tokens), common / len(a_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+
+def load_samples(n: int, path: str = OUTPUT_JSONL_PATH) -> dict:
+    chunks = list(read_chunks(path))
+    bangla = [c["text"][:400] for c in chunks if BANGLA_CHARS.search(c["text"])][:n]
+    english = [c["metadata"]["text_en"][:1500] for c in chunks if c.get("metadata", {}).get("text_en")][:n]
+    qa_pairs = [(QA_QUESTIONS[i % len(QA_QUESTIONS)], ctx) for i, ctx in enumerate(english)]
+    return {"bangla": bangla, "english": english, "qa_pairs": qa_pairs}
+
+
+def model_inputs(name: str, samples: dict) -> list:
+    if name == "qa_en":
+        return samples["qa_pairs"]
+    return samples["english"] if name == "translate_en2bn" else samples["bangla"]
+
+
+def timed(fn, inputs) -> tuple:
+    outputs, latencies = [], []
+    for item in inputs:
+        t0 = time.perf_counter()
+        outputs.append(fn(item))
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return outputs, latencies
+
+
+def run_model(name: str, backend: str, samples: dict) -> dict:
+    """Load one model on one backend, run it over its inputs, report outputs and costs."""
+    inputs = model_inputs(name, samples)
+    gc.collect()
+    rss_before, t0 = rss_mb(), time.perf_counter()
+    if name == "labse":
+        model = load_embeddings(backend).base  # bypass the embedding cache
+        fn = model.embed_query
+    elif name == "qa_en":
+        model = load_qa(backend)
+        fn = lambda pair: model(question=pair[0], context=pair[1])["answer"].strip()
+    else:
+        model = load_translator(BN_EN_MODEL if name == "translate_bn2en" else EN_BN_MODEL, backend)
+        fn = lambda text: model(text, max_length=256, clean_up_tokenization_spaces=True)[0]["generated_text"].strip()
+    load_s, load_mb = time.perf_counter() - t0, rss_mb() - rss_before
+
+    fn(inputs[0])  # warm-up call, not timed
+    outputs, latencies = timed(fn, inputs)
+    return {
+        "outputs": outputs,
+        "load_s": round(load_s, 2),
+        "load_rss_mb": round(load_mb, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+    }
+
+
+def parity(name: str, reference: list, candidate: list) -> dict:
+    if name == "labse":
+        a, b = np.asarray(reference, dtype=np.float32), np.asarray(candidate, dtype=np.float32)
+        cos = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1) + 1e-12)
+        return {"mean_cosine": round(float(cos.mean()), 5), "min_cosine": round(float(cos.min()), 5)}
+    exact = np.mean([r.strip().lower() == c.strip().lower() for r, c in zip(reference, candidate)])
+    f1 = np.mean([token_f1(r, c) for r, c in zip(reference, candidate)])
+    return {"exact_agreement": round(float(exact), 4), "token_f1": round(float(f1), 4)}
+
+
+def run_report(n_samples: int, models) -> dict:
+    samples = load_samples(n_samples)
+    print(f"📦 Samples: {len(samples['bangla'])} Bangla texts, {len(samples['qa_pairs'])} English QA contexts")
+    model_ids = {"labse": EMBED_MODEL, "qa_en": QA_MODEL, "translate_bn2en": BN_EN_MODEL, "translate_en2bn": EN_BN_MODEL}
+
+    report = {}
+    print(f"\n{'model':<16} {'backend':<7} {'load s':>7} {'load MB':>8} {'p50 ms':>8} {'p99 ms':>8}  parity")
+    for name in models:
+        if not model_inputs(name, samples):
+            print(f"{name:<16} skipped: chunks have no English translations (text_en) yet")
+            continue
+        runs = {backend: run_model(name, backend, samples) for backend in BACKENDS}
+        entry = {
+            "model": model_ids[name],
+            "parity": parity(name, runs["torch"]["outputs"], runs["onnx"]["outputs"]),
+            "onnx_artifact_mb": round(artifact_size_mb(model_ids[name]), 1),
+            "speedup_p50": round(runs["torch"]["p50_ms"] / max(runs["onnx"]["p50_ms"], 1e-6), 2),
+        }
+        for backend in BACKENDS:
+            entry[backend] = {k: v for k, v in runs[backend].items() if k != "outputs"}
+            row = entry[backend]
+            print(f"{name:<16} {backend:<7} {row['load_s']:>7.2f} {row['load_rss_mb']:>8.1f} "
+                  f"{row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f}  {entry['parity'] if backend == 'onnx' else ''}")
+        report[name] = entry
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="fp32 PyTorch vs int8 ONNX Runtime parity and latency report")
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=MODELS)
+    parser.add_argument("--out", default=None, help="write the report as JSON")
+    args = parser.parse_args()
+    report = run_report(args.samples, args.models)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Report written to {args.out}")
@@ -0,0 +1,281 @@
+# app/bench_pipeline.py
+"""
+End-to-end latency benchmark for the RAG pipeline, with a per-stage breakdown.
+
+Targets:
+    pipeline   in-process: detect → embed → search → translate → qa → back_translate,
+               timed per stage through app.tracing
+    http       replays the questions against a running server (/query, or /query/stream
+               with --stream to also time the arrival of each streamed stage)
+
+--offline swaps every model for a tiny deterministic stand-in (hashed bag-of-words
+embeddings, first-words "QA", identity "translation") and indexes the chunk file
+in memory, so the pipeline's own overhead can be measured on a plain CPU box without
+network or model downloads. --stub-delay-ms adds a fixed cost per model call.
+--concurrency turns either target into a load generator. Run from the project root:
+
+    python -m app.bench_pipeline --offline --requests 500 --concurrency 8
+    python -m app.bench_pipeline --target http --url http://localhost:8000 --concurrency 4 --stream
+"""
+
+import re
+import json
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+import requests
+from langchain_core.embeddings import Embeddings
+
+from app.tracing import STAGES, stage, trace
+
+# ---------- CONFIG ----------
+CHUNKS_JSON_PATH = "data/chunks.jsonl"
+DEFAULT_QUESTIONS = [
+    "অনুপমের ভাষায় সুপুরুষ কাকে বলা হয়েছে?",
+    "কাকে অনুপমের ভাগ্য দেবতা বলে উল্লেখ করা হয়েছে?",
+    "বিয়ের সময় কল্যাণীর প্রকৃত বয়স কত ছিল?",
+    "অনুপমের মামা কেমন মানুষ ছিলেন?",
+    "Who is described as Anupam's god of fortune?",
+    "What was Kalyani's real age at the time of the wedding?",
+]
+STUB_DIM = 768  # same width as LaBSE
+# ----------------------------
+
+WORD = re.compile(r'\w+')
+
+
+# ---------- Offline stand-in models ----------
+class StubEmbeddings(Embeddings):
+    """Deterministic hashed bag-of-words vectors: similar wording → similar vectors."""
+
+    def __init__(self, dim: int = STUB_DIM, delay_s: float = 0.0):
+        self.dim = dim
+        self.delay_s = delay_s
+
+    def _vector(self, text: str) -> List[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for word in WORD.findall(text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            vec[int.from_bytes(digest[:4], "little") % self.dim] += 1.0 if digest[4] & 1 else -1.0
+        norm = float(np.linalg.norm(vec))
+        return (vec / norm if norm else vec).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.delay_s)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class StubQA:
+    """
+    Question-answering pipeline stand-in: the first few words of the context, scored by
+    the share of question words found in it (so early stopping behaves plausibly).
+    """
+
+    def __init__(self, delay_s: float = 0.0):
+        self.delay_s = delay_s
+
+    @staticmethod
+    def _score(question: str, context: str) -> float:
+        words = set(WORD.findall(question.lower()))
+        return len(words & set(WORD.findall(context.lower()))) / len(words) if words else 0.0
+
+    def __call__(self, question, context, **kwargs):
+        time.sleep(self.delay_s)
+        contexts = context if isinstance(context, list) else [context]
+        questions = question if isinstance(question, list) else [question] * len(contexts)
+        results = [{"answer": " ".join(c.split()[:4]), "score": self._score(q, c), "start": 0, "end": 0}
+                   for q, c in zip(questions, contexts)]
+        return results if isinstance(context, list) else results[0]
+
+
+class StubTranslator:
+    """text2text-generation pipeline stand-in: returns its input."""
+
+    def __init__(self, delay_s: float = 0.0):
+        self.delay_s = delay_s
+
+    def __call__(self, texts, **kwargs):
+        time.sleep(self.delay_s)
+        return [{"generated_text": t} for t in (texts if isinstance(texts, list) else [texts])]
+
+
+def install_stub_models(delay_ms: float = 0.0):
+    """Replace every registered model with its stand-in (before anything loads them)."""
+    from app.model_registry import model_registry
+    delay_s = delay_ms / 1000
+    model_registry.register("labse", "stub/hashed-bow", lambda: StubEmbeddings(delay_s=delay_s))
+    model_registry.register("qa_en", "stub/first-words", lambda: StubQA(delay_s))
+    model_registry.register("translate_bn2en", "stub/identity", lambda: StubTranslator(delay_s))
+    model_registry.register("translate_en2bn", "stub/identity", lambda: StubTranslator(delay_s))
+
+
+def offline_retriever(chunks_path: str = CHUNKS_JSON_PATH, k: int = 10):
+    """Flat FAISS + BM25 over the chunk file, embedded with the stub model, in memory only."""
+    from app.lexical_index import LexicalIndex
+    from app.model_registry import RegistryEmbeddings
+    from app.vector_store import HybridRetriever, build_faiss_vector_store, load_chunks_as_documents
+
+    vectorstore = build_faiss_vector_store(load_chunks_as_documents(chunks_path), "flat",
+                                           embeddings=RegistryEmbeddings("labse"))
+    return HybridRetriever(vectorstore, LexicalIndex.from_vectorstore(vectorstore), k=k)
+
+
+# ---------- Targets ----------
+def pipeline_runner(retriever):
+    """One request through the in-process pipeline; returns {stage: seconds, "total": seconds}."""
+    from app.language_detect import detect_language
+    from app.llm_generator import generate_answer
+
+    def run(question: str) -> Dict[str, float]:
+        start = time.perf_counter()
+        with trace() as timings:
+            with stage("detect"):
+                lang = detect_language(question)
+            docs = retriever.invoke(question)
+            generate_answer(question, docs, lang)
+        timings["total"] = time.perf_counter() - start
+        return timings
+    return run
+
+
+def http_runner(base_url: str, stream: bool = False, timeout: float = 120.0):
+    """One request against a running server; with `stream`, also times each SSE event's arrival."""
+    local = threading.local()
+
+    def run(question: str) -> Dict[str, float]:
+        session = getattr(local, "session", None) or requests.Session()
+        local.session = session
+        start = time.perf_counter()
+        if not stream:
+            res = session.post(f"{base_url}/query", json={"question": question}, timeout=timeout)
+            res.raise_for_status()
+            return {"total": time.perf_counter() - start}
+
+        timings = {}
+        with session.post(f"{base_url}/query/stream", json={"question": question}, stream=True, timeout=timeout) as res:
+            res.raise_for_status()
+            for line in res.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                    if event == "error":
+                        raise RuntimeError("server returned an error event")
+                    timings[f"until_{event}"] = time.perf_counter() - start
+        timings["total"] = time.perf_counter() - start
+        return timings
+    return run
+
+
+# ---------- Load generation & report ----------
+def load_questions(path: str = None) -> List[str]:
+    """Questions from a JSON array / JSONL test set (the /evaluate format), or the built-in set."""
+    if not path:
+        return list(DEFAULT_QUESTIONS)
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        entries = json.loads(text)
+    else:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [e["question"] if isinstance(e, dict) else str(e) for e in entries]
+
+
+def run_load(run, questions: List[str], n_requests: int, concurrency: int, warmup: int = 1) -> Dict:
+    for question in questions[:warmup]:
+        run(question)  # model loads / first-call costs stay out of the numbers
+
+    samples, errors = [], []
+    lock = threading.Lock()
+
+    def one(i: int):
+        try:
+            timings = run(questions[i % len(questions)])
+            with lock:
+                samples.append(timings)
+        except Exception as e:
+            with lock:
+                errors.append(str(e) or type(e).__name__)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(n_requests)))
+    wall_s = time.perf_counter() - start
+
+    stages = {}
+    extra = dict.fromkeys(k for s in samples for k in s if k not in STAGES and k != "total")  # e.g. streamed events, in arrival order
+    for name in [*STAGES, *extra, "total"]:
+        values = [s[name] * 1000 for s in samples if name in s]
+        if values:
+            stages[name] = {
+                "count": len(values),
+                "mean_ms": round(float(np.mean(values)), 3),
+                "p50_ms": round(float(np.percentile(values, 50)), 3),
+                "p95_ms": round(float(np.percentile(values, 95)), 3),
+                "p99_ms": round(float(np.percentile(values, 99)), 3),
+            }
+    return {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "completed": len(samples),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "wall_s": round(wall_s, 3),
+        "throughput_rps": round(len(samples) / wall_s, 2) if wall_s else 0.0,
+        "stages": stages,
+    }
+
+
+def print_report(label: str, report: Dict):
+    print(f"\n📈 {label}: {report['completed']}/{report['requests']} ok, {report['errors']} errors, "
+          f"concurrency {report['concurrency']}, {report['throughput_rps']} req/s")
+    print(f"{'stage':<16} {'count':>6} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in report["stages"].items():
+        print(f"{name:<16} {row['count']:>6} {row['mean_ms']:>9.2f} {row['p50_ms']:>9.2f} "
+              f"{row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f}")
+    for error in report["error_samples"]:
+        print(f"  ❌ {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RAG pipeline latency benchmark")
+    parser.add_argument("--target", choices=["pipeline", "http"], default="pipeline")
+    parser.add_argument("--url", default="http://localhost:8000", help="server base URL for --target http")
+    parser.add_argument("--stream", action="store_true", help="use /query/stream and time each streamed stage")
+    parser.add_argument("--offline", action="store_true", help="stand-in models + in-memory index (pipeline target)")
+    parser.add_argument("--stub-delay-ms", type=float, default=0.0, help="fixed cost per stand-in model call")
+    parser.add_argument("--k", type=int, default=None, help="chunks retrieved per query (pipeline target)")
+    parser.add_argument("--qa-mode", choices=["multi", "concat"], default=None, help="answer extraction mode")
+    parser.add_argument("--qa-breadth", type=int, default=None, help="retrieved chunks scored by the QA model")
+    parser.add_argument("--questions", default=None, help="JSON array or JSONL test set (defaults to a built-in set)")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--out", default=None, help="write the report as JSON")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    if args.qa_mode or args.qa_breadth:
+        import app.llm_generator as llm_generator
+        llm_generator.QA_CONTEXT_MODE = args.qa_mode or llm_generator.QA_CONTEXT_MODE
+        llm_generator.QA_BREADTH = args.qa_breadth or llm_generator.QA_BREADTH
+    if args.target == "http":
+        runner, label = http_runner(args.url.rstrip("/"), stream=args.stream), f"HTTP {args.url}"
+    elif args.offline:
+        install_stub_models(args.stub_delay_ms)
+        runner, label = pipeline_runner(offline_retriever(k=args.k or 10)), "in-process pipeline (offline stand-in models)"
+    else:
+        from app.vector_store import RETRIEVER_K, load_faiss_retriever
+        runner, label = pipeline_runner(load_faiss_retriever(k=args.k or RETRIEVER_K)), "in-process pipeline"
+
+    result = run_load(runner, questions, args.requests, args.concurrency)
+    print_report(label, result)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"target": label, **result}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Report written to {args.out}")
@@ -0,0 +1,188 @@
+# app/chunk_store.py
+"""
+Memory-mapped chunk store used in place of LangChain's pickled docstore (index.pkl).
+
+Layout (all next to index.faiss, row i = FAISS position i):
+    chunk_text.bin          UTF-8 text of every chunk, concatenated
+    chunk_text_offsets.npy  int64[n + 1] byte offsets into chunk_text.bin
+    chunk_meta.bin          compact JSON metadata per chunk, concatenated
+    chunk_meta_offsets.npy  int64[n + 1] byte offsets into chunk_meta.bin
+    chunk_ids.npy           fixed-width ASCII docstore IDs
+    chunk_id_order.npy      argsort of chunk_ids (binary search for ID → row)
+
+Nothing is unpickled and no Document objects exist until a search hit is materialized.
+"""
+
+import os
+import sys
+import json
+import shutil
+import logging
+from collections.abc import Mapping
+from typing import Iterable, List, Tuple, Union
+
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_community.docstore.base import Docstore
+
+logger = logging.getLogger(__name__)
+
+TEXT_FILE = "chunk_text.bin"
+TEXT_OFFSETS_FILE = "chunk_text_offsets.npy"
+META_FILE = "chunk_meta.bin"
+META_OFFSETS_FILE = "chunk_meta_offsets.npy"
+IDS_FILE = "chunk_ids.npy"
+ID_ORDER_FILE = "chunk_id_order.npy"
+
+
+def _map_blob(path: str) -> np.ndarray:
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+class RowIdMap(Mapping):
+    """Read-only FAISS position → docstore ID mapping backed by the ID array (no per-row dict)."""
+
+    def __init__(self, ids: np.ndarray):
+        self._ids = ids
+
+    def __getitem__(self, pos: int) -> str:
+        if not 0 <= pos < len(self._ids):
+            raise KeyError(pos)
+        return self._ids[pos].decode("ascii")
+
+    def __iter__(self):
+        return iter(range(len(self._ids)))
+
+    def __len__(self):
+        return len(self._ids)
+
+
+class ChunkStore(Docstore):
+    """Read-only, memory-mapped docstore; `search` accepts a docstore ID or a FAISS row."""
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self._text = _map_blob(os.path.join(store_dir, TEXT_FILE))
+        self._text_offsets = np.load(os.path.join(store_dir, TEXT_OFFSETS_FILE), mmap_mode="r")
+        self._meta = _map_blob(os.path.join(store_dir, META_FILE))
+        self._meta_offsets = np.load(os.path.join(store_dir, META_OFFSETS_FILE), mmap_mode="r")
+        self._ids = np.load(os.path.join(store_dir, IDS_FILE), mmap_mode="r")
+        self._id_order = np.load(os.path.join(store_dir, ID_ORDER_FILE), mmap_mode="r")
+
+    def __len__(self):
+        return len(self._ids)
+
+    @staticmethod
+    def exists(store_dir: str) -> bool:
+        return os.path.exists(os.path.join(store_dir, IDS_FILE))
+
+    def row_of(self, doc_id: str) -> int:
+        """Binary search the sorted ID order; -1 if unknown."""
+        key = doc_id.encode("ascii")
+        lo, hi = 0, len(self._id_order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ids[self._id_order[mid]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self._id_order) and self._ids[self._id_order[lo]] == key:
+            return int(self._id_order[lo])
+        return -1
+
+    def text(self, row: int) -> str:
+        return bytes(self._text[self._text_offsets[row]:self._text_offsets[row + 1]]).decode("utf-8")
+
+    def metadata(self, row: int) -> dict:
+        return json.loads(bytes(self._meta[self._meta_offsets[row]:self._meta_offsets[row + 1]]).decode("utf-8"))
+
+    def document(self, row: int) -> Document:
+        return Document(id=self._ids[row].decode("ascii"), page_content=self.text(row), metadata=self.metadata(row))
+
+    def search(self, search: Union[str, int]) -> Union[Document, str]:
+        row = search if isinstance(search, (int, np.integer)) else self.row_of(search)
+        if row < 0 or row >= len(self):
+            return f"ID {search} not found."
+        return self.document(int(row))
+
+    def index_to_docstore_id(self) -> RowIdMap:
+        return RowIdMap(self._ids)
+
+    def iter_rows(self) -> Iterable[Tuple[str, str, dict]]:
+        for row in range(len(self)):
+            yield self._ids[row].decode("ascii"), self.text(row), self.metadata(row)
+
+    @staticmethod
+    def write(store_dir: str, rows: Iterable[Tuple[str, str, dict]]):
+        """Write (doc_id, text, metadata) rows, ordered by FAISS position."""
+        os.makedirs(store_dir, exist_ok=True)
+        ids: List[bytes] = []
+        text_offsets, meta_offsets = [0], [0]
+        with open(os.path.join(store_dir, TEXT_FILE), "wb") as text_f, \
+                open(os.path.join(store_dir, META_FILE), "wb") as meta_f:
+            for doc_id, text, metadata in rows:
+                text_bytes = text.encode("utf-8")
+                meta_bytes = json.dumps(metadata, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                text_f.write(text_bytes)
+                meta_f.write(meta_bytes)
+                text_offsets.append(text_offsets[-1] + len(text_bytes))
+                meta_offsets.append(meta_offsets[-1] + len(meta_bytes))
+                ids.append(str(doc_id).encode("ascii"))
+
+        id_array = np.array(ids, dtype=f"S{max((len(i) for i in ids), default=1)}")
+        np.save(os.path.join(store_dir, TEXT_OFFSETS_FILE), np.array(text_offsets, dtype=np.int64))
+        np.save(os.path.join(store_dir, META_OFFSETS_FILE), np.array(meta_offsets, dtype=np.int64))
+        np.save(os.path.join(store_dir, ID_ORDER_FILE), np.argsort(id_array, kind="stable").astype(np.int64))
+        # IDs last: their presence marks the store as complete
+        np.save(os.path.join(store_dir, IDS_FILE), id_array)
+        logger.info(f"✅ Chunk store written: {len(ids)} chunks, {text_offsets[-1] / 1e6:.1f} MB text")
+
+    @staticmethod
+    def write_from_vectorstore(store_dir: str, vectorstore):
+        """Persist the docstore of a LangChain FAISS store, in index order."""
+        rows = []
+        for pos in range(len(vectorstore.index_to_docstore_id)):
+            doc_id = vectorstore.index_to_docstore_id[pos]
+            doc = vectorstore.docstore.search(doc_id)
+            rows.append((doc_id, doc.page_content, doc.metadata))
+        ChunkStore.write(store_dir, rows)
+
+
+def convert_legacy_docstore(index_dir: str, chunks_path: str = None):
+    """
+    One-shot migration of an existing index to the chunk store.
+    Reads index.pkl (trusted, local file — unpickled exactly once here), or, with
+    `chunks_path`, the chunk file in the order the index was built from.
+    """
+    import faiss
+
+    ntotal = faiss.read_index(os.path.join(index_dir, "index.faiss")).ntotal
+    if chunks_path:
+        from app.chunker import chunk_id, read_chunks
+        chunks = list(read_chunks(chunks_path))
+        rows = [(c.get("id") or chunk_id(c["text"]), c["text"], c.get("metadata", {})) for c in chunks]
+    else:
+        import pickle
+        with open(os.path.join(index_dir, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        rows = []
+        for pos in range(len(index_to_docstore_id)):
+            doc_id = index_to_docstore_id[pos]
+            doc = docstore.search(doc_id)
+            rows.append((doc_id, doc.page_content, doc.metadata))
+
+    if len(rows) != ntotal:
+        raise ValueError(f"❌ {len(rows)} chunks but the FAISS index holds {ntotal} vectors")
+    # Written into a copy that then replaces the live index, which a server may have mapped
+    from app.vector_store import index_write_lock, staged_index
+    with index_write_lock(index_dir), staged_index(index_dir) as staging_dir:
+        shutil.copytree(index_dir, staging_dir)
+        ChunkStore.write(staging_dir, rows)
+
+
+if __name__ == "__main__":
+    # python -m app.chunk_store [--from-chunks]
+    from_chunks = "--from-chunks" in sys.argv
+    convert_legacy_docstore("data/faiss_langchain_index", "data/chunks.json" if from_chunks else None)
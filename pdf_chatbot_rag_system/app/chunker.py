@@ -1,95 +1,302 @@
-# app/chunker.py
-
-import fitz  # PyMuPDF
-import re
-import json
-import os
-from typing import List
-
-# ---------- CONFIG ----------
-PDF_PATH = "D:/pdf_chatbot_rag_system/data/HSC26-Bangla1st-Paper.pdf"
-OUTPUT_JSON_PATH = "data/chunks.json"
-# ----------------------------
-
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """
-    Extract all raw text from the PDF.
-    """
-    doc = fitz.open(pdf_path)
-    full_text = ""
-    for page in doc:
-        full_text += page.get_text()
-    doc.close()
-    return full_text
-
-def clean_text(text: str) -> str:
-    """
-    Remove unnecessary symbols and normalize spacing.
-    """
-    text = re.sub(r'[^\u0980-\u09FFA-Za-z0-9।,.!?()\[\]{}\'" \n]+', '', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
-
-def extract_mcq_qa_pairs(text: str) -> List[str]:
-    """
-    Extract MCQ-style Bangla QA chunks.
-    Format: "৪১। কাকে অনুপমের ভাগ্য দেবতা বলা হয়েছে? (ক) পিতা (খ) ভাই (গ) মামা (ঘ) শিক্ষক"
-    Output: "কাকে অনুপমের ভাগ্য দেবতা বলা হয়েছে: মামা"
-    """
-    mcq_lines = re.findall(r'\d+[।.][^\n]+', text)
-    option_pattern = re.compile(r'[কখগঘঙচছজঝঞটঠডঢণতথদধনপফবভমযরলশষসহড়ঢ়য়]+[)]\s*([^()]+)')
-
-    qa_chunks = []
-    for line in mcq_lines:
-        parts = line.split('(')
-        question_part = parts[0].strip()
-        options_joined = '(' + '('.join(parts[1:]) if len(parts) > 1 else ""
-        options = option_pattern.findall(options_joined)
-
-        if question_part and options:
-            # Use shortest option as heuristic
-            answer = min(options, key=len)
-            qa_chunks.append(f"{question_part}: {answer.strip()}")
-    return qa_chunks
-
-def split_paragraphs(text: str) -> List[str]:
-    """
-    Break cleaned text into paragraph-level chunks (30+ characters).
-    """
-    paras = re.split(r'[।\n]', text)
-    paras = [p.strip() for p in paras if len(p.strip()) > 30]
-    return paras
-
-def run_chunking_pipeline():
-    print("📄 Extracting text from PDF...")
-    raw_text = extract_text_from_pdf(PDF_PATH)
-
-    print("🧼 Cleaning text...")
-    cleaned = clean_text(raw_text)
-
-    print("✂️ Extracting chunks...")
-    qa_chunks = extract_mcq_qa_pairs(cleaned)
-    para_chunks = split_paragraphs(cleaned)
-
-    # Combine and deduplicate
-    all_chunks = list(set(qa_chunks + para_chunks))
-
-    print(f"💾 Saving {len(all_chunks)} chunks to {OUTPUT_JSON_PATH}...")
-    os.makedirs(os.path.dirname(OUTPUT_JSON_PATH), exist_ok=True)
-    with open(OUTPUT_JSON_PATH, 'w', encoding='utf-8') as f:
-        json.dump(
-            [{"text": chunk, "metadata": {}} for chunk in all_chunks],
-            f,
-            ensure_ascii=False,
-            indent=2
-        )
-
-    # Preview
-    print("📌 Sample Chunks:")
-    for i, chunk in enumerate(all_chunks[:5]):
-        print(f"[Sample {i+1}] {chunk}")
-
-    print("✅ Chunking complete.")
-
-if __name__ == "__main__":
-    run_chunking_pipeline()
+# app/chunker.py
+
+import fitz  # PyMuPDF
+import re
+import json
+import os
+import hashlib
+import argparse
+import multiprocessing
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.dedup import DEDUP_THRESHOLD, deduplicate
+from app.mcq_index import McqIndex, MCQ_INDEX_PATH
+
+# ---------- CONFIG ----------
+PDF_PATH = os.getenv("PDF_PATH", "data/HSC26-Bangla1st-Paper.pdf")
+OUTPUT_JSONL_PATH = "data/chunks.jsonl"
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", str(os.cpu_count() or 1)))  # processes; 1 = chunk inline
+PAGES_PER_TASK = 8  # pages a worker extracts per task (one PDF open per task)
+MIN_PARAGRAPH_CHARS = 30
+# ----------------------------
+
+MCQ_START = re.compile(r'(?<!\S)(\d+)[।.]\s*')  # "৪১। " (digits: Bangla or ASCII)
+ANSWER_KEY = re.compile(r'(?:\d+ [কখগঘ] ){4,}\d+ [কখগঘ](?!\S)')  # 5+ "number letter" pairs in a row
+ANSWER_KEY_ENTRY = re.compile(r'(\d+) ([কখগঘ])')
+# "উত্তর: গ" after the options; "উিি" is how this textbook's legacy font extracts উত্তর
+INLINE_ANSWER = re.compile(r'(?<!\S)(?:উত্তর|উিি)\s*[:ঃ]?\s*([কখগঘ])(?!\S)')
+PARAGRAPH = re.compile(r'[^।\n]+')
+
+def chunk_id(text: str) -> str:
+    """
+    Stable chunk ID derived from the chunk content, so the same text keeps
+    the same ID across re-chunking runs.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+def clean_text(text: str) -> str:
+    """
+    Remove unnecessary symbols and normalize spacing.
+    """
+    text = re.sub(r'[^\u0980-\u09FFA-Za-z0-9।,.!?()\[\]{}\'" \n]+', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+def iter_mcq_questions(text: str) -> Iterator[Tuple[int, str, Dict[str, str], Optional[str], int, int]]:
+    """
+    MCQ-style Bangla questions with their number, options, printed answer (if any) and
+    character span in `text`. A question runs until the next question number. The options
+    alone do not say which one is correct: that comes from an "উত্তর: …" after them or from
+    an answer-key table (see iter_answer_key, answer_mcqs).
+    Format: "৪১। কাকে অনুপমের ভাগ্য দেবতা বলা হয়েছে? (ক) পিতা (খ) ভাই (গ) মামা (ঘ) শিক্ষক উত্তর: গ"
+    Output: (41, "কাকে অনুপমের ভাগ্য দেবতা বলা হয়েছে?", {"ক": "পিতা", "খ": "ভাই", "গ": "মামা", "ঘ": "শিক্ষক"}, "গ", start, end)
+    """
+    option_pattern = re.compile(r'([কখগঘঙচছজঝঞটঠডঢণতথদধনপফবভমযরলশষসহড়ঢ়য়]+)[)]\s*([^()]+)')
+
+    starts = list(MCQ_START.finditer(text))
+    for i, match in enumerate(starts):
+        end = starts[i + 1].start() if i + 1 < len(starts) else len(text)
+        parts = text[match.end():end].split('(')
+        question_part = parts[0].strip()
+        options_joined = '(' + '('.join(parts[1:]) if len(parts) > 1 else ""
+        options = option_pattern.findall(options_joined)
+
+        if question_part and options:
+            options = {label: option for label, option in options}
+            label, last = options.popitem()
+            answer = INLINE_ANSWER.search(last)
+            options[label] = last[:answer.start()] if answer else last  # drop "উত্তর …" and anything after it
+            options = {label: option.strip() for label, option in options.items()}
+            yield (int(match.group(1)), question_part, options, answer.group(1) if answer else None,
+                   match.start(), len(text[:end].rstrip()))
+
+def iter_answer_key(text: str) -> Iterator[Tuple[int, str]]:
+    """
+    (question number, option letter) entries of an MCQ answer-key table in `text`,
+    e.g. "উত্তরমালা SL Ans ১ ক ২ খ ৩ ক …" → (1, "ক"), (2, "খ"), (3, "ক"), …
+    Only runs of several such pairs count, so numbers in running text are not mistaken for a key.
+    """
+    for table in ANSWER_KEY.finditer(text):
+        for number, label in ANSWER_KEY_ENTRY.findall(table.group()):
+            yield int(number), label
+
+def answer_mcqs(pages: Iterable[Tuple[List[Tuple[int, str, Dict[str, str], Optional[str]]], List[Tuple[int, str]]]]
+                ) -> List[Tuple[str, str]]:
+    """
+    (question, answer) pairs for the MCQs whose correct option the document itself gives.
+    `pages` are (MCQs as (number, question, options, printed answer), answer-key entries) in
+    reading order. A printed "উত্তর" answers its own question; an answer-key table answers the
+    questions without one since the previous table, by number. Numbers that are ambiguous there
+    (several questions or conflicting key entries) and questions never answered are left out:
+    those go through the normal pipeline instead of being guessed.
+    """
+    pairs, pending = [], []
+    for questions, answer_key in pages:
+        for number, question, options, label in questions:
+            if label is None:
+                pending.append((number, question, options))
+            elif label in options:
+                pairs.append((question, options[label]))
+        if answer_key:
+            key: Dict[int, Optional[str]] = {}
+            for number, label in answer_key:
+                key[number] = label if key.get(number, label) == label else None
+            numbers = Counter(number for number, _, _ in pending)
+            pairs += [(question, options[key[number]]) for number, question, options in pending
+                      if numbers[number] == 1 and key.get(number) in options]
+            pending = []
+    return pairs
+
+def extract_mcq_questions(text: str) -> List[Tuple[str, str]]:
+    """
+    Extract MCQ-style Bangla (question, answer) pairs answered by an answer key in `text`.
+    """
+    questions = [(number, question, options, label) for number, question, options, label, _, _ in iter_mcq_questions(text)]
+    return answer_mcqs([(questions, list(iter_answer_key(text)))])
+
+def extract_mcq_qa_pairs(text: str) -> List[str]:
+    """
+    Extract MCQ-style Bangla QA chunks.
+    Output: "কাকে অনুপমের ভাগ্য দেবতা বলা হয়েছে?: মামা"
+    """
+    return [f"{question}: {answer}" for question, answer in extract_mcq_questions(text)]
+
+def iter_paragraphs(text: str) -> Iterator[Tuple[str, int, int]]:
+    """
+    Paragraph-level chunks (30+ characters) with their character span in `text`.
+    """
+    for match in PARAGRAPH.finditer(text):
+        para = match.group().strip()
+        if len(para) > MIN_PARAGRAPH_CHARS:
+            start = match.start() + match.group().index(para[0])
+            yield para, start, start + len(para)
+
+def split_paragraphs(text: str) -> List[str]:
+    """
+    Break cleaned text into paragraph-level chunks (30+ characters).
+    """
+    return [para for para, _, _ in iter_paragraphs(text)]
+
+def chunk_page(text: str, page: int, source: str = None) -> Tuple[List[Dict], List[Tuple], List[Tuple[int, str]]]:
+    """
+    Clean and chunk the text of one page.
+    Every chunk records its 1-based page and its [char_start, char_end) span in the page's
+    cleaned text; chunks come out in page order. An MCQ becomes one chunk with all its options.
+    Returns (chunk records, MCQs as (number, question, options, printed answer), answer-key entries).
+    """
+    cleaned = clean_text(text)
+    spans, questions = [], []
+    for number, question, options, answer, start, end in iter_mcq_questions(cleaned):
+        questions.append((number, question, options, answer))
+        spans.append((start, 0, cleaned[start:end], end, {"type": "mcq"}))
+    for para, start, end in iter_paragraphs(cleaned):
+        spans.append((start, 1, para, end, {}))
+
+    records = []
+    for start, _, chunk, end, metadata in sorted(spans, key=lambda span: span[:2]):
+        metadata = {**metadata, "page": page, "char_start": start, "char_end": end}
+        if source:
+            metadata["source"] = source
+        records.append({"id": chunk_id(chunk), "text": chunk, "metadata": metadata})
+    return records, questions, list(iter_answer_key(cleaned))
+
+def _chunk_pages(pdf_path: str, first: int, last: int, source: str) -> List[Tuple[List[Dict], List, List]]:
+    """Worker task: open the PDF and chunk pages [first, last) independently of the rest."""
+    with fitz.open(pdf_path) as doc:
+        return [chunk_page(doc[number].get_text(), number + 1, source) for number in range(first, last)]
+
+def _page_tasks(pdf_paths: List[str], sources: List[str], pages_per_task: int) -> Iterator[Tuple[str, int, int, str]]:
+    for pdf_path, source in zip(pdf_paths, sources):
+        with fitz.open(pdf_path) as doc:
+            pages = doc.page_count
+        for first in range(0, pages, pages_per_task):
+            yield pdf_path, first, min(first + pages_per_task, pages), source
+
+def iter_pdf_chunks(pdf_paths: Iterable[str], sources: List[str] = None, workers: int = CHUNK_WORKERS,
+                    pages_per_task: int = PAGES_PER_TASK, mcq_pairs: List[Tuple[str, str]] = None) -> Iterator[Dict]:
+    """
+    Stream chunk records for one or more PDFs.
+
+    Page ranges of every PDF are chunked in parallel on a process pool; records are yielded
+    as soon as their range is done, yet always in (PDF, page, offset) order, so the output is
+    deterministic. Only a bounded window of ranges is in flight, and chunks already seen
+    (same content → same ID) are skipped. MCQ (question, answer) pairs answered by the
+    PDF's own answer key are appended to `mcq_pairs` if given, once every page has been read.
+    `sources` (default: the file names) is recorded in each chunk's metadata.
+    """
+    pdf_paths = list(pdf_paths)
+    sources = sources or [os.path.basename(path) for path in pdf_paths]
+    tasks = list(_page_tasks(pdf_paths, sources, pages_per_task))
+    seen = set()
+    mcqs = {path: [] for path in pdf_paths}  # PDF → [(questions, answer-key entries) per page]
+
+    def emit(pdf_path, pages):
+        for records, questions, answer_key in pages:
+            mcqs[pdf_path].append((questions, answer_key))
+            for record in records:
+                if record["id"] not in seen:
+                    seen.add(record["id"])
+                    yield record
+
+    if workers <= 1 or len(tasks) <= 1:  # a process pool only pays off with several page ranges
+        for task in tasks:
+            yield from emit(task[0], _chunk_pages(*task))
+    else:
+        # spawn: workers never inherit model weights or threads from a serving process
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            window = deque()
+            for task in tasks:
+                window.append((task[0], pool.submit(_chunk_pages, *task)))
+                if len(window) >= workers * 2:
+                    pdf_path, future = window.popleft()
+                    yield from emit(pdf_path, future.result())
+            while window:
+                pdf_path, future = window.popleft()
+                yield from emit(pdf_path, future.result())
+
+    if mcq_pairs is not None:
+        # The key usually sits at the end of the book, so questions are answered per PDF at the end
+        for pages in mcqs.values():
+            mcq_pairs.extend(answer_mcqs(pages))
+
+def chunk_pdf(pdf_path: str, source: str = None, workers: int = CHUNK_WORKERS) -> Tuple[List[Dict], List[Tuple[str, str]]]:
+    """
+    Extract → clean → chunk one PDF.
+    Returns (chunk records in the chunk-file format, answer-key MCQ (question, answer) pairs).
+    """
+    qa_pairs = []
+    records = list(iter_pdf_chunks([pdf_path], [source or os.path.basename(pdf_path)], workers, mcq_pairs=qa_pairs))
+    return records, qa_pairs
+
+# ---------- Chunk files ----------
+def read_chunks(path: str = OUTPUT_JSONL_PATH) -> Iterator[Dict]:
+    """
+    Stream chunk records from a JSONL chunk file (one record per line) or a legacy JSON array.
+    A missing "chunks.jsonl" falls back to the "chunks.json" next to it, if there is one.
+    """
+    if not os.path.exists(path) and path.endswith(".jsonl") and os.path.exists(path[:-1]):
+        path = path[:-1]
+    with open(path, "r", encoding="utf-8") as f:
+        head = f.read(1024)
+        f.seek(0)
+        if head.lstrip().startswith("["):
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def write_chunks(records: Iterable[Dict], path: str = OUTPUT_JSONL_PATH) -> int:
+    """
+    Stream records to a JSONL chunk file as they arrive; the file is replaced atomically at
+    the end, so readers never see a half-written file. Returns the number of records.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    count = 0
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(path + ".tmp", path)
+    return count
+
+def run_chunking_pipeline(pdf_paths: List[str] = None, output_path: str = OUTPUT_JSONL_PATH,
+                          workers: int = CHUNK_WORKERS, dedup_threshold: float = DEDUP_THRESHOLD):
+    pdf_paths = pdf_paths or [PDF_PATH]
+    print(f"📄 Chunking {len(pdf_paths)} PDF(s) with {workers} worker(s)...")
+    qa_pairs = []
+    # Near-duplicates are folded into their first occurrence, which lists them in metadata["duplicates"]
+    records, stats = deduplicate(iter_pdf_chunks(pdf_paths, workers=workers, mcq_pairs=qa_pairs), dedup_threshold)
+    print(f"🧬 {stats['removed']} near-duplicate chunks folded into {stats['clusters']} representatives")
+    preview = []
+
+    def progress(records):
+        for record in records:
+            if len(preview) < 5:
+                preview.append(record)
+            yield record
+
+    count = write_chunks(progress(records), output_path)
+    print(f"💾 Saved {count} chunks to {output_path}")
+
+    print(f"⚡ Saving MCQ fast-path index ({len(qa_pairs)} questions) to {MCQ_INDEX_PATH}...")
+    McqIndex(qa_pairs).save(MCQ_INDEX_PATH)
+
+    # Preview
+    print("📌 Sample Chunks:")
+    for i, record in enumerate(preview):
+        print(f"[Sample {i+1}] p.{record['metadata']['page']} {record['text']}")
+
+    print("✅ Chunking complete.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunk PDFs into data/chunks.jsonl (+ MCQ index)")
+    parser.add_argument("pdfs", nargs="*", help=f"PDF files (default: {PDF_PATH})")
+    parser.add_argument("--out", default=OUTPUT_JSONL_PATH)
+    parser.add_argument("--workers", type=int, default=CHUNK_WORKERS)
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD,
+                        help="near-duplicate similarity (estimated Jaccard); 0 keeps every chunk")
+    args = parser.parse_args()
+    run_chunking_pipeline(args.pdfs, args.out, args.workers, args.dedup_threshold)
@@ -0,0 +1,156 @@
+import os
+import re
+import zlib
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.lexical_index import normalize_text
+
+# ---------- CONFIG ----------
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))  # estimated Jaccard of shingle sets; 0 disables
+SHINGLE_SIZE = 5  # characters per shingle
+NUM_PERM = 128  # MinHash signature length
+LSH_BANDS = 16  # NUM_PERM / LSH_BANDS rows per band → candidate pairs above ~0.7 Jaccard
+MINHASH_SEED = 1
+# ----------------------------
+
+logger = logging.getLogger(__name__)
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+QUESTION_NUMBER = re.compile(r'^\s*[\d০-৯]+\s*[।.)]', re.MULTILINE)  # "৪১। …", "12) …" at a line start
+NOISE = re.compile(r'[^\u0980-\u09FF0-9a-z]+')  # punctuation, spaces (digits are normalized to ASCII)
+NUMBER = re.compile(r'[0-9]+')
+
+_rng = np.random.RandomState(MINHASH_SEED)
+_PERM_A = _rng.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+def _body(text: str) -> str:
+    """Normalized text without leading question numbers, so renumbered repeats ("৪১। …" in one
+    section, "১২। …" in the answer key) compare equal."""
+    return normalize_text(QUESTION_NUMBER.sub(" ", text))
+
+
+def numbers(text: str) -> Tuple[str, ...]:
+    """The numbers in a chunk (question numbers excluded); near-duplicates must agree on them."""
+    return tuple(NUMBER.findall(_body(text)))
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    Hashed character shingles of the normalized text. Punctuation and whitespace are dropped
+    first, so copies whose word spacing PDF extraction got differently still match; digits
+    inside the text stay part of the shingles.
+    """
+    text = NOISE.sub("", _body(text))
+    grams = {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(hashed_shingles: np.ndarray) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32 minima of universal hash permutations)."""
+    if not len(hashed_shingles):
+        return np.full(NUM_PERM, MAX_HASH, dtype=np.uint64)
+    permuted = (np.outer(_PERM_A, hashed_shingles) + _PERM_B[:, None]) % MERSENNE_PRIME & MAX_HASH
+    return permuted.min(axis=1)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+class NearDuplicateIndex:
+    """
+    Streaming near-duplicate clustering over MinHash signatures.
+    Signatures are split into LSH_BANDS bands; only chunks sharing a whole band with a kept
+    chunk are compared, so each insert costs a few dict lookups instead of a pass over the
+    corpus. The first chunk of a cluster is its representative: later near-duplicates are
+    recorded in its metadata["duplicates"] (id, page, source) and dropped. Chunks that differ
+    in any number ("১৫ বছর" / "১৬ বছর") are never folded, however similar the rest is.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, bands: int = LSH_BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self.kept: List[Dict] = []
+        self._signatures: List[np.ndarray] = []
+        self._numbers: List[Tuple[str, ...]] = []
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self.removed = 0
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(self.bands)]
+
+    def keep(self, record: Dict):
+        """Add a chunk record as a representative without checking it, e.g. one already indexed."""
+        signature = minhash(shingles(record["text"]))
+        self._insert(record, signature, self._band_keys(signature), numbers(record["text"]))
+
+    def _insert(self, record: Dict, signature: np.ndarray, keys: List[bytes], nums: Tuple[str, ...]):
+        row = len(self.kept)
+        self.kept.append(record)
+        self._signatures.append(signature)
+        self._numbers.append(nums)
+        for bucket, key in zip(self._buckets, keys):
+            bucket.setdefault(key, []).append(row)
+
+    def add(self, record: Dict) -> Optional[Dict]:
+        """Add a chunk record; returns its representative if it is a near-duplicate (and drops it)."""
+        signature = minhash(shingles(record["text"]))
+        keys = self._band_keys(signature)
+        nums = numbers(record["text"])
+        candidates = {row for bucket, key in zip(self._buckets, keys) for row in bucket.get(key, ())}
+        best, best_sim = None, self.threshold
+        for row in sorted(candidates):
+            if self._numbers[row] != nums:
+                continue
+            sim = similarity(signature, self._signatures[row])
+            if sim >= best_sim:
+                best, best_sim = row, sim
+        if best is not None:
+            representative = self.kept[best]
+            metadata = record.get("metadata", {})
+            member = {"id": record.get("id")}
+            member.update({key: metadata[key] for key in ("page", "source") if key in metadata})
+            representative.setdefault("metadata", {}).setdefault("duplicates", []).append(member)
+            self.removed += 1
+            return representative
+
+        self._insert(record, signature, keys, nums)
+        return None
+
+    def stats(self) -> Dict:
+        clusters = sum(1 for record in self.kept if record.get("metadata", {}).get("duplicates"))
+        return {
+            "chunks": len(self.kept) + self.removed,
+            "kept": len(self.kept),
+            "removed": self.removed,
+            "clusters": clusters,
+        }
+
+
+def deduplicate(records: Iterable[Dict], threshold: float = DEDUP_THRESHOLD,
+                existing: Iterable[Dict] = ()) -> Tuple[List[Dict], Dict]:
+    """
+    Collapse near-duplicate chunks (estimated Jaccard ≥ threshold) onto the first occurrence.
+    `existing` records (e.g. an indexed corpus) come first and are kept as they are: only
+    `records` are tested against them and each other. Returns (existing + kept records in
+    input order, stats). A threshold of 0 keeps every record.
+    """
+    if threshold <= 0:
+        records = list(existing) + list(records)
+        return records, {"chunks": len(records), "kept": len(records), "removed": 0, "clusters": 0}
+    index = NearDuplicateIndex(threshold)
+    for record in existing:
+        index.keep(record)
+    for record in records:
+        index.add(record)
+    stats = index.stats()
+    logger.info(f"🧬 Near-duplicates: {stats['removed']} of {stats['chunks']} chunks folded into {stats['clusters']} clusters")
+    return index.kept, stats
@@ -1,45 +1,178 @@
-import os
-import json
-from langchain.docstore.document import Document
-from langchain_community.vectorstores import FAISS  # ✅ Updated import
-from langchain_huggingface import HuggingFaceEmbeddings
-
-# ---------- CONFIGURATION ----------
-CHUNKS_PATH = "data/chunks.json"
-FAISS_INDEX_DIR = "data/faiss_langchain_index"
-EMBED_MODEL_NAME = "sentence-transformers/LaBSE"  # Multilingual, supports Bangla + English
-# -----------------------------------
-
-def load_chunks(json_path):
-    """Load structured chunks from JSON."""
-    with open(json_path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def run_embedding_pipeline():
-    print("📥 Loading chunks from JSON...")
-    chunks = load_chunks(CHUNKS_PATH)
-    print(f"✅ Loaded {len(chunks)} chunks.")
-
-    print(f"🔍 Loading embedding model: {EMBED_MODEL_NAME}")
-    embedding = HuggingFaceEmbeddings(model_name=EMBED_MODEL_NAME)
-
-    print("📄 Converting to LangChain Document format...")
-    documents = [
-        Document(
-            page_content=chunk["text"],
-            metadata=chunk.get("metadata", {})
-        )
-        for chunk in chunks
-    ]
-
-    print("📈 Creating FAISS index with LangChain...")
-    vectorstore = FAISS.from_documents(documents, embedding)
-
-    print(f"💽 Saving FAISS index to: {FAISS_INDEX_DIR}")
-    os.makedirs(FAISS_INDEX_DIR, exist_ok=True)
-    vectorstore.save_local(FAISS_INDEX_DIR)
-
-    print("✅ Embedding + Indexing complete with LangChain!")
-
-if __name__ == "__main__":
-    run_embedding_pipeline()
+import os
+import re
+import sys
+import json
+import hashlib
+from langchain.docstore.document import Document
+
+from app.chunker import chunk_id, read_chunks, write_chunks
+from app.model_registry import model_registry, EMBED_MODEL
+from app.ann_index import INDEX_TYPE
+from app.vector_store import (
+    build_faiss_vector_store, save_faiss_store, load_vector_store, index_write_lock, staged_index,
+)
+
+# ---------- CONFIGURATION ----------
+CHUNKS_PATH = "data/chunks.jsonl"
+FAISS_INDEX_DIR = "data/faiss_langchain_index"
+MANIFEST_FILE = "manifest.json"  # chunk ID → metadata fingerprint, stored next to the index
+EMBED_MODEL_NAME = EMBED_MODEL  # LaBSE: multilingual, supports Bangla + English
+TRANSLATE_BATCH_SIZE = 16  # chunks per BN → EN translation batch
+# -----------------------------------
+
+BANGLA_CHARS = re.compile(r'[\u0980-\u09FF]')
+
+def load_chunks(json_path):
+    """Load structured chunks from the chunk file (JSONL, or a legacy JSON array)."""
+    return list(read_chunks(json_path))
+
+def save_chunks(json_path, chunks):
+    """Write structured chunks back to the chunk file (JSONL)."""
+    write_chunks(chunks, json_path)
+
+def translate_chunks(chunks, batch_size: int = TRANSLATE_BATCH_SIZE) -> int:
+    """
+    Attach an English rendering of every chunk as metadata["text_en"] so Bangla queries
+    don't have to translate retrieved context at request time.
+    Chunks that already carry "text_en" are skipped; returns how many were translated.
+    Chunks of a batch that fails keep no "text_en", so the next run retries them.
+    """
+    from app.language_utils import translate_batch_bn_to_en
+
+    pending = []
+    for chunk in chunks:
+        metadata = chunk.setdefault("metadata", {})
+        if "text_en" in metadata:
+            continue
+        if BANGLA_CHARS.search(chunk["text"]):
+            pending.append(chunk)
+        else:
+            metadata["text_en"] = chunk["text"]
+
+    translated = 0
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        try:
+            translations = translate_batch_bn_to_en([chunk["text"] for chunk in batch], strict=True)
+        except Exception as e:
+            print(f"⚠️ Translation failed for {len(batch)} chunks, left for the next run: {e}")
+            continue
+        for chunk, text_en in zip(batch, translations):
+            chunk["metadata"]["text_en"] = text_en
+        translated += len(batch)
+        print(f"🌐 Translated {min(start + batch_size, len(pending))}/{len(pending)} chunks")
+
+    return translated
+
+def run_translation_stage(json_path=CHUNKS_PATH):
+    """Offline BN → EN translation of the chunk corpus; results are persisted into the chunk file."""
+    chunks = load_chunks(json_path)
+    translated = translate_chunks(chunks)
+    if translated:
+        save_chunks(json_path, chunks)
+    print(f"✅ Translation stage complete ({translated} new translations).")
+    return chunks
+
+def _metadata_fingerprint(metadata: dict) -> str:
+    return hashlib.sha256(json.dumps(metadata, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+def chunks_to_documents(chunks):
+    """Convert chunks to LangChain Documents keyed by stable chunk ID (duplicate texts are dropped)."""
+    documents = {}
+    for chunk in chunks:
+        doc_id = chunk.get("id") or chunk_id(chunk["text"])
+        if doc_id not in documents:
+            documents[doc_id] = Document(id=doc_id, page_content=chunk["text"], metadata=chunk.get("metadata", {}))
+    return documents
+
+def load_manifest(index_dir=FAISS_INDEX_DIR):
+    """Chunk manifest of an existing index, or None if the index predates manifests."""
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(path) or not os.path.exists(os.path.join(index_dir, "index.faiss")):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(documents, index_dir=FAISS_INDEX_DIR, index_type=INDEX_TYPE):
+    manifest = {
+        "embed_model": EMBED_MODEL_NAME,
+        "index_type": index_type,
+        "chunks": {doc_id: _metadata_fingerprint(doc.metadata) for doc_id, doc in documents.items()},
+    }
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def build_full_index(documents, embedding, index_dir=FAISS_INDEX_DIR, index_type=INDEX_TYPE):
+    """Embed every document (cached vectors are reused) and write a fresh index + manifest."""
+    print(f"📈 Creating {index_type} FAISS index ({len(documents)} chunks)...")
+    vectorstore = build_faiss_vector_store(
+        list(documents.values()), index_type=index_type, embeddings=embedding, ids=list(documents.keys())
+    )
+
+    print(f"💽 Saving FAISS index to: {index_dir}")
+    save_faiss_store(vectorstore, index_dir)
+    save_manifest(documents, index_dir, index_type)
+    return vectorstore
+
+def update_index(documents, embedding, manifest, index_dir=FAISS_INDEX_DIR, out_dir=None):
+    """
+    Apply the difference between `documents` and the manifest to the existing index:
+    embed only added chunks, drop removed ones, and refresh docstore metadata that changed.
+    The result is written to `out_dir` (default: `index_dir` itself).
+    """
+    old = manifest["chunks"]
+    added = [doc_id for doc_id in documents if doc_id not in old]
+    removed = [doc_id for doc_id in old if doc_id not in documents]
+    changed = [doc_id for doc_id in documents
+               if doc_id in old and old[doc_id] != _metadata_fingerprint(documents[doc_id].metadata)]
+    print(f"🧮 Index diff: +{len(added)} added, -{len(removed)} removed, ~{len(changed)} metadata updates")
+
+    if not (added or removed or changed):
+        print("✅ Index already up to date.")
+        return None
+
+    vectorstore = load_vector_store(index_dir, embedding, writable=True)
+    if removed:
+        vectorstore.delete(removed)
+    if changed:
+        # Same text → same vector; only the stored Document needs replacing
+        vectorstore.docstore.delete(changed)
+        vectorstore.docstore.add({doc_id: documents[doc_id] for doc_id in changed})
+    if added:
+        vectorstore.add_documents([documents[doc_id] for doc_id in added], ids=added)
+
+    out_dir = out_dir or index_dir
+    save_faiss_store(vectorstore, out_dir)
+    save_manifest(documents, out_dir)
+    return vectorstore
+
+def run_embedding_pipeline(full_rebuild: bool = False):
+    print("📥 Loading chunks from JSON...")
+    chunks = run_translation_stage(CHUNKS_PATH)
+    print(f"✅ Loaded {len(chunks)} chunks.")
+
+    print(f"🔍 Loading embedding model: {EMBED_MODEL_NAME}")
+    embedding = model_registry.get("labse")
+
+    print("📄 Converting to LangChain Document format...")
+    documents = chunks_to_documents(chunks)
+
+    # A running server may have the live index memory-mapped: build next to it, then swap it in
+    with index_write_lock(FAISS_INDEX_DIR), staged_index(FAISS_INDEX_DIR) as staging_dir:
+        manifest = None if full_rebuild else load_manifest(FAISS_INDEX_DIR)
+        if (manifest is None or manifest.get("embed_model") != EMBED_MODEL_NAME
+                or manifest.get("index_type", "flat") != INDEX_TYPE):
+            build_full_index(documents, embedding, staging_dir)
+        elif INDEX_TYPE != "flat":
+            # ANN structures can't be patched positionally; rebuild them, but only new chunks hit the model
+            print(f"♻️ Rebuilding {INDEX_TYPE} index from cached embeddings...")
+            build_full_index(documents, embedding, staging_dir)
+        else:
+            update_index(documents, embedding, manifest, FAISS_INDEX_DIR, out_dir=staging_dir)
+
+    print("✅ Embedding + Indexing complete with LangChain!")
+
+if __name__ == "__main__":
+    run_embedding_pipeline(full_rebuild="--full" in sys.argv)
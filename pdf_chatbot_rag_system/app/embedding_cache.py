@@ -0,0 +1,196 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# ---------- CONFIG ----------
+CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "data/embedding_cache")
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "4096"))  # query vectors kept in memory (LRU); never persisted
+# ----------------------------
+
+logger = logging.getLogger(__name__)
+
+KEY_BYTES = 32  # sha256 digest
+
+
+def cache_key(model_name: str, text: str) -> bytes:
+    """Content address of an embedding: sha256 over model name + text."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    Append-only on-disk embedding store for one model.
+    Each record is a sha256 key followed by a float32 vector, so a single append is
+    self-describing and several processes can safely share the file. The file is read
+    through a memory map; an in-memory offset index maps key → row.
+    """
+
+    def __init__(self, model_name: str, cache_dir: str = CACHE_DIR):
+        self.model_name = model_name
+        slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, f"{slug}.bin")
+        self.meta_path = os.path.join(cache_dir, f"{slug}.json")
+        self._lock = threading.Lock()
+        self._offsets: Dict[bytes, int] = {}
+        self._records = None
+        self.dim: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+            self._refresh()
+            logger.info(f"🗃️ Embedding cache for {model_name}: {len(self._offsets)} vectors")
+
+    def _dtype(self):
+        return np.dtype([("key", "u1", (KEY_BYTES,)), ("vec", "<f4", (self.dim,))])
+
+    def _refresh(self):
+        """Re-map the file and index any records appended since the last scan."""
+        if self.dim is None or not os.path.exists(self.path):
+            return
+        dtype = self._dtype()
+        rows = os.path.getsize(self.path) // dtype.itemsize
+        if rows == 0 or (self._records is not None and rows == len(self._records)):
+            return
+        self._records = np.memmap(self.path, dtype=dtype, mode="r", shape=(rows,))
+        keys = self._records["key"]
+        for row in range(len(self._offsets), rows):
+            self._offsets[keys[row].tobytes()] = row
+
+    def get_many(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        with self._lock:
+            if any(k not in self._offsets for k in keys):
+                self._refresh()
+            found = [self._offsets.get(k) for k in keys]
+            vectors = [None if row is None else np.array(self._records["vec"][row]) for row in found]
+        hits = sum(v is not None for v in vectors)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return vectors
+
+    def put_many(self, keys: List[bytes], vectors: List[List[float]]):
+        if not keys:
+            return
+        with self._lock:
+            if self.dim is None:
+                self.dim = len(vectors[0])
+                with open(self.meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"model_name": self.model_name, "dim": self.dim}, f)
+            records = np.zeros(len(keys), dtype=self._dtype())
+            records["key"] = np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(-1, KEY_BYTES)
+            records["vec"] = np.asarray(vectors, dtype=np.float32)
+            # One append per batch keeps records whole when several processes share the file
+            with open(self.path, "ab") as f:
+                f.write(records.tobytes())
+            self._refresh()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def stats(self) -> Dict:
+        return {"model": self.model_name, "entries": len(self), "hits": self.hits, "misses": self.misses}
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings wrapper that consults the on-disk cache before running the model.
+    Only documents (chunks) are persisted. Queries are looked up there too, but new query
+    vectors go to a bounded in-memory LRU instead, so user traffic never grows the file.
+    """
+
+    def __init__(self, base: Embeddings, model_name: str, cache: EmbeddingCache = None,
+                 query_cache_size: int = QUERY_CACHE_SIZE):
+        self.base = base
+        self.model_name = model_name
+        self.cache = cache or EmbeddingCache(model_name)
+        self.query_cache_size = query_cache_size
+        self._queries: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        self._query_lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [cache_key(self.model_name, t) for t in texts]
+        vectors = self.cache.get_many(keys)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+
+        if missing:
+            # Embed each distinct missing text once
+            unique = {}
+            for i in missing:
+                unique.setdefault(keys[i], texts[i])
+            fresh = self.base.embed_documents(list(unique.values()))
+            self.cache.put_many(list(unique.keys()), fresh)
+            by_key = dict(zip(unique.keys(), fresh))
+            for i in missing:
+                vectors[i] = by_key[keys[i]]
+
+        return [list(map(float, v)) for v in vectors]
+
+    def _remember_queries(self, keys: List[bytes], vectors: List[List[float]]):
+        with self._query_lock:
+            for key, vector in zip(keys, vectors):
+                self._queries[key] = vector
+                self._queries.move_to_end(key)
+            while len(self._queries) > self.query_cache_size:
+                self._queries.popitem(last=False)
+
+    def _cached_queries(self, keys: List[bytes]) -> List[Optional[List[float]]]:
+        vectors = self.cache.get_many(keys)
+        with self._query_lock:
+            for i, key in enumerate(keys):
+                if vectors[i] is None and key in self._queries:
+                    self._queries.move_to_end(key)
+                    vectors[i] = self._queries[key]
+        return vectors
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Batched `embed_query`: one model call for the texts not cached, nothing written to disk."""
+        keys = [cache_key(self.model_name, t) for t in texts]
+        vectors = self._cached_queries(keys)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+
+        if missing:
+            unique = {}
+            for i in missing:
+                unique.setdefault(keys[i], texts[i])
+            fresh = self.base.embed_documents(list(unique.values()))
+            self._remember_queries(list(unique.keys()), fresh)
+            by_key = dict(zip(unique.keys(), fresh))
+            for i in missing:
+                vectors[i] = by_key[keys[i]]
+
+        return [list(map(float, v)) for v in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = cache_key(self.model_name, text)
+        vector = self._cached_queries([key])[0]
+        if vector is None:
+            vector = self.base.embed_query(text)
+            self._remember_queries([key], [vector])
+        return list(map(float, vector))
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """Embed query-side texts in one batch, without persisting them when `embeddings` is cached."""
+    embed = getattr(embeddings, "embed_queries", None)
+    return embed(texts) if embed is not None else embeddings.embed_documents(texts)
+
+
+def cached_embeddings(model_name: str, backend: str = "torch") -> CachedEmbeddings:
+    """HuggingFace sentence-transformer embeddings (fp32 PyTorch or int8 ONNX) backed by the persistent cache."""
+    if backend == "onnx":
+        from app.onnx_backend import load_sentence_embeddings
+        # int8 vectors differ slightly from fp32 ones, so they get their own cache file
+        return CachedEmbeddings(load_sentence_embeddings(model_name), f"{model_name}@onnx-int8")
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return CachedEmbeddings(HuggingFaceEmbeddings(model_name=model_name), model_name)
@@ -0,0 +1,211 @@
+import os
+import json
+import uuid
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from app.inference_executor import InferenceExecutor, ExecutorOverloaded
+
+# ---------- CONFIG ----------
+EVAL_BATCH_SIZE = int(os.getenv("EVAL_BATCH_SIZE", "16"))
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "2"))  # batches in flight per job
+EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", "1"))  # batches evaluated at once, across all jobs
+EVAL_MAX_RUNNING_JOBS = int(os.getenv("EVAL_MAX_RUNNING_JOBS", "1"))  # further jobs wait as "queued"
+EVAL_BATCH_TIMEOUT_S = float(os.getenv("EVAL_BATCH_TIMEOUT_S", "600"))
+EVAL_MAX_JOBS = int(os.getenv("EVAL_MAX_JOBS", "20"))  # finished jobs kept for status/replay
+OVERLOAD_RETRY_S = 1.0
+# ----------------------------
+
+logger = logging.getLogger(__name__)
+
+# Evaluation batches run on their own small pool: a long eval job never holds the inference
+# executor's workers, so live /query traffic is not queued or shed behind it
+eval_executor = InferenceExecutor(max_workers=EVAL_WORKERS,
+                                  max_queue_depth=EVAL_CONCURRENCY * EVAL_MAX_RUNNING_JOBS,
+                                  timeout=EVAL_BATCH_TIMEOUT_S, name="eval")
+
+
+# ---------- Input Parsing ----------
+def _validate_entry(entry, line: int) -> Dict:
+    if not isinstance(entry, dict) or not isinstance(entry.get("question"), str) \
+            or not isinstance(entry.get("expected_answer"), str):
+        raise ValueError(f"entry {line}: expected an object with string 'question' and 'expected_answer'")
+    return {"question": entry["question"].strip(), "expected_answer": entry["expected_answer"]}
+
+async def read_test_entries(upload) -> List[Dict]:
+    """
+    Parse an uploaded test set: a JSON array, or JSONL (one object per line).
+    JSONL is parsed line by line while the upload is read, so the raw file is never held whole.
+    Raises ValueError on malformed input.
+    """
+    first = await upload.read(1024)
+    if first.lstrip().startswith(b"["):
+        rest = await upload.read()
+        try:
+            data = json.loads((first + rest).decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError(f"invalid JSON: {e}")
+        if not isinstance(data, list):
+            raise ValueError("JSON input must be an array of test entries")
+        return [_validate_entry(entry, i + 1) for i, entry in enumerate(data)]
+
+    entries, buffer, line_no = [], first, 0
+    while True:
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            line_no += 1
+            if raw.strip():
+                try:
+                    entries.append(_validate_entry(json.loads(raw.decode("utf-8")), line_no))
+                except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                    raise ValueError(f"line {line_no}: invalid JSON ({e})")
+        chunk = await upload.read(64 * 1024)
+        if not chunk:
+            break
+        buffer += chunk
+    if buffer.strip():
+        try:
+            entries.append(_validate_entry(json.loads(buffer.decode("utf-8")), line_no + 1))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ValueError(f"line {line_no + 1}: invalid JSON ({e})")
+    return entries
+
+
+# ---------- Jobs ----------
+class EvalJob:
+    """One evaluation run: per-question results accumulate in order of completion."""
+
+    def __init__(self, entries: List[Dict]):
+        self.id = uuid.uuid4().hex[:12]
+        self.entries = entries
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.results: List[Dict] = []
+        self.correct = 0
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self._changed = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def progress(self) -> Dict:
+        return {"processed": len(self.results), "total": len(self.entries)}
+
+    def summary(self) -> Dict:
+        processed = len(self.results)
+        grounded = [r["groundedness"] for r in self.results if r.get("groundedness") is not None]
+        relevant = [r["relevance"] for r in self.results if r.get("relevance") is not None]
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "error": self.error,
+            **self.progress(),
+            "correct_answers": self.correct,
+            "accuracy (%)": round(self.correct / processed * 100, 2) if processed else 0.0,
+            "mean_groundedness": round(sum(grounded) / len(grounded), 4) if grounded else None,
+            "mean_relevance": round(sum(relevant) / len(relevant), 4) if relevant else None,
+            "elapsed_s": round((self.finished or time.time()) - self.created, 2),
+        }
+
+    async def _publish(self, results: List[Dict]):
+        async with self._changed:
+            for result in results:
+                self.results.append(result)
+                self.correct += bool(result.get("matched"))
+            self._changed.notify_all()
+
+    async def _set_status(self, status: str, error: str = None):
+        async with self._changed:
+            self.status = status
+            self.error = error
+            if self.done:
+                self.finished = time.time()
+            self._changed.notify_all()
+
+    async def events(self) -> AsyncIterator[Dict]:
+        """Replay results produced so far, follow new ones, and finish with the summary."""
+        yield {"event": "job", "job_id": self.id, "total": len(self.entries)}
+        sent = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self.results) > sent or self.done)
+                fresh = self.results[sent:]
+                finished = self.done and sent + len(fresh) == len(self.results)
+            for result in fresh:
+                sent += 1
+                yield {"event": "result", "progress": {"processed": sent, "total": len(self.entries)}, **result}
+            if finished:
+                break
+        yield {"event": "summary", **self.summary()}
+
+    async def _run_batch(self, evaluate_fn: Callable, batch: List[Dict], limiter: asyncio.Semaphore):
+        async with limiter:
+            while True:
+                try:
+                    results = await eval_executor.run(evaluate_fn, batch)
+                    break
+                except ExecutorOverloaded:
+                    await asyncio.sleep(OVERLOAD_RETRY_S)
+                except Exception as e:
+                    logger.exception(f"[❌ Eval {self.id}] batch failed")
+                    results = [{**entry, "predicted_answer": None, "matched": False,
+                                "error": str(e) or type(e).__name__} for entry in batch]
+                    break
+        await self._publish(results)
+
+    async def run(self, evaluate_fn: Callable, slots: asyncio.Semaphore, batch_size: int = EVAL_BATCH_SIZE,
+                  concurrency: int = EVAL_CONCURRENCY):
+        async with slots:
+            await self._run(evaluate_fn, batch_size, concurrency)
+
+    async def _run(self, evaluate_fn: Callable, batch_size: int, concurrency: int):
+        await self._set_status("running")
+        logger.info(f"[🧪 Eval {self.id}] {len(self.entries)} questions, batches of {batch_size}")
+        try:
+            indexed = [{"index": i, **entry} for i, entry in enumerate(self.entries)]
+            limiter = asyncio.Semaphore(concurrency)
+            await asyncio.gather(*[
+                self._run_batch(evaluate_fn, indexed[start:start + batch_size], limiter)
+                for start in range(0, len(indexed), batch_size)
+            ])
+            await self._set_status("done")
+        except Exception as e:
+            logger.exception(f"[❌ Eval {self.id}] job failed")
+            await self._set_status("failed", str(e))
+
+
+class EvalJobManager:
+    """
+    Registry of evaluation jobs; finished jobs beyond `max_jobs` are forgotten oldest-first.
+    At most `max_running` jobs run at once, the others stay "queued" until a slot frees up.
+    """
+
+    def __init__(self, max_jobs: int = EVAL_MAX_JOBS, max_running: int = EVAL_MAX_RUNNING_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, EvalJob]" = OrderedDict()
+        self._slots = asyncio.Semaphore(max_running)
+
+    def start(self, entries: List[Dict], evaluate_fn: Callable) -> EvalJob:
+        job = EvalJob(entries)
+        self._jobs[job.id] = job
+        job._task = asyncio.create_task(job.run(evaluate_fn, self._slots))
+        for old_id in [jid for jid, j in self._jobs.items() if j.done][:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[old_id]
+        return job
+
+    def get(self, job_id: str) -> Optional[EvalJob]:
+        return self._jobs.get(job_id)
+
+    def shutdown(self):
+        eval_executor.shutdown()
+
+
+async def ndjson(events: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+    async for event in events:
+        yield (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
@@ -1,22 +1,91 @@
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from langchain_huggingface import HuggingFaceEmbeddings
-
-embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/LaBSE")
-
-def embed_text(text: str):
-    return embedding_model.embed_query(text)
-
-def evaluate_groundedness(answer: str, chunks: list) -> float:
-    """How well is the answer grounded in the top chunks?"""
-    ans_vec = embed_text(answer)
-    chunk_vecs = [embed_text(doc.page_content) for doc in chunks]
-    sims = cosine_similarity([ans_vec], chunk_vecs)[0]
-    return float(np.max(sims))  # highest support among chunks
-
-def evaluate_relevance(question: str, chunks: list) -> float:
-    """How relevant are the retrieved chunks to the query?"""
-    q_vec = embed_text(question)
-    chunk_vecs = [embed_text(doc.page_content) for doc in chunks]
-    sims = cosine_similarity([q_vec], chunk_vecs)[0]
-    return float(np.mean(sims))  # avg relevance
+import weakref
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.model_registry import model_registry
+from app.embedding_cache import embed_queries
+
+# FAISS row lookup per vector store: docstore id → index position
+_row_maps = weakref.WeakKeyDictionary()
+
+def get_embedding_model():
+    """LaBSE (behind the embedding cache), shared with retrieval via the model registry."""
+    return model_registry.get("labse")
+
+def embed_text(text: str):
+    return get_embedding_model().embed_query(text)
+
+def _index_rows(vectorstore):
+    rows = _row_maps.get(vectorstore)
+    if rows is None or len(rows) != len(vectorstore.index_to_docstore_id):
+        rows = {doc_id: pos for pos, doc_id in vectorstore.index_to_docstore_id.items()}
+        _row_maps[vectorstore] = rows
+    return rows
+
+def chunk_vectors(chunks: list, vectorstore=None) -> np.ndarray:
+    """
+    Embeddings for retrieved chunks. Vectors are read straight from the FAISS index when
+    the chunk's docstore id is known; anything else goes through the embedding cache.
+    """
+    vectors = [None] * len(chunks)
+    if vectorstore is not None:
+        rows = _index_rows(vectorstore)
+        for i, doc in enumerate(chunks):
+            pos = rows.get(getattr(doc, "id", None))
+            if pos is not None:
+                vectors[i] = vectorstore.index.reconstruct(int(pos))
+
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if missing:
+        fresh = get_embedding_model().embed_documents([chunks[i].page_content for i in missing])
+        for i, vec in zip(missing, fresh):
+            vectors[i] = vec
+    return np.asarray(vectors, dtype=np.float32)
+
+def evaluate_groundedness(answer: str, chunks: list, vectorstore=None) -> float:
+    """How well is the answer grounded in the top chunks?"""
+    ans_vec = embed_text(answer)
+    chunk_vecs = chunk_vectors(chunks, vectorstore)
+    sims = cosine_similarity([ans_vec], chunk_vecs)[0]
+    return float(np.max(sims))  # highest support among chunks
+
+def evaluate_relevance(question: str, chunks: list, vectorstore=None) -> float:
+    """How relevant are the retrieved chunks to the query?"""
+    q_vec = embed_text(question)
+    chunk_vecs = chunk_vectors(chunks, vectorstore)
+    sims = cosine_similarity([q_vec], chunk_vecs)[0]
+    return float(np.mean(sims))  # avg relevance
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=-1, keepdims=True), 1e-12)
+
+def evaluate_batch(questions: list, answers: list, chunks_list: list, vectorstore=None, embeddings=None) -> dict:
+    """
+    Vectorized groundedness (max answer↔chunk cosine) and relevance (mean question↔chunk cosine)
+    for a whole batch: questions and answers are embedded in one call and chunk vectors are
+    read from the index, then all similarities come from matrix products.
+    """
+    embeddings = embeddings or get_embedding_model()
+    n = len(questions)
+    text_vecs = _unit_rows(np.asarray(embed_queries(embeddings, list(questions) + list(answers)), dtype=np.float32))
+    q_vecs, a_vecs = text_vecs[:n], text_vecs[n:]
+
+    groundedness = np.full(n, np.nan, dtype=np.float32)
+    relevance = np.full(n, np.nan, dtype=np.float32)
+    sizes = [len(chunks) for chunks in chunks_list]
+    if sum(sizes):
+        all_chunks = [doc for chunks in chunks_list for doc in chunks]
+        chunk_vecs = _unit_rows(chunk_vectors(all_chunks, vectorstore))
+        owner = np.repeat(np.arange(n), sizes)
+        q_sims = np.einsum("ij,ij->i", chunk_vecs, q_vecs[owner])
+        a_sims = np.einsum("ij,ij->i", chunk_vecs, a_vecs[owner])
+        has_chunks = np.array(sizes) > 0
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])[has_chunks]
+        groundedness[has_chunks] = np.maximum.reduceat(a_sims, starts)
+        relevance[has_chunks] = np.add.reduceat(q_sims, starts) / np.array(sizes)[has_chunks]
+
+    # Questions without retrieved chunks have no score
+    return {
+        "groundedness": [None if np.isnan(x) else float(x) for x in groundedness],
+        "relevance": [None if np.isnan(x) else float(x) for x in relevance],
+    }
@@ -0,0 +1,83 @@
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ---------- CONFIG ----------
+MAX_WORKERS = int(os.getenv("INFERENCE_MAX_WORKERS", "2"))
+MAX_QUEUE_DEPTH = int(os.getenv("INFERENCE_MAX_QUEUE_DEPTH", "16"))
+REQUEST_TIMEOUT_S = float(os.getenv("INFERENCE_TIMEOUT_S", "60"))
+# ----------------------------
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorOverloaded(RuntimeError):
+    """Raised when the inference queue is full and the request should be shed (HTTP 503)."""
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for blocking model inference.
+    At most `max_workers` jobs run at once and at most `max_queue_depth` more may wait;
+    anything beyond that is rejected immediately instead of piling up behind slow queries.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_queue_depth: int = MAX_QUEUE_DEPTH,
+                 timeout: float = REQUEST_TIMEOUT_S, name: str = "inference"):
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Jobs currently running or waiting for a worker."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a free worker."""
+        return max(0, self._in_flight - self.max_workers)
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, fn, *args, timeout: float = None, **kwargs):
+        """
+        Run `fn(*args, **kwargs)` on the pool and await its result.
+        Raises ExecutorOverloaded when the queue is full and asyncio.TimeoutError on timeout.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue_depth:
+                raise ExecutorOverloaded(
+                    f"Inference queue full ({self._in_flight} in flight, limit "
+                    f"{self.max_workers + self.max_queue_depth})"
+                )
+            self._in_flight += 1
+
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        # The slot is held until the work really finishes, even if the caller times out,
+        # so timed-out jobs still count against the queue limit.
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()  # only succeeds if the job has not started yet
+            logger.warning(f"[⏱️ Inference Timeout] {getattr(fn, '__name__', fn)} exceeded {timeout or self.timeout}s")
+            raise
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+inference_executor = InferenceExecutor()
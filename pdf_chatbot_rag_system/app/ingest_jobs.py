@@ -0,0 +1,201 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from app.chunker import chunk_id, chunk_pdf, write_chunks
+from app.dedup import deduplicate
+from app.embedder import load_chunks, translate_chunks, chunks_to_documents, build_full_index
+from app.mcq_index import McqIndex
+from app.model_registry import model_registry
+from app.vector_store import DEFAULT_COLLECTION, collection_paths, index_write_lock, staged_index
+
+# ---------- CONFIG ----------
+UPLOAD_DIR = "data/uploads"
+INGEST_MAX_MB = float(os.getenv("INGEST_MAX_MB", "50"))
+INGEST_MAX_JOBS = int(os.getenv("INGEST_MAX_JOBS", "20"))  # finished jobs kept for status polling
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# ----------------------------
+
+logger = logging.getLogger(__name__)
+
+INGEST_STEPS = ("upload", "extract", "translate", "embed", "publish")
+
+
+class UploadRejected(ValueError):
+    """The uploaded file is not an acceptable PDF (HTTP 400, or 413 when too large)."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# ---------- Jobs ----------
+class IngestJob:
+    """One uploaded PDF on its way into the live index."""
+
+    def __init__(self, filename: str, collection: str = DEFAULT_COLLECTION):
+        self.id = uuid.uuid4().hex[:12]
+        self.filename = filename
+        self.collection = collection
+        self.path = os.path.join(UPLOAD_DIR, f"{self.id}.pdf")
+        self.status = "queued"
+        self.step = "upload"
+        self.error: Optional[str] = None
+        self.result: Dict = {}
+        self.created = time.time()
+        self.finished: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def summary(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "collection": self.collection,
+            "status": self.status,
+            "step": self.step,
+            "error": self.error,
+            **self.result,
+            "elapsed_s": round((self.finished or time.time()) - self.created, 2),
+        }
+
+
+def ingest_pdf(job: IngestJob, on_published: Callable[[str], object] = None) -> Dict:
+    """
+    Blocking ingestion of one uploaded PDF: extract → clean → chunk → dedup → translate → embed → index.
+    The new chunks are merged into the job's collection (created if new), new near-duplicates of
+    chunks already there are folded into them, and a complete index is built in a
+    staging directory (cached embeddings are reused, so only new chunks hit LaBSE). Only then
+    is it published in place of the live index and `on_published(collection)` called to swap it
+    into the serving process. Until that moment queries keep using the old index untouched.
+    Everything from reading the collection's chunks to writing them back runs under the
+    collection's index lock, so concurrent ingestions (in any process) are applied one after another.
+    """
+    paths = collection_paths(job.collection)
+    job.step = "extract"
+    records, qa_pairs = chunk_pdf(job.path, source=job.filename)
+    if not records:
+        raise ValueError("No text could be extracted from the PDF (scanned document?)")
+
+    # Another worker ingesting into this collection waits here until our publish is complete
+    with index_write_lock(paths.index_dir):
+        try:
+            chunks = load_chunks(paths.chunks_path)
+        except FileNotFoundError:  # first document of a new collection
+            chunks = []
+        known = {chunk.get("id") or chunk_id(chunk["text"]) for chunk in chunks}
+        known.update(member["id"] for chunk in chunks for member in chunk.get("metadata", {}).get("duplicates", []))
+        fresh = [record for record in records if record["id"] not in known]
+        # Indexed chunks stay as they are; fresh ones near-duplicating them are folded into them
+        chunks, stats = deduplicate(fresh, existing=chunks)
+        kept = {id(chunk) for chunk in chunks}
+        added = [record for record in fresh if id(record) in kept]
+        logger.info(f"[📥 Ingest {job.id}] {len(records)} chunks extracted, {len(added)} new, "
+                    f"{stats['removed']} near-duplicates folded")
+
+        job.step = "translate"
+        translate_chunks(added)
+
+        job.step = "embed"
+        with staged_index(paths.index_dir) as staging_dir:
+            build_full_index(chunks_to_documents(chunks), model_registry.get("labse"), staging_dir)
+            job.step = "publish"
+        write_chunks(chunks, paths.chunks_path)
+        existing = McqIndex.load(paths.mcq_path)
+        McqIndex((existing.pairs if existing else []) + qa_pairs).save(paths.mcq_path)
+
+    index_version = on_published(job.collection) if on_published else None
+    return {
+        "chunks_extracted": len(records),
+        "chunks_added": len(added),
+        "near_duplicates": stats["removed"],
+        "chunks_total": len(chunks),
+        "mcq_questions": len(qa_pairs),
+        "index_version": index_version,
+    }
+
+
+class IngestJobManager:
+    """
+    Runs ingestion jobs one at a time on a dedicated background thread (each job merges into
+    the shared corpus), away from the inference executor so queries are never queued behind
+    an index build. Finished jobs beyond `max_jobs` are forgotten oldest-first.
+    """
+
+    def __init__(self, ingest_fn: Callable[[IngestJob], Dict], max_jobs: int = INGEST_MAX_JOBS):
+        self.ingest_fn = ingest_fn
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+
+    async def submit(self, upload, collection: str = DEFAULT_COLLECTION) -> IngestJob:
+        """Save the uploaded PDF to disk (size-limited) and queue its ingestion. Raises UploadRejected."""
+        try:
+            collection_paths(collection)
+        except ValueError as e:
+            raise UploadRejected(str(e))
+        job = IngestJob(os.path.basename(upload.filename or "document.pdf"), collection)
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        limit = int(INGEST_MAX_MB * 1024 * 1024)
+        size = 0
+        try:
+            with open(job.path, "wb") as f:
+                while True:
+                    chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    if size == 0 and not chunk.startswith(b"%PDF"):
+                        raise UploadRejected("Not a PDF file")
+                    size += len(chunk)
+                    if size > limit:
+                        raise UploadRejected(f"File exceeds {INGEST_MAX_MB:g} MB", status_code=413)
+                    f.write(chunk)
+            if size == 0:
+                raise UploadRejected("Empty file")
+        except UploadRejected:
+            os.remove(job.path)
+            raise
+
+        with self._lock:
+            self._jobs[job.id] = job
+            for old_id in [jid for jid, j in self._jobs.items() if j.done][:max(0, len(self._jobs) - self.max_jobs)]:
+                del self._jobs[old_id]
+        self._pool.submit(self._run, job)
+        logger.info(f"[📥 Ingest {job.id}] queued {job.filename} → '{collection}' ({size / 1024:.0f} KB)")
+        return job
+
+    def _run(self, job: IngestJob):
+        job.status = "running"
+        start = time.perf_counter()
+        try:
+            job.result = self.ingest_fn(job)
+            job.status = "done"
+            logger.info(f"[✅ Ingest {job.id}] {job.filename} live after {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            logger.exception(f"[❌ Ingest {job.id}] failed during {job.step}")
+            job.error = str(e) or type(e).__name__
+            job.status = "failed"
+        finally:
+            job.finished = time.time()
+            try:
+                os.remove(job.path)  # done or failed, the upload is no longer needed
+            except FileNotFoundError:
+                pass
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[IngestJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,35 +1,76 @@
-from langdetect import detect, DetectorFactory
-from langdetect.lang_detect_exception import LangDetectException
-import logging
-import re
-
-# Ensure consistent results
-DetectorFactory.seed = 42
-
-SUPPORTED_LANGS = {"en", "bn"}
-
-logger = logging.getLogger(__name__)
-
-def detect_language(text: str) -> str:
-    """
-    Detects the language of the input text.
-    Returns:
-        'bn' for Bangla, 'en' for English, or 'unknown' if not supported.
-    """
-    try:
-        cleaned_text = text.strip()
-        if not cleaned_text or len(cleaned_text) < 2 or not re.search(r'\w', cleaned_text):
-            logger.warning("[LangDetect] Empty or invalid input received.")
-            return "unknown"
-
-        lang = detect(cleaned_text)
-
-        if lang in SUPPORTED_LANGS:
-            logger.info(f"[LangDetect] Detected: {lang}")
-            return lang
-        else:
-            logger.warning(f"[LangDetect] Detected unsupported language: {lang}")
-            return "unknown"
-    except LangDetectException as e:
-        logger.error(f"[LangDetect Error] Failed to detect language: {e}")
-        return "unknown"
+import os
+import logging
+from typing import Tuple
+
+# ---------- CONFIG ----------
+SUPPORTED_LANGS = {"en", "bn"}
+BN_MIN_SHARE = float(os.getenv("LANG_BN_MIN_SHARE", "0.4"))  # Bengali share of letters at or above which text is Bangla
+EN_MIN_SHARE = float(os.getenv("LANG_EN_MIN_SHARE", "0.9"))  # Latin share of letters at or above which text is English
+MIN_LETTERS = 2
+STATISTICAL_FALLBACK = os.getenv("LANG_STATISTICAL_FALLBACK", "1") == "1"  # langdetect for ambiguous mixes
+# ----------------------------
+
+logger = logging.getLogger(__name__)
+
+_langdetect = None
+
+
+def script_counts(text: str) -> Tuple[int, int, int]:
+    """
+    Single pass over the text: (Bengali, Latin, other) letter counts.
+    Bengali is the U+0980–U+09FF block (letters, vowel signs, digits); Latin is ASCII
+    letters plus Latin-1/Extended-A/B. Spaces, punctuation and ASCII digits are ignored.
+    """
+    bengali = latin = other = 0
+    for ch in text:
+        code = ord(ch)
+        if 0x0980 <= code <= 0x09FF:
+            bengali += 1
+        elif code < 0x80:
+            if ("a" <= ch <= "z") or ("A" <= ch <= "Z"):
+                latin += 1
+        elif 0xC0 <= code <= 0x24F:
+            latin += 1
+        elif ch.isalpha():
+            other += 1
+    return bengali, latin, other
+
+
+def _statistical(text: str) -> str:
+    """langdetect, loaded on first use, restricted to the supported languages."""
+    global _langdetect
+    if _langdetect is None:
+        from langdetect import detect, DetectorFactory
+        DetectorFactory.seed = 42  # Ensure consistent results
+        _langdetect = detect
+    lang = _langdetect(text)
+    return lang if lang in SUPPORTED_LANGS else "unknown"
+
+
+def detect_language(text: str) -> str:
+    """
+    Detects the language of the input text from its Unicode script mix.
+    Returns:
+        'bn' for Bangla, 'en' for English, or 'unknown' if not supported.
+    Text that clears neither share threshold (e.g. mostly Latin with some Bengali)
+    goes to the statistical detector when enabled, else to the majority script.
+    """
+    bengali, latin, other = script_counts(text)
+    letters = bengali + latin + other
+    if letters < MIN_LETTERS:
+        logger.warning("[LangDetect] Empty or invalid input received.")
+        return "unknown"
+
+    if bengali / letters >= BN_MIN_SHARE:
+        return "bn"
+    if latin / letters >= EN_MIN_SHARE:
+        return "en"
+    if other > bengali + latin:
+        return "unknown"
+
+    if STATISTICAL_FALLBACK:
+        try:
+            return _statistical(text.strip())
+        except Exception as e:  # langdetect missing, or no usable features in the text
+            logger.debug(f"[LangDetect] Statistical fallback failed: {e}")
+    return "bn" if bengali >= latin else "en"
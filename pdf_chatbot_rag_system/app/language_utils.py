@@ -1,88 +1,113 @@
-import os
-import logging
-from dotenv import load_dotenv
-from langdetect import detect, DetectorFactory
-from transformers import pipeline, T5Tokenizer, AutoModelForSeq2SeqLM
-
-# ---------- Setup ----------
-load_dotenv()
-HF_TOKEN = os.getenv("HUGGINGFACE_TOKEN")
-
-if HF_TOKEN is None:
-    raise RuntimeError("HUGGINGFACE_TOKEN is not set in .env or environment variables.")
-
-DetectorFactory.seed = 42
-SUPPORTED_LANGS = {"en", "bn"}
-
-logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
-
-# ---------- Model Config ----------
-BN_EN_MODEL = "csebuetnlp/banglat5_nmt_bn_en"
-EN_BN_MODEL = "csebuetnlp/banglat5_nmt_en_bn"
-
-_bn2en_pipeline = None
-_en2bn_pipeline = None
-
-# ---------- Language Detection ----------
-def detect_language(text: str) -> str:
-    try:
-        cleaned = text.strip()
-        if not cleaned or len(cleaned) < 2:
-            logger.warning("[LangDetect] Input too short for language detection.")
-            return "unknown"
-
-        lang = detect(cleaned)
-        return lang if lang in SUPPORTED_LANGS else "unknown"
-    except Exception as e:
-        logger.error(f"[LangDetect Error] {e}")
-        return "unknown"
-
-# ---------- Translation Model Loaders ----------
-def load_bn2en():
-    global _bn2en_pipeline
-    if _bn2en_pipeline is None:
-        logger.info("🔁 Loading Bangla → English model...")
-        tokenizer = T5Tokenizer.from_pretrained(BN_EN_MODEL, token=HF_TOKEN)
-        model = AutoModelForSeq2SeqLM.from_pretrained(BN_EN_MODEL, token=HF_TOKEN)
-        _bn2en_pipeline = pipeline("text2text-generation", model=model, tokenizer=tokenizer, device=-1)
-    return _bn2en_pipeline
-
-def load_en2bn():
-    global _en2bn_pipeline
-    if _en2bn_pipeline is None:
-        logger.info("🔁 Loading English → Bangla model...")
-        tokenizer = T5Tokenizer.from_pretrained(EN_BN_MODEL, token=HF_TOKEN)
-        model = AutoModelForSeq2SeqLM.from_pretrained(EN_BN_MODEL, token=HF_TOKEN)
-        _en2bn_pipeline = pipeline("text2text-generation", model=model, tokenizer=tokenizer, device=-1)
-    return _en2bn_pipeline
-
-# ---------- Translation Functions ----------
-def translate_bn_to_en(text: str) -> str:
-    try:
-        pipeline_bn2en = load_bn2en()
-        result = pipeline_bn2en(text.strip(), max_length=256, clean_up_tokenization_spaces=True)
-        return result[0]["generated_text"].strip()
-    except Exception as e:
-        logger.warning(f"[⚠️ Translation Error] BN → EN: {e}")
-        return text
-
-def translate_en_to_bn(text: str) -> str:
-    try:
-        pipeline_en2bn = load_en2bn()
-        result = pipeline_en2bn(text.strip(), max_length=256, clean_up_tokenization_spaces=True)
-        return result[0]["generated_text"].strip()
-    except Exception as e:
-        logger.warning(f"[⚠️ Translation Error] EN → BN: {e}")
-        return text
-
-# ---------- General Translator ----------
-def translate(text: str, direction: str = "bn2en") -> str:
-    if direction == "bn2en":
-        return translate_bn_to_en(text)
-    elif direction == "en2bn":
-        return translate_en_to_bn(text)
-    else:
-        raise ValueError(f"Unsupported translation direction: {direction}")
-
-
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from app.batcher import get_batcher
+from app.language_detect import detect_language, SUPPORTED_LANGS  # re-exported for existing imports
+from app.metrics import TRANSLATION_FALLBACKS
+from app.model_registry import model_registry
+
+# ---------- Setup ----------
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+_fallbacks: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar("translation_fallbacks", default=None)
+
+# ---------- Translation Model Loaders ----------
+def load_bn2en():
+    return model_registry.get("translate_bn2en")
+
+def load_en2bn():
+    return model_registry.get("translate_en2bn")
+
+# ---------- Batched Translation ----------
+def _run_translation_batch(load_pipeline, texts: List[str]) -> List[str]:
+    """One batched forward pass over all pending texts for a translation direction."""
+    translator = load_pipeline()
+    results = translator(
+        [t.strip() for t in texts],
+        max_length=256,
+        clean_up_tokenization_spaces=True,
+        batch_size=len(texts),
+    )
+    return [r[0]["generated_text"].strip() if isinstance(r, list) else r["generated_text"].strip()
+            for r in results]
+
+def _bn2en_batcher():
+    return get_batcher("translate_bn2en", lambda texts: _run_translation_batch(load_bn2en, texts))
+
+def _en2bn_batcher():
+    return get_batcher("translate_en2bn", lambda texts: _run_translation_batch(load_en2bn, texts))
+
+# ---------- Fallback Tracking ----------
+def _record_fallback(direction: str, n: int = 1):
+    TRANSLATION_FALLBACKS.inc(n, direction=direction)
+    counts = _fallbacks.get()
+    if counts is not None:
+        counts[direction] = counts.get(direction, 0) + n
+
+@contextmanager
+def track_fallbacks(counts: Dict[str, int] = None):
+    """
+    Count the translations that fell back to their source text within this context (same
+    thread or task) into {direction: n}. Pass the same dict again to keep counting for one
+    request across several executor jobs.
+    """
+    counts = {} if counts is None else counts
+    token = _fallbacks.set(counts)
+    try:
+        yield counts
+    finally:
+        _fallbacks.reset(token)
+
+# ---------- Translation Functions ----------
+def translate_bn_to_en(text: str) -> str:
+    try:
+        return _bn2en_batcher().submit(text)
+    except Exception as e:
+        logger.warning(f"[⚠️ Translation Error] BN → EN: {e}")
+        _record_fallback("bn2en")
+        return text
+
+def translate_en_to_bn(text: str) -> str:
+    try:
+        return _en2bn_batcher().submit(text)
+    except Exception as e:
+        logger.warning(f"[⚠️ Translation Error] EN → BN: {e}")
+        _record_fallback("en2bn")
+        return text
+
+def translate_batch_bn_to_en(texts: List[str], strict: bool = False) -> List[str]:
+    """
+    Translate many Bangla strings; falls back to the originals if the batch fails.
+    With `strict` the error is raised instead, for callers that persist the result.
+    """
+    try:
+        return _bn2en_batcher().submit_many(texts)
+    except Exception as e:
+        if strict:
+            raise
+        logger.warning(f"[⚠️ Translation Error] BN → EN batch: {e}")
+        _record_fallback("bn2en", len(texts))
+        return list(texts)
+
+def translate_batch_en_to_bn(texts: List[str]) -> List[str]:
+    """Translate many English strings; falls back to the originals if the batch fails."""
+    try:
+        return _en2bn_batcher().submit_many(texts)
+    except Exception as e:
+        logger.warning(f"[⚠️ Translation Error] EN → BN batch: {e}")
+        _record_fallback("en2bn", len(texts))
+        return list(texts)
+
+# ---------- General Translator ----------
+def translate(text: str, direction: str = "bn2en") -> str:
+    if direction == "bn2en":
+        return translate_bn_to_en(text)
+    elif direction == "en2bn":
+        return translate_en_to_bn(text)
+    else:
+        raise ValueError(f"Unsupported translation direction: {direction}")
+
+
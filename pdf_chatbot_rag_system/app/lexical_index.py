@@ -0,0 +1,150 @@
+import os
+import re
+import json
+import logging
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# ---------- CONFIG ----------
+LEXICAL_INDEX_FILE = "lexical_index.npz"
+LEXICAL_VOCAB_FILE = "lexical_vocab.json"
+BM25_K1 = 1.5
+BM25_B = 0.75
+# ----------------------------
+
+logger = logging.getLogger(__name__)
+
+# Nukta letters have both a precomposed and a base + ◌় spelling; fold to the precomposed one
+NUKTA_FORMS = {
+    "\u09A1\u09BC": "\u09DC",  # ড়
+    "\u09A2\u09BC": "\u09DD",  # ঢ়
+    "\u09AF\u09BC": "\u09DF",  # য়
+}
+BANGLA_DIGITS = str.maketrans("০১২৩৪৫৬৭৮৯", "0123456789")
+TOKEN_PATTERN = re.compile(r'[\u0980-\u09FF]+|[a-z0-9]+')
+ZERO_WIDTH = re.compile(r'[\u200B-\u200D\uFEFF]')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize Bangla/English text for lexical matching: NFC, canonical nukta letters,
+    no zero-width joiners, dari (।/॥) as a separator, ASCII digits and lowercase Latin.
+    """
+    text = unicodedata.normalize("NFC", text)
+    for decomposed, composed in NUKTA_FORMS.items():
+        text = text.replace(decomposed, composed)
+    text = ZERO_WIDTH.sub("", text)
+    text = text.replace("\u0964", " ").replace("\u0965", " ")  # dari / double dari
+    return text.translate(BANGLA_DIGITS).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(normalize_text(text))
+
+
+class LexicalIndex:
+    """
+    In-process BM25 inverted index.
+    Postings are stored CSR-style: for term t, `postings_docs[offsets[t]:offsets[t+1]]` holds the
+    rows containing t (uint32) and `postings_tfs` the matching term frequencies (uint16).
+    """
+
+    def __init__(self, vocab: Dict[str, int], doc_ids: List[str], offsets: np.ndarray,
+                 postings_docs: np.ndarray, postings_tfs: np.ndarray, doc_lengths: np.ndarray):
+        self.vocab = vocab
+        self.doc_ids = doc_ids
+        self.offsets = offsets
+        self.postings_docs = postings_docs
+        self.postings_tfs = postings_tfs
+        self.doc_lengths = doc_lengths
+        self.avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+        doc_freqs = np.diff(offsets)
+        n = len(doc_ids)
+        self.idf = np.log(1 + (n - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, str]]) -> "LexicalIndex":
+        """Build from (doc_id, text) pairs."""
+        vocab: Dict[str, int] = {}
+        postings: List[List[Tuple[int, int]]] = []
+        doc_ids, doc_lengths = [], []
+
+        for row, (doc_id, text) in enumerate(documents):
+            tokens = tokenize(text)
+            doc_ids.append(doc_id)
+            doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_id = vocab.setdefault(term, len(vocab))
+                if term_id == len(postings):
+                    postings.append([])
+                postings[term_id].append((row, min(tf, 65535)))
+
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(p) for p in postings])
+        flat = [entry for plist in postings for entry in plist]
+        postings_docs = np.array([row for row, _ in flat], dtype=np.uint32)
+        postings_tfs = np.array([tf for _, tf in flat], dtype=np.uint16)
+        return cls(vocab, doc_ids, offsets, postings_docs, postings_tfs, np.array(doc_lengths, dtype=np.uint32))
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore) -> "LexicalIndex":
+        """Index every document held in a LangChain FAISS store, keyed by its docstore ID."""
+        ids = list(vectorstore.index_to_docstore_id.values())
+        return cls.build((doc_id, vectorstore.docstore.search(doc_id).page_content) for doc_id in ids)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k (doc_id, BM25 score) for the query; empty if no query term is indexed."""
+        term_ids = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        if not term_ids:
+            return []
+
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths / max(self.avg_doc_length, 1e-9))
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            rows = self.postings_docs[start:end]
+            tfs = self.postings_tfs[start:end].astype(np.float32)
+            scores[rows] += self.idf[term_id] * tfs * (BM25_K1 + 1) / (tfs + length_norm[rows])
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.doc_ids[row], float(scores[row])) for row in candidates]
+
+    def save(self, index_dir: str):
+        os.makedirs(index_dir, exist_ok=True)
+        np.savez(
+            os.path.join(index_dir, LEXICAL_INDEX_FILE),
+            offsets=self.offsets,
+            postings_docs=self.postings_docs,
+            postings_tfs=self.postings_tfs,
+            doc_lengths=self.doc_lengths,
+        )
+        with open(os.path.join(index_dir, LEXICAL_VOCAB_FILE), "w", encoding="utf-8") as f:
+            json.dump({"vocab": self.vocab, "doc_ids": self.doc_ids}, f, ensure_ascii=False)
+        logger.info(f"✅ Lexical index saved ({len(self.doc_ids)} docs, {len(self.vocab)} terms)")
+
+    @classmethod
+    def load(cls, index_dir: str) -> "LexicalIndex":
+        arrays = np.load(os.path.join(index_dir, LEXICAL_INDEX_FILE))
+        with open(os.path.join(index_dir, LEXICAL_VOCAB_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(meta["vocab"], meta["doc_ids"], arrays["offsets"], arrays["postings_docs"],
+                   arrays["postings_tfs"], arrays["doc_lengths"])
+
+    @staticmethod
+    def exists(index_dir: str) -> bool:
+        return os.path.exists(os.path.join(index_dir, LEXICAL_INDEX_FILE))
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """Fuse several ranked ID lists: score(d) = Σ 1 / (k + rank)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
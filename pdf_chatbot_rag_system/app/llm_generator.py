@@ -1,55 +1,222 @@
-import logging
-from transformers import pipeline
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-
-from app.language_utils import detect_language, translate_bn_to_en, translate_en_to_bn
-
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-# Load English QA pipeline once
-logger.info("[🤖] Loading English QA model (roberta-base-squad2)...")
-qa_en_pipeline = pipeline(
-    "question-answering",
-    model="deepset/roberta-base-squad2",
-    tokenizer="deepset/roberta-base-squad2"
-)
-
-def generate_answer(query: str, chunks, lang: str = "en") -> str:
-    """
-    Generate a grounded answer from provided chunks.
-    For Bangla queries, uses Bangla → English translation for QA, then translates back.
-    """
-    logger.info(f"[🔍] Generating answer for: {query} ({lang})")
-
-    if not chunks:
-        return "প্রাসঙ্গিক তথ্য পাওয়া যায়নি।" if lang == "bn" else "No relevant context found."
-
-    # Combine top chunks into context (limit to 3500 characters)
-    context = " ".join([doc.page_content for doc in chunks[:2]])[:1500]
-
-    try:
-        if lang == "bn":
-            query_en = translate_bn_to_en(query)
-            context_en = translate_bn_to_en(context)
-            logger.info(f"[→EN] Q: {query_en}")
-            logger.info(f"[→EN] Context: {context_en[:256]}...")
-
-            result = qa_en_pipeline(question=query_en, context=context_en)
-            answer_en = result.get("answer", "").strip()
-            logger.info(f"[←EN] Extracted English answer: {answer_en}")
-
-            answer_bn = translate_en_to_bn(answer_en)
-            logger.info(f"[←BN] Translated Bangla answer: {answer_bn}")
-            return answer_bn or "⚠️ কোনো উত্তর পাওয়া যায়নি।"
-
-        else:
-            result = qa_en_pipeline(question=query, context=context)
-            answer = result.get("answer", "").strip()
-            logger.info(f"[EN] English answer: {answer}")
-            return answer or "⚠️ Could not generate answer."
-
-    except Exception as e:
-        logger.error(f"[QA/Translation Error]: {e}")
-        return "⚠️ An error occurred while generating the answer."
+import os
+import logging
+
+from app.language_utils import (
+    translate_bn_to_en, translate_en_to_bn,
+    translate_batch_bn_to_en, translate_batch_en_to_bn,
+)
+from app.batcher import get_batcher
+from app.model_registry import model_registry
+from app.tracing import stage
+
+# ---------- CONFIG ----------
+QA_CONTEXT_MODE = os.getenv("QA_CONTEXT_MODE", "concat")  # "concat": first two chunks joined; "multi": score each chunk separately
+QA_BREADTH = int(os.getenv("QA_BREADTH", "10"))  # retrieved chunks the QA model looks at (multi mode)
+QA_WAVE_SIZE = int(os.getenv("QA_WAVE_SIZE", "4"))  # contexts per batched QA pass; 0 = all in one pass
+QA_EARLY_STOP_SCORE = float(os.getenv("QA_EARLY_STOP_SCORE", "0.8"))  # stop once a span scores this high
+CONTEXT_CHAR_LIMIT = 1500
+# ----------------------------
+
+ANSWER_ERROR = "⚠️ An error occurred while generating the answer."
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _run_qa_batch(pairs):
+    """Answer many (question, context) pairs in one batched forward pass."""
+    # English QA model (roberta-base-squad2), looked up per batch: the registry may have evicted it
+    qa_en_pipeline = model_registry.get("qa_en")
+    results = qa_en_pipeline(
+        question=[q for q, _ in pairs],
+        context=[c for _, c in pairs],
+        batch_size=len(pairs),
+    )
+    # The pipeline unwraps single-item batches into a bare dict
+    return results if isinstance(results, list) else [results]
+
+qa_batcher = get_batcher("qa_en", _run_qa_batch)
+
+def answer_question_en(question: str, context: str) -> dict:
+    """Extractive QA for one pair, coalesced with concurrent callers by the micro-batcher."""
+    return qa_batcher.submit((question, context))
+
+def english_context(chunks, limit: int = CONTEXT_CHAR_LIMIT) -> str:
+    """
+    Join the English translations stored with each chunk at index time.
+    Returns "" if any chunk lacks one (e.g. an index built before the translation stage).
+    """
+    texts = [doc.metadata.get("text_en") for doc in chunks]
+    if not texts or not all(texts):
+        return ""
+    return " ".join(texts)[:limit]
+
+def english_contexts(chunks_list, langs):
+    """
+    English text of every chunk, per question: the translation stored at index time, else
+    the chunk itself (English questions) or its translation, done in one batched call.
+    """
+    contexts = []
+    missing = []
+    for q, (chunks, lang) in enumerate(zip(chunks_list, langs)):
+        texts = []
+        for c, doc in enumerate(chunks):
+            text = doc.page_content if lang != "bn" else doc.metadata.get("text_en")
+            if not text:
+                missing.append((q, c))
+                text = doc.page_content
+            texts.append(text[:CONTEXT_CHAR_LIMIT])
+        contexts.append(texts)
+    if missing:
+        with stage("translate"):
+            translated = translate_batch_bn_to_en([contexts[q][c] for q, c in missing])
+        for (q, c), text in zip(missing, translated):
+            contexts[q][c] = text[:CONTEXT_CHAR_LIMIT]
+    return contexts
+
+def extract_best_answers(questions_en, chunks_list, langs):
+    """
+    Multi-context extraction: run the QA model over each of the top QA_BREADTH chunks
+    separately and keep the highest-scoring span per question.
+
+    Chunks are scored in rank order, QA_WAVE_SIZE at a time; each wave (across all
+    questions) is one batched forward pass. A question drops out once its best span
+    scores at least QA_EARLY_STOP_SCORE, so confident answers in the top chunks skip the
+    rest. Returns {"answer", "score", "context_rank"} per question (rank is 0-based).
+    """
+    candidates = [chunks[:QA_BREADTH] for chunks in chunks_list]
+    best = [{"answer": "", "score": 0.0, "context_rank": None} for _ in questions_en]
+    wave = QA_WAVE_SIZE if QA_WAVE_SIZE > 0 else max(len(c) for c in candidates)
+    active = [i for i, chunks in enumerate(candidates) if chunks]
+    offset = 0
+    while active:
+        contexts = english_contexts([candidates[i][offset:offset + wave] for i in active],
+                                    [langs[i] for i in active])
+        pairs, owners = [], []
+        for i, texts in zip(active, contexts):
+            for rank, text in enumerate(texts, start=offset):
+                pairs.append((questions_en[i], text))
+                owners.append((i, rank))
+        with stage("qa"):
+            results = qa_batcher.submit_many(pairs)
+        for (i, rank), result in zip(owners, results):
+            answer = result.get("answer", "").strip()
+            score = float(result.get("score", 0.0))
+            if answer and (best[i]["context_rank"] is None or score > best[i]["score"]):
+                best[i] = {"answer": answer, "score": score, "context_rank": rank}
+        offset += wave
+        active = [i for i in active if len(candidates[i]) > offset and best[i]["score"] < QA_EARLY_STOP_SCORE]
+    return best
+
+def extract_answer(question_en: str, chunks, lang: str) -> str:
+    """English answer span for one question, in the configured QA_CONTEXT_MODE."""
+    if QA_CONTEXT_MODE == "multi":
+        best = extract_best_answers([question_en], [chunks], [lang])[0]
+        logger.info(f"[QA] Best span from chunk #{best['context_rank']} (score {best['score']:.3f})")
+        return best["answer"]
+
+    # Combine top chunks into context (limit to 1500 characters)
+    context = " ".join([doc.page_content for doc in chunks[:2]])[:CONTEXT_CHAR_LIMIT]
+    if lang == "bn":
+        with stage("translate"):
+            context = english_context(chunks[:2]) or translate_bn_to_en(context)
+        logger.info(f"[→EN] Context: {context[:256]}...")
+    with stage("qa"):
+        result = answer_question_en(question_en, context)
+    return result.get("answer", "").strip()
+
+def generate_answer_stages(query: str, chunks, lang: str = "en"):
+    """
+    Generate a grounded answer from provided chunks, yielding (stage, text) as each stage finishes:
+    ("answer_en", English answer) for Bangla queries, then ("answer", final answer).
+    For Bangla queries, uses Bangla → English translation for QA, then translates back.
+    """
+    logger.info(f"[🔍] Generating answer for: {query} ({lang})")
+
+    if not chunks:
+        yield "answer", "প্রাসঙ্গিক তথ্য পাওয়া যায়নি।" if lang == "bn" else "No relevant context found."
+        return
+
+    try:
+        if lang == "bn":
+            with stage("translate"):
+                query_en = translate_bn_to_en(query)
+            logger.info(f"[→EN] Q: {query_en}")
+
+            answer_en = extract_answer(query_en, chunks, lang)
+            logger.info(f"[←EN] Extracted English answer: {answer_en}")
+            yield "answer_en", answer_en
+
+            with stage("back_translate"):
+                answer_bn = translate_en_to_bn(answer_en)
+            logger.info(f"[←BN] Translated Bangla answer: {answer_bn}")
+            yield "answer", answer_bn or "⚠️ কোনো উত্তর পাওয়া যায়নি।"
+
+        else:
+            answer = extract_answer(query, chunks, lang)
+            logger.info(f"[EN] English answer: {answer}")
+            yield "answer", answer or "⚠️ Could not generate answer."
+
+    except Exception as e:
+        logger.error(f"[QA/Translation Error]: {e}")
+        yield "answer", ANSWER_ERROR
+
+def generate_answer(query: str, chunks, lang: str = "en") -> str:
+    """Run all stages of `generate_answer_stages` and return the final answer."""
+    for step, text in generate_answer_stages(query, chunks, lang):
+        if step == "answer":
+            return text
+
+def generate_answers(queries, chunks_list, langs):
+    """
+    Batched `generate_answer` for many questions: question/context translation, QA and
+    back-translation each run as one batched call across the whole group.
+    """
+    answers = [None] * len(queries)
+    pending = []
+    for i, (chunks, lang) in enumerate(zip(chunks_list, langs)):
+        if chunks:
+            pending.append(i)
+        else:
+            answers[i] = "প্রাসঙ্গিক তথ্য পাওয়া যায়নি।" if lang == "bn" else "No relevant context found."
+    if not pending:
+        return answers
+
+    try:
+        bn = [i for i in pending if langs[i] == "bn"]
+        questions = {i: queries[i] for i in pending}
+        questions.update(zip(bn, translate_batch_bn_to_en([queries[i] for i in bn])))
+
+        if QA_CONTEXT_MODE == "multi":
+            best = extract_best_answers([questions[i] for i in pending], [chunks_list[i] for i in pending],
+                                        [langs[i] for i in pending])
+            extracted = {i: b["answer"] for i, b in zip(pending, best)}
+        else:
+            contexts = {}
+            untranslated = []
+            for i in pending:
+                context = " ".join([doc.page_content for doc in chunks_list[i][:2]])[:CONTEXT_CHAR_LIMIT]
+                if langs[i] == "bn":
+                    contexts[i] = english_context(chunks_list[i][:2])
+                    if not contexts[i]:
+                        untranslated.append(i)
+                        contexts[i] = context
+                else:
+                    contexts[i] = context
+            contexts.update(zip(untranslated, translate_batch_bn_to_en([contexts[i] for i in untranslated])))
+
+            results = qa_batcher.submit_many([(questions[i], contexts[i]) for i in pending])
+            extracted = {i: r.get("answer", "").strip() for i, r in zip(pending, results)}
+
+        translated = dict(zip(bn, translate_batch_en_to_bn([extracted[i] for i in bn])))
+        for i in pending:
+            if langs[i] == "bn":
+                answers[i] = translated[i] or "⚠️ কোনো উত্তর পাওয়া যায়নি।"
+            else:
+                answers[i] = extracted[i] or "⚠️ Could not generate answer."
+        logger.info(f"[✅] Generated {len(pending)} answers in one batch")
+
+    except Exception as e:
+        logger.error(f"[QA/Translation Error]: {e}")
+        for i in pending:
+            answers[i] = ANSWER_ERROR
+    return answers
@@ -1,132 +1,596 @@
-import warnings
-warnings.filterwarnings("ignore", category=FutureWarning)
-from fastapi import File, UploadFile
-import json
-from fastapi.responses import JSONResponse
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List
-import logging
-
-from app.language_utils import detect_language  # <- use your actual module name
-from app.vector_store import load_faiss_retriever
-from app.llm_generator import generate_answer
-
-# ---------- App Setup ----------
-app = FastAPI()
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Change for production!
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-# ---------- Models ----------
-class QueryRequest(BaseModel):
-    question: str
-
-class QueryResponse(BaseModel):
-    question: str
-    language: str
-    answer: str
-    source_chunks: List[str]
-
-# ---------- Load Retriever ----------
-retriever = load_faiss_retriever()
-
-# ---------- Health Check ----------
-@app.get("/health")
-async def health_check():
-    return {"status": "ok"}
-
-# ---------- Endpoint ----------
-@app.post("/query", response_model=QueryResponse)
-async def query_rag(request: QueryRequest):
-    question = request.question.strip()
-    if not question:
-        raise HTTPException(status_code=400, detail="Empty question provided.")
-
-    logger.info(f"\n[🟡 Incoming Question]: {question}")
-
-    lang = detect_language(question)
-    logger.info(f"[🌐 Detected Language]: {lang}")
-
-    try:
-        docs = retriever.invoke(question)
-        logger.info(f"[🔍 Retrieved {len(docs)} documents]")
-    # 🔍 Print the full retrieved chunk contents for debugging
-        for i, doc in enumerate(docs):
-            print(f"\n[🔎 Chunk {i+1}]\n{doc.page_content}\n")
-
-        # 🔎 Log the retrieved chunks for debugging (first 200 chars)
-        for i, doc in enumerate(docs):
-            logger.info(f"[🔎 Chunk {i+1}]: {doc.page_content[:200]}")
-
-        if not docs:
-            logger.warning("[⚠️ No relevant documents found]")
-            return QueryResponse(
-                question=question,
-                language=lang,
-                answer="প্রাসঙ্গিক কোনো তথ্য পাওয়া যায়নি।" if lang == "bn" else "No relevant context found.",
-                source_chunks=[]
-            )
-
-        answer = generate_answer(query=question, chunks=docs, lang=lang)
-        logger.info(f"[✅ Answer]: {answer}")
-
-        return QueryResponse(
-            question=question,
-            language=lang,
-            answer=answer,
-            source_chunks=[doc.page_content for doc in docs]
-        )
-
-    except Exception as e:
-        logger.exception("[❌ ERROR]")
-        raise HTTPException(status_code=500, detail="Internal server error: " + str(e))
-@app.post("/evaluate")
-async def evaluate_rag(file: UploadFile = File(...)):
-    try:
-        contents = await file.read()
-        test_data = json.loads(contents.decode("utf-8"))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail="Invalid JSON file")
-
-    total = len(test_data)
-    correct = 0
-    evaluations = []
-
-    for entry in test_data:
-        question = entry.get("question")
-        expected_answer = entry.get("expected_answer")
-        lang = detect_language(question)
-        docs = retriever.invoke(question)
-        predicted = generate_answer(query=question, chunks=docs, lang=lang)
-
-        # Basic fuzzy check (case-insensitive containment)
-        is_correct = expected_answer.lower() in predicted.lower()
-        if is_correct:
-            correct += 1
-
-        evaluations.append({
-            "question": question,
-            "expected_answer": expected_answer,
-            "predicted_answer": predicted,
-            "matched": is_correct,
-            "retrieved_chunks": [doc.page_content[:200] for doc in docs]
-        })
-
-    accuracy = round((correct / total) * 100, 2)
-
-    return JSONResponse(content={
-        "total_questions": total,
-        "correct_answers": correct,
-        "accuracy (%)": accuracy,
-        "evaluations": evaluations
-    })
+import warnings
+warnings.filterwarnings("ignore", category=FutureWarning)
+from fastapi import File, Form, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import functools
+
+from app.language_detect import detect_language
+from app.language_utils import track_fallbacks
+from app.vector_store import (
+    DEFAULT_COLLECTION, CollectionManager, collection_exists, collection_paths, list_collections,
+)
+from app.llm_generator import ANSWER_ERROR, generate_answer, generate_answer_stages, generate_answers
+from app.evaluator import evaluate_batch
+from app.eval_jobs import EvalJobManager, read_test_entries, ndjson
+from app.ingest_jobs import IngestJobManager, UploadRejected, ingest_pdf
+from app.inference_executor import inference_executor, ExecutorOverloaded
+from app.batcher import batching_stats
+from app.answer_cache import AnswerCache
+from app.mcq_index import McqIndex
+from app.model_registry import model_registry, warmup_names
+from app.tracing import stage
+from app.metrics import metrics, HTTP_REQUESTS, HTTP_SECONDS, FAST_PATH_HITS, EMPTY_RETRIEVALS, ERRORS
+
+# ---------- App Setup ----------
+app = FastAPI()
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # Change for production!
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fraction of requests whose retrieved chunks are logged (first 200 chars each); 0 disables
+CHUNK_LOG_SAMPLE_RATE = float(os.getenv("CHUNK_LOG_SAMPLE_RATE", "0"))
+# Questions accepted by one /query/batch request, and how long its inference job may take
+QUERY_BATCH_MAX = int(os.getenv("QUERY_BATCH_MAX", "64"))
+QUERY_BATCH_TIMEOUT_S = float(os.getenv("QUERY_BATCH_TIMEOUT_S", "300"))
+
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    """Request count and latency (until response headers) per route template and status."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        HTTP_REQUESTS.inc(method=request.method, route=path, status=status)
+        HTTP_SECONDS.observe(time.perf_counter() - start, route=path)
+
+# ---------- Models ----------
+class QueryRequest(BaseModel):
+    question: str
+    collection: Optional[str] = None  # search one collection; None searches all of them
+
+class QueryResponse(BaseModel):
+    question: str
+    language: str
+    answer: str
+    source_chunks: List[str]
+    fast_path: bool = False  # answered from the MCQ index without retrieval or models
+
+class QueryBatchRequest(BaseModel):
+    questions: List[str]
+    collection: Optional[str] = None
+
+# ---------- Load Retriever ----------
+# Collection shards load on first use. A request resolves its shards once (collections.scope),
+# so when an ingestion job swaps a shard, requests in flight finish on the index they started with.
+collections = CollectionManager()
+answer_cache = AnswerCache(embed_fn=collections.embeddings.embed_query)
+mcq_indexes: Dict[str, tuple] = {}  # collection → (file mtime, McqIndex or None)
+eval_jobs = EvalJobManager()
+
+def mcq_for(collection: str) -> Optional[McqIndex]:
+    """The collection's MCQ index, reloaded when its file changes (e.g. an ingestion in another worker)."""
+    path = collection_paths(collection).mcq_path
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    cached = mcq_indexes.get(collection)
+    if cached is None or cached[0] != mtime:
+        cached = mcq_indexes[collection] = (mtime, McqIndex.load(path))
+    return cached[1]
+
+mcq_for(DEFAULT_COLLECTION)
+
+def reload_index(collection: str):
+    """Swap a collection's freshly published index into this process (called from the ingestion thread)."""
+    collections.reload(collection)
+    mcq_indexes.pop(collection, None)
+    answer_cache.invalidate()  # entries are version-tagged anyway; this just frees them
+    version = collections.version([collection])[0][1]
+    logger.info(f"[🔀 Index Swapped] collection '{collection}', version {version}")
+    return version
+
+def resolve_scope(collection: Optional[str]) -> List[str]:
+    """Collections a request searches: the named one (404 if unknown) or all of them."""
+    if collection is None:
+        return list_collections()
+    if not collection_exists(collection):
+        raise HTTPException(status_code=404, detail=f"Unknown collection: {collection}")
+    return [collection]
+
+ingest_jobs = IngestJobManager(lambda job: ingest_pdf(job, on_published=reload_index))
+
+# ---------- Metrics ----------
+MODEL_STATES = ("not_loaded", "loading", "ready", "evicted", "failed")
+metrics.callback("rag_inference_in_flight", "Inference jobs running or waiting for a worker", "gauge",
+                 lambda: [({}, inference_executor.in_flight)])
+metrics.callback("rag_inference_queue_depth", "Inference jobs waiting for a worker", "gauge",
+                 lambda: [({}, inference_executor.queue_depth)])
+metrics.callback("rag_batcher_pending", "Items waiting in each micro-batcher", "gauge",
+                 lambda: [({"batcher": name}, s["pending"]) for name, s in batching_stats().items()])
+metrics.callback("rag_batcher_batches_total", "Batches run by each micro-batcher", "counter",
+                 lambda: [({"batcher": name}, s["batches"]) for name, s in batching_stats().items()])
+metrics.callback("rag_batcher_items_total", "Items processed by each micro-batcher", "counter",
+                 lambda: [({"batcher": name}, s["items"]) for name, s in batching_stats().items()])
+metrics.callback("rag_model_state", "Model load state (1 for the current state)", "gauge",
+                 lambda: [({"model": name, "state": state}, int(s["state"] == state))
+                          for name, s in model_registry.status().items() for state in MODEL_STATES])
+metrics.callback("rag_model_load_seconds", "Time taken by each model's latest load or reload", "gauge",
+                 lambda: [({"model": name}, s["load_s"]) for name, s in model_registry.status().items()
+                          if s["load_s"] is not None])
+metrics.callback("rag_model_loads_total", "Model loads, including reloads after eviction", "counter",
+                 lambda: [({"model": name}, s["load_count"]) for name, s in model_registry.status().items()])
+metrics.callback("rag_model_evictions_total", "Models evicted to stay within the memory budget", "counter",
+                 lambda: [({"model": name}, s["evictions"]) for name, s in model_registry.status().items()])
+metrics.callback("rag_model_resident_bytes", "Measured footprint of each loaded model", "gauge",
+                 lambda: [({"model": name}, s["size_bytes"] if s["state"] == "ready" else 0)
+                          for name, s in model_registry.status().items() if s["size_bytes"] is not None])
+metrics.callback("rag_model_memory_budget_bytes", "Memory budget for resident models (0 = unlimited)", "gauge",
+                 lambda: [({}, model_registry.budget_bytes)])
+metrics.callback("rag_answer_cache_events_total", "Answer cache hits, misses, evictions and expirations", "counter",
+                 lambda: [({"event": event}, n) for event, n in answer_cache.stats().items()
+                          if event in answer_cache.counters])
+metrics.callback("rag_ingest_jobs", "Document ingestion jobs by status", "gauge",
+                 lambda: [({"status": status}, sum(job.status == status for job in ingest_jobs.list()))
+                          for status in ("queued", "running", "done", "failed")])
+metrics.callback("rag_collections_loaded", "Collection shards currently held in memory", "gauge",
+                 lambda: [({}, len(collections.stats()["loaded"]))])
+metrics.callback("rag_answer_cache_entries", "Entries in the answer cache", "gauge",
+                 lambda: [({}, answer_cache.stats()["entries"])])
+
+@app.on_event("startup")
+def warm_up_models():
+    # Background threads: the server accepts traffic (and /health answers) while models load
+    model_registry.warm_up(warmup_names())
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    inference_executor.shutdown()
+    eval_jobs.shutdown()
+    ingest_jobs.shutdown()
+
+# ---------- Health Check ----------
+@app.get("/health")
+async def health_check():
+    """Liveness only: never waits on model loading."""
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 once every warm-up model is loaded, else 503. Reports per-model state and load time."""
+    required = warmup_names()
+    ready = model_registry.ready(required)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "loading", "required": required, "models": model_registry.status()},
+    )
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition: stage latency histograms, counters and gauges."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/batching")
+async def batching_stats_endpoint():
+    """Micro-batching window/size settings plus observed batch sizes and queue waits."""
+    return batching_stats()
+
+@app.get("/collections")
+async def collections_endpoint():
+    """Collections on disk, the shards loaded in this worker and the eviction settings."""
+    return collections.stats()
+
+@app.get("/stats/models")
+async def model_stats():
+    """Memory budget, resident total and per-model state, footprint, load/eviction counts."""
+    return model_registry.stats()
+
+@app.get("/stats/answer-cache")
+async def answer_cache_stats():
+    """Answer cache size, hit/miss counters and settings."""
+    return answer_cache.stats()
+
+# ---------- Pipeline ----------
+def lookup_similar(question: str, lang: str, active, vector: List[float] = None):
+    """
+    Embed the question (unless `vector` is given) and look for a same-language near-duplicate in the answer cache: (vector, cached response or None).
+    Lexical retrieval exists to skip query embedding, so in lexical mode nothing is embedded and the cache is exact-match only.
+    """
+    question_vec = None if active.mode == "lexical" else answer_cache.embed(question, vector)
+    cached = answer_cache.get_similar(question_vec, active.index_version, lang)
+    if cached is not None:
+        logger.info("[⚡ Answer Cache] near-duplicate hit")
+        FAST_PATH_HITS.inc(source="answer_cache_semantic")
+        cached = cached.model_copy(update={"question": question})
+    return question_vec, cached
+
+def log_chunks(docs):
+    """Log the retrieved chunks (first 200 chars) for a sample of requests."""
+    if CHUNK_LOG_SAMPLE_RATE > 0 and random.random() < CHUNK_LOG_SAMPLE_RATE:
+        for i, doc in enumerate(docs):
+            logger.info(f"[🔎 Chunk {i+1}]: {doc.page_content[:200]}")
+
+def answer_question(question: str, scope: List[str]) -> QueryResponse:
+    """Blocking RAG pipeline: detect → retrieve → generate. Runs on the inference executor."""
+    active = collections.scope(scope)
+    with stage("detect"):
+        lang = detect_language(question)
+    logger.info(f"[🌐 Detected Language]: {lang}")
+
+    question_vec, cached = lookup_similar(question, lang, active)
+    if cached is not None:
+        return cached
+
+    docs = active.invoke(question)
+    logger.info(f"[🔍 Retrieved {len(docs)} documents]")
+    log_chunks(docs)
+
+    if not docs:
+        return empty_answer(question, lang)
+
+    with track_fallbacks() as fallbacks:
+        answer = generate_answer(query=question, chunks=docs, lang=lang)
+    logger.info(f"[✅ Answer]: {answer}")
+
+    response = QueryResponse(
+        question=question,
+        language=lang,
+        answer=answer,
+        source_chunks=[doc.page_content for doc in docs]
+    )
+    if cacheable(answer, fallbacks):
+        answer_cache.put(question, response, active.index_version, question_vec, lang)
+    return response
+
+def cacheable(answer: str, fallbacks: Dict[str, int]) -> bool:
+    """Only successful generations are cached: no model error, no translation that fell back to its source."""
+    return answer != ANSWER_ERROR and not fallbacks
+
+def empty_answer(question: str, lang: str) -> QueryResponse:
+    logger.warning("[⚠️ No relevant documents found]")
+    EMPTY_RETRIEVALS.inc()
+    return QueryResponse(
+        question=question,
+        language=lang,
+        answer="প্রাসঙ্গিক কোনো তথ্য পাওয়া যায়নি।" if lang == "bn" else "No relevant context found.",
+        source_chunks=[]
+    )
+
+def answer_questions(questions: List[str], scope: List[str]) -> List[QueryResponse]:
+    """
+    Blocking batch pipeline behind /query/batch: languages detected in one pass, every question
+    embedded in one LaBSE call (shared by the answer cache and retrieval; skipped in lexical mode),
+    one multi-query FAISS search per shard, then batched translation and QA. Responses come back
+    in input order.
+    """
+    active = collections.scope(scope)
+    with stage("detect"):
+        langs = [detect_language(question) for question in questions]
+
+    vectors = [None] * len(questions)
+    if active.mode != "lexical":
+        with stage("embed"):
+            vectors = active.embeddings.embed_queries(questions)
+
+    responses: List[Optional[QueryResponse]] = [None] * len(questions)
+    question_vecs, pending = {}, []
+    for i, question in enumerate(questions):
+        question_vecs[i], responses[i] = lookup_similar(question, langs[i], active, vectors[i])
+        if responses[i] is None:
+            pending.append(i)
+    if not pending:
+        return responses
+
+    docs_list = active.batch([questions[i] for i in pending],
+                             vectors=None if active.mode == "lexical" else [vectors[i] for i in pending])
+    logger.info(f"[🔍 Retrieved {sum(len(docs) for docs in docs_list)} documents for {len(pending)} questions]")
+    with track_fallbacks() as fallbacks:
+        answers = generate_answers([questions[i] for i in pending], docs_list, [langs[i] for i in pending])
+
+    for i, docs, answer in zip(pending, docs_list, answers):
+        log_chunks(docs)
+        if not docs:
+            responses[i] = empty_answer(questions[i], langs[i])
+            continue
+        responses[i] = QueryResponse(
+            question=questions[i],
+            language=langs[i],
+            answer=answer,
+            source_chunks=[doc.page_content for doc in docs]
+        )
+        if cacheable(answer, fallbacks):  # a failed batch translation affects the whole batch
+            answer_cache.put(questions[i], responses[i], active.index_version, question_vecs[i], langs[i])
+    return responses
+
+async def run_inference(fn, *args, **kwargs):
+    """Submit blocking work to the inference executor, mapping overload/timeout to HTTP errors."""
+    try:
+        return await inference_executor.run(fn, *args, **kwargs)
+    except ExecutorOverloaded as e:
+        logger.warning(f"[🚦 Overloaded] {e}")
+        raise HTTPException(status_code=503, detail="Server busy, please retry later.")
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Inference timed out.")
+
+def fast_path_response(question: str, scope: List[str]):
+    """
+    Answers that need no model: the scope's MCQ indexes, then an exact answer-cache hit.
+    Blocking (it may reload an MCQ index from disk and walks its trie): run it on the inference executor.
+    """
+    mcq_hit = None
+    for collection in scope:
+        mcq = mcq_for(collection)
+        mcq_hit = mcq.lookup(question) if mcq else None
+        if mcq_hit is not None:
+            break
+    if mcq_hit is not None:
+        logger.info(f"[⚡ MCQ Fast Path] {mcq_hit['answer']} (edit distance {mcq_hit['edit_distance']})")
+        FAST_PATH_HITS.inc(source="mcq")
+        return QueryResponse(
+            question=question,
+            language=detect_language(question),
+            answer=mcq_hit["answer"],
+            source_chunks=[f"{mcq_hit['question']}: {mcq_hit['answer']}"],
+            fast_path=True
+        )
+
+    cached = answer_cache.get_exact(question, collections.version(scope))
+    if cached is not None:
+        logger.info("[⚡ Answer Cache] exact hit")
+        FAST_PATH_HITS.inc(source="answer_cache_exact")
+        return cached.model_copy(update={"question": question})
+    return None
+
+def fast_path_responses(questions: List[str], scope: List[str]) -> List[Optional[QueryResponse]]:
+    return [fast_path_response(question, scope) for question in questions]
+
+# ---------- Endpoint ----------
+@app.post("/query", response_model=QueryResponse)
+async def query_rag(request: QueryRequest):
+    question = request.question.strip()
+    if not question:
+        raise HTTPException(status_code=400, detail="Empty question provided.")
+
+    logger.info(f"\n[🟡 Incoming Question]: {question}")
+
+    scope = resolve_scope(request.collection)
+    try:
+        response = await run_inference(fast_path_response, question, scope)
+        if response is not None:
+            return response
+        return await run_inference(answer_question, question, scope)
+    except HTTPException as e:
+        ERRORS.inc(endpoint="/query", kind="overloaded" if e.status_code == 503 else "timeout")
+        raise
+    except Exception as e:
+        logger.exception("[❌ ERROR]")
+        ERRORS.inc(endpoint="/query", kind="internal")
+        raise HTTPException(status_code=500, detail="Internal server error: " + str(e))
+
+@app.post("/query/batch", response_model=List[QueryResponse])
+async def query_rag_batch(request: QueryBatchRequest):
+    """
+    Answer many questions in one request; responses are returned in the order asked.
+    Fast-path answers are served directly. The remaining distinct questions go through the
+    batched pipeline as a single inference job, so model calls and the FAISS search happen
+    once per batch instead of once per question.
+    """
+    questions = [question.strip() for question in request.questions]
+    if not questions:
+        raise HTTPException(status_code=400, detail="No questions provided.")
+    if len(questions) > QUERY_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {QUERY_BATCH_MAX} questions per batch.")
+    empty = [i for i, question in enumerate(questions) if not question]
+    if empty:
+        raise HTTPException(status_code=400, detail=f"Empty question provided at position(s) {empty}.")
+
+    logger.info(f"\n[🟡 Incoming Batch]: {len(questions)} questions")
+
+    scope = resolve_scope(request.collection)
+    try:
+        responses = await run_inference(fast_path_responses, questions, scope)
+        pending = list(dict.fromkeys(q for q, response in zip(questions, responses) if response is None))
+        if pending:
+            answered = await run_inference(answer_questions, pending, scope, timeout=QUERY_BATCH_TIMEOUT_S)
+            by_question = dict(zip(pending, answered))
+            responses = [response or by_question[question] for question, response in zip(questions, responses)]
+    except HTTPException as e:
+        ERRORS.inc(endpoint="/query/batch", kind="overloaded" if e.status_code == 503 else "timeout")
+        raise
+    except Exception as e:
+        logger.exception("[❌ ERROR]")
+        ERRORS.inc(endpoint="/query/batch", kind="internal")
+        raise HTTPException(status_code=500, detail="Internal server error: " + str(e))
+    return responses
+
+# ---------- Streaming Endpoint ----------
+def sse(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+def next_stage(stages, fallbacks: Dict[str, int]):
+    """Advance the answer stages by one on an executor thread, still counting translation fallbacks."""
+    with track_fallbacks(fallbacks):
+        return next(stages)
+
+async def query_events(question: str, scope: List[str]):
+    """
+    The /query pipeline as server-sent events, one per finished stage:
+    language → sources → answer_en (Bangla queries only) → answer → done.
+    Every model stage is a separate job on the inference executor, so the first
+    event goes out before any model runs.
+    """
+    try:
+        response = await inference_executor.run(fast_path_response, question, scope)
+        if response is not None:
+            yield sse("language", {"question": question, "language": response.language})
+            yield sse("sources", {"source_chunks": response.source_chunks})
+            yield sse("answer", {"answer": response.answer, "fast_path": response.fast_path})
+            yield sse("done", response.model_dump())
+            return
+
+        lang = detect_language(question)
+        logger.info(f"[🌐 Detected Language]: {lang}")
+        yield sse("language", {"question": question, "language": lang})
+
+        active = await inference_executor.run(collections.scope, scope)
+        question_vec, cached = await inference_executor.run(lookup_similar, question, lang, active)
+        if cached is not None:
+            docs, stages = None, iter([("answer", cached.answer)])
+            source_chunks = cached.source_chunks
+        else:
+            docs = await inference_executor.run(active.invoke, question)
+            logger.info(f"[🔍 Retrieved {len(docs)} documents]")
+            log_chunks(docs)
+            if not docs:
+                EMPTY_RETRIEVALS.inc()
+            stages = generate_answer_stages(question, docs, lang)
+            source_chunks = [doc.page_content for doc in docs]
+        yield sse("sources", {"source_chunks": source_chunks})
+
+        answer, fallbacks = None, {}
+        while answer is None:
+            step, text = await inference_executor.run(next_stage, stages, fallbacks)
+            yield sse(step, {step: text})
+            if step == "answer":
+                answer = text
+        logger.info(f"[✅ Answer]: {answer}")
+
+        response = QueryResponse(question=question, language=lang, answer=answer, source_chunks=source_chunks)
+        if docs is not None and cacheable(answer, fallbacks):
+            answer_cache.put(question, response, active.index_version, question_vec, lang)
+        yield sse("done", response.model_dump())
+
+    except ExecutorOverloaded as e:
+        logger.warning(f"[🚦 Overloaded] {e}")
+        ERRORS.inc(endpoint="/query/stream", kind="overloaded")
+        yield sse("error", {"status": 503, "detail": "Server busy, please retry later."})
+    except asyncio.TimeoutError:
+        ERRORS.inc(endpoint="/query/stream", kind="timeout")
+        yield sse("error", {"status": 504, "detail": "Inference timed out."})
+    except Exception as e:
+        logger.exception("[❌ ERROR]")
+        ERRORS.inc(endpoint="/query/stream", kind="internal")
+        yield sse("error", {"status": 500, "detail": "Internal server error: " + str(e)})
+
+@app.post("/query/stream")
+async def query_rag_stream(request: QueryRequest):
+    """Same as /query, but streams each stage's result as it completes (text/event-stream)."""
+    question = request.question.strip()
+    if not question:
+        raise HTTPException(status_code=400, detail="Empty question provided.")
+
+    logger.info(f"\n[🟡 Incoming Question (stream)]: {question}")
+    scope = resolve_scope(request.collection)
+    return StreamingResponse(query_events(question, scope), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def evaluate_entries(entries: List[dict], scope: List[str]) -> List[dict]:
+    """Blocking evaluation of one batch: batched retrieval, QA/translation and scoring."""
+    questions = [entry["question"] for entry in entries]
+    langs = [detect_language(question) for question in questions]
+    active = collections.scope(scope)
+    docs_list = active.batch(questions)
+    predictions = generate_answers(questions, docs_list, langs)
+    scores = evaluate_batch(questions, predictions, docs_list,
+                            vectorstore=active.vectorstore, embeddings=active.embeddings)
+
+    results = []
+    for i, (entry, docs, predicted) in enumerate(zip(entries, docs_list, predictions)):
+        results.append({
+            **entry,
+            "language": langs[i],
+            "predicted_answer": predicted,
+            # Basic fuzzy check (case-insensitive containment)
+            "matched": entry["expected_answer"].lower() in predicted.lower(),
+            "groundedness": scores["groundedness"][i],
+            "relevance": scores["relevance"][i],
+            "retrieved_chunks": [doc.page_content[:200] for doc in docs]
+        })
+    return results
+
+@app.post("/evaluate")
+async def evaluate_rag(file: UploadFile = File(...), collection: Optional[str] = None):
+    """
+    Start a background evaluation job over a JSON array or JSONL test set and stream its
+    per-question results as NDJSON. The job keeps running if the client disconnects;
+    reconnect with GET /evaluate/{job_id}/stream or poll GET /evaluate/{job_id}.
+    `?collection=` restricts retrieval to one collection.
+    """
+    scope = resolve_scope(collection)
+    try:
+        entries = await read_test_entries(file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON/JSONL file: {e}")
+    if not entries:
+        raise HTTPException(status_code=400, detail="No test entries provided.")
+
+    job = eval_jobs.start(entries, functools.partial(evaluate_entries, scope=scope))
+    return StreamingResponse(ndjson(job.events()), media_type="application/x-ndjson",
+                             headers={"X-Eval-Job-Id": job.id})
+
+def _get_eval_job(job_id: str):
+    job = eval_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown evaluation job: {job_id}")
+    return job
+
+@app.get("/evaluate/{job_id}")
+async def evaluate_status(job_id: str):
+    return JSONResponse(content=_get_eval_job(job_id).summary())
+
+@app.get("/evaluate/{job_id}/stream")
+async def evaluate_stream(job_id: str):
+    job = _get_eval_job(job_id)
+    return StreamingResponse(ndjson(job.events()), media_type="application/x-ndjson")
+
+# ---------- Document Ingestion ----------
+@app.post("/documents", status_code=202)
+async def upload_document(file: UploadFile = File(...), collection: str = Form(DEFAULT_COLLECTION)):
+    """
+    Queue an uploaded PDF for background ingestion (extract → clean → chunk → translate →
+    embed → index) into `collection`, which is created if it does not exist yet. When the job
+    finishes, the collection's new index replaces the live one without a restart; queries keep
+    being served from the current index meanwhile. Poll GET /documents/{job_id}.
+    """
+    if not (file.filename or "").lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only .pdf files are supported.")
+    try:
+        job = await ingest_jobs.submit(file, collection)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    return JSONResponse(status_code=202, content=job.summary(), headers={"Location": f"/documents/{job.id}"})
+
+@app.get("/documents")
+async def list_documents():
+    """Recent ingestion jobs, oldest first."""
+    return [job.summary() for job in ingest_jobs.list()]
+
+@app.get("/documents/{job_id}")
+async def document_status(job_id: str):
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingestion job: {job_id}")
+    return job.summary()
@@ -0,0 +1,108 @@
+import os
+import re
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from app.answer_cache import normalize_question
+
+# ---------- CONFIG ----------
+MCQ_INDEX_PATH = "data/mcq_index.json"
+MCQ_MAX_EDIT_DISTANCE = int(os.getenv("MCQ_MAX_EDIT_DISTANCE", "2"))
+MCQ_CHARS_PER_EDIT = 30  # one edit allowed per this many characters; shorter questions must match exactly
+# ----------------------------
+
+logger = logging.getLogger(__name__)
+
+QUESTION_NUMBER = re.compile(r'^\d+\s*')
+
+
+def question_key(question: str) -> str:
+    """Normalized question without its leading MCQ number ("৪১।")."""
+    return QUESTION_NUMBER.sub("", normalize_question(question))
+
+
+class _TrieNode:
+    __slots__ = ("children", "entry")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.entry: Optional[int] = None
+
+
+class McqIndex:
+    """
+    Exact-answer index over the MCQ question/answer pairs produced by the chunker, i.e. only
+    questions whose answer the textbook prints (see chunker.answer_mcqs).
+    Normalized questions are looked up in a hash map first; failing that, a character trie is
+    walked with a Levenshtein row per node to find a stored question within a small edit distance.
+    The edit budget grows with the question's length (MCQ_CHARS_PER_EDIT), so a short question
+    that differs in a word or two ("'X' শব্দের অর্থ কী?") is a different question, not a typo.
+    """
+
+    def __init__(self, pairs: List[Tuple[str, str]]):
+        self.pairs = pairs
+        self.exact: Dict[str, int] = {}
+        self.root = _TrieNode()
+        for i, (question, _) in enumerate(pairs):
+            key = question_key(question)
+            if not key or key in self.exact:
+                continue
+            self.exact[key] = i
+            node = self.root
+            for ch in key:
+                node = node.children.setdefault(ch, _TrieNode())
+            node.entry = i
+
+    def __len__(self):
+        return len(self.exact)
+
+    def _fuzzy(self, key: str, max_distance: int) -> Optional[Tuple[int, int]]:
+        """Closest stored question within `max_distance` edits: (entry, distance)."""
+        best_entry, best_distance = None, max_distance + 1
+        # Depth-first over the trie, carrying one Levenshtein DP row per node
+        stack = [(child, ch, list(range(len(key) + 1))) for ch, child in self.root.children.items()]
+        while stack:
+            node, ch, prev_row = stack.pop()
+            row = [prev_row[0] + 1]
+            for col in range(1, len(key) + 1):
+                cost = 0 if key[col - 1] == ch else 1
+                row.append(min(row[col - 1] + 1, prev_row[col] + 1, prev_row[col - 1] + cost))
+            if node.entry is not None and row[-1] < best_distance:
+                best_entry, best_distance = node.entry, row[-1]
+            # Prune: no descendant can beat the current best
+            if min(row) < best_distance:
+                stack.extend((child, next_ch, row) for next_ch, child in node.children.items())
+        return (best_entry, best_distance) if best_entry is not None else None
+
+    def lookup(self, question: str, max_distance: int = MCQ_MAX_EDIT_DISTANCE) -> Optional[Dict]:
+        """Answer for a known MCQ question, or None. Never touches a model."""
+        key = question_key(question)
+        entry, distance = self.exact.get(key), 0
+        max_distance = min(max_distance, len(key) // MCQ_CHARS_PER_EDIT)
+        if entry is None and max_distance > 0:
+            match = self._fuzzy(key, max_distance)
+            if match is not None:
+                entry, distance = match
+        if entry is None:
+            return None
+        stored_question, answer = self.pairs[entry]
+        return {"question": stored_question, "answer": answer, "edit_distance": distance}
+
+    def save(self, path: str = MCQ_INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"pairs": self.pairs}, f, ensure_ascii=False, indent=2)
+        os.replace(path + ".tmp", path)  # a server reloading the index never reads a partial file
+
+    @classmethod
+    def load(cls, path: str = MCQ_INDEX_PATH) -> Optional["McqIndex"]:
+        """Load the index written at chunking time; None if it has not been built yet."""
+        if not os.path.exists(path):
+            logger.warning(f"⚠️ MCQ index not found at {path}; fast path disabled")
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            pairs = [tuple(pair) for pair in json.load(f)["pairs"]]
+        index = cls(pairs)
+        logger.info(f"⚡ MCQ fast-path index loaded ({len(index)} questions)")
+        return index
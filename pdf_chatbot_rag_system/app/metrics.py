@@ -0,0 +1,201 @@
+# app/metrics.py
+"""
+Minimal Prometheus instrumentation (text exposition format 0.0.4), no extra dependency.
+
+Counters, gauges and histograms are cheap to update from any thread (one lock, one dict
+lookup; histograms add a bisect). Values owned by other components (queue depth, model
+state, cache counters) are read only at scrape time through callback metrics.
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# ---------- CONFIG ----------
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# ----------------------------
+
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> tuple:
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _label_dict(self, key: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(self._label_dict(key), value))
+        return lines
+
+    def _render_value(self, labels: Dict[str, str], value) -> List[str]:
+        return [f"{self.name}{_labels(labels)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        if not self.labelnames:
+            self._values[()] = 0  # an unlabeled counter is exported as 0 before its first increment
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][slot] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_value(self, labels: Dict[str, str], value) -> List[str]:
+        counts, total, count = value
+        lines, cumulative = [], 0
+        for bound, n in zip((*self.buckets, float("inf")), counts):
+            cumulative += n
+            lines.append(f"{self.name}_bucket{_labels({**labels, 'le': _number(bound)})} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(labels)} {_number(total)}")
+        lines.append(f"{self.name}_count{_labels(labels)} {count}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Counter or gauge whose samples are produced by `fn` at scrape time."""
+
+    def __init__(self, name: str, help_text: str, kind: str, fn: Callable[[], Iterable[Sample]]):
+        super().__init__(name, help_text)
+        self.kind = kind
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.fn():
+            lines.append(f"{self.name}{_labels(labels)} {_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def add(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.add(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.add(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(self, name: str, help_text: str, kind: str, fn: Callable[[], Iterable[Sample]]) -> CallbackMetric:
+        return self.add(CallbackMetric(name, help_text, kind, fn))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                lines.extend(metric.render())
+            except Exception as e:  # a broken callback must not take down the whole scrape
+                lines.append(f"# {metric.name} unavailable: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+# ---------- Pipeline metrics ----------
+STAGE_SECONDS = metrics.histogram("rag_stage_duration_seconds", "Time spent per pipeline stage", ["stage"])
+HTTP_REQUESTS = metrics.counter("rag_http_requests_total", "HTTP requests by route and status", ["method", "route", "status"])
+HTTP_SECONDS = metrics.histogram("rag_http_request_duration_seconds", "HTTP request latency by route", ["route"])
+FAST_PATH_HITS = metrics.counter("rag_fast_path_hits_total", "Queries answered without the full pipeline", ["source"])
+EMPTY_RETRIEVALS = metrics.counter("rag_empty_retrievals_total", "Queries for which retrieval returned no chunks")
+TRANSLATION_FALLBACKS = metrics.counter("rag_translation_fallbacks_total",
+                                        "Translations that failed and fell back to the source text", ["direction"])
+ERRORS = metrics.counter("rag_errors_total", "Failed queries by endpoint and kind", ["endpoint", "kind"])
+
+# ---------- Process metrics ----------
+SMAPS_FIELDS = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared", "Shared_Dirty": "shared",
+                "Private_Clean": "private", "Private_Dirty": "private"}
+
+
+def process_memory(path: str = "/proc/self/smaps_rollup") -> Dict[str, int]:
+    """
+    Resident memory of this process split into pages shared with other processes (pre-forked
+    workers, mapped index files) and private ones, in bytes. Empty where /proc is unavailable.
+    PSS charges each shared page 1/N to each of the N processes mapping it, so summing PSS over
+    workers gives their real combined footprint.
+    """
+    usage: Dict[str, int] = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                field, _, rest = line.partition(":")
+                if field in SMAPS_FIELDS:
+                    kind = SMAPS_FIELDS[field]
+                    usage[kind] = usage.get(kind, 0) + int(rest.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        return {}
+    return usage
+
+
+metrics.callback("rag_process_memory_bytes", "Resident memory of this worker by kind (rss, pss, shared, private)",
+                 "gauge", lambda: [({"kind": kind}, value) for kind, value in process_memory().items()])
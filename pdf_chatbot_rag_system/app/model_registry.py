@@ -0,0 +1,295 @@
+import gc
+import os
+import sys
+import time
+import ctypes
+import logging
+import threading
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+from app.metrics import metrics, process_memory
+
+# ---------- CONFIG ----------
+load_dotenv()
+EMBED_MODEL = "sentence-transformers/LaBSE"
+QA_MODEL = "deepset/roberta-base-squad2"
+BN_EN_MODEL = "csebuetnlp/banglat5_nmt_bn_en"
+EN_BN_MODEL = "csebuetnlp/banglat5_nmt_en_bn"
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")  # "torch" (fp32 PyTorch) or "onnx" (int8 ONNX Runtime)
+# Comma-separated models loaded in background threads at server startup ("" = all lazy, "all" = every model)
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "all")
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))  # resident models' RAM cap; 0 = unlimited
+MODEL_PINNED = os.getenv("MODEL_PINNED", "")  # comma-separated models never evicted
+# ----------------------------
+
+logger = logging.getLogger(__name__)
+
+MODEL_LOAD_SECONDS = metrics.histogram("rag_model_load_duration_seconds",
+                                       "Model load time, first loads and reloads after eviction", ["model"])
+
+
+def model_footprint(model: Any, rss_delta: int = 0) -> int:
+    """
+    Resident size of a loaded model in bytes: its torch parameters and buffers when it has
+    any (found on the pipeline / embeddings wrapper attributes, including pydantic private
+    ones such as HuggingFaceEmbeddings._client), else the RSS growth seen while it loaded
+    (ONNX Runtime sessions, stand-ins).
+    """
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        modules, seen, frontier = [], set(), [model]
+        for _ in range(4):  # wrapper → pipeline / embeddings → model → submodule
+            next_frontier = []
+            for obj in frontier:
+                if id(obj) in seen or obj is None:
+                    continue
+                seen.add(id(obj))
+                if isinstance(obj, torch.nn.Module):
+                    modules.append(obj)
+                    continue
+                attrs = list(getattr(obj, "__dict__", {}).values())
+                attrs += list((getattr(obj, "__pydantic_private__", None) or {}).values())
+                next_frontier.extend(v for v in attrs if not isinstance(v, (str, bytes, int, float, bool)))
+            frontier = next_frontier
+        tensors = {t.data_ptr(): t.numel() * t.element_size()
+                   for module in modules for t in list(module.parameters()) + list(module.buffers())}
+        if tensors:
+            return int(sum(tensors.values()))
+    return max(0, int(rss_delta))
+
+
+def release_memory():
+    """Collect garbage and hand freed heap pages back to the OS (glibc), so evictions show up in RSS."""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class ModelEntry:
+    """One registered model: its loader, the loaded object and load / eviction bookkeeping."""
+
+    def __init__(self, name: str, model_id: str, loader: Callable[[], Any]):
+        self.name = name
+        self.model_id = model_id
+        self.loader = loader
+        self.model = None
+        self.state = "not_loaded"  # not_loaded → loading → ready | failed; ready → evicted → loading
+        self.error: Optional[str] = None
+        self.load_s: Optional[float] = None  # latest load (or reload) time
+        self.load_count = 0
+        self.evictions = 0
+        self.size_bytes: Optional[int] = None  # measured at the latest load; kept after eviction
+        self.last_used = 0.0
+        self.pinned = False
+        self.lock = threading.Lock()
+
+    @property
+    def resident(self) -> bool:
+        return self.state == "ready"
+
+    def status(self) -> Dict:
+        return {"model": self.model_id, "backend": INFERENCE_BACKEND, "state": self.state,
+                "load_s": self.load_s, "error": self.error, "load_count": self.load_count,
+                "evictions": self.evictions, "size_bytes": self.size_bytes, "pinned": self.pinned}
+
+
+class ModelRegistry:
+    """
+    Process-wide registry that loads every model at most once at a time.
+    `get` loads on first use (concurrent callers wait on the same load); `warm_up`
+    starts loads in background threads so the server can accept traffic meanwhile.
+    With a memory budget, each model's footprint is measured when it loads and the least
+    recently used unpinned models are evicted to keep the resident total under the budget;
+    an evicted model is reloaded by the next `get`. Callers still holding an evicted model
+    finish with it normally; its memory is freed when they drop it.
+    """
+
+    def __init__(self, budget_mb: float = MODEL_MEMORY_BUDGET_MB):
+        self._entries: Dict[str, ModelEntry] = {}
+        self._pinned = set()
+        self.budget_bytes = int(budget_mb * 1e6)
+        self._budget_lock = threading.Lock()
+        self._load_lock = threading.Lock()  # with a budget, loads run one at a time
+
+    def register(self, name: str, model_id: str, loader: Callable[[], Any]):
+        entry = ModelEntry(name, model_id, loader)
+        entry.pinned = name in self._pinned
+        self._entries[name] = entry
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._entries)
+
+    def pin(self, names: Iterable[str], pinned: bool = True):
+        """Exempt models from eviction (or make them evictable again)."""
+        for name in names:
+            (self._pinned.add if pinned else self._pinned.discard)(name)
+            if name in self._entries:
+                self._entries[name].pinned = pinned
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(entry.size_bytes or 0 for entry in self._entries.values() if entry.resident)
+
+    def get(self, name: str):
+        entry = self._entries[name]
+        entry.last_used = time.monotonic()
+        model = entry.model
+        if entry.state == "ready" and model is not None:
+            return model
+        # Serialized loads keep the peak under the budget and the RSS-based footprints accurate
+        with entry.lock, (self._load_lock if self.budget_bytes > 0 else nullcontext()):
+            if entry.state != "ready":
+                reload = entry.state == "evicted"
+                self._make_room(entry.size_bytes or 0, keep=name)
+                entry.state = "loading"
+                logger.info(f"🔁 {'Reloading' if reload else 'Loading'} model '{name}' ({entry.model_id})...")
+                rss_before = process_memory().get("rss", 0)
+                start = time.perf_counter()
+                try:
+                    entry.model = entry.loader()
+                except Exception as e:
+                    entry.state, entry.error = "failed", str(e) or type(e).__name__
+                    logger.error(f"[❌ Model Load Error] {name}: {entry.error}")
+                    raise
+                entry.load_s = round(time.perf_counter() - start, 2)
+                entry.size_bytes = model_footprint(entry.model, process_memory().get("rss", 0) - rss_before)
+                entry.load_count += 1
+                entry.state, entry.error = "ready", None
+                MODEL_LOAD_SECONDS.observe(entry.load_s, model=name)
+                logger.info(f"✅ Model '{name}' ready in {entry.load_s}s ({entry.size_bytes / 1e6:.0f} MB)")
+            model = entry.model
+        self._make_room(0, keep=name)
+        return model
+
+    def _make_room(self, needed: int, keep: str):
+        """Evict least recently used, unpinned, idle-locked models until `needed` more bytes fit."""
+        if self.budget_bytes <= 0:
+            return
+        with self._budget_lock:
+            victims = sorted((e for e in self._entries.values() if e.resident and not e.pinned and e.name != keep),
+                             key=lambda e: e.last_used)
+            evicted = False
+            for entry in victims:
+                if self.resident_bytes + needed <= self.budget_bytes:
+                    break
+                evicted |= self.evict(entry.name)
+            if self.resident_bytes + needed > self.budget_bytes:
+                logger.warning(f"⚠️ Model memory {(self.resident_bytes + needed) / 1e6:.0f} MB exceeds the "
+                               f"{self.budget_bytes / 1e6:.0f} MB budget (remaining models are pinned or in use)")
+        if evicted:
+            release_memory()
+
+    def evict(self, name: str) -> bool:
+        """Drop a loaded model (unless it is being loaded right now); the next `get` reloads it."""
+        entry = self._entries[name]
+        if not entry.lock.acquire(blocking=False):
+            return False
+        try:
+            if entry.state != "ready":
+                return False
+            entry.model, entry.state = None, "evicted"
+            entry.evictions += 1
+        finally:
+            entry.lock.release()
+        logger.info(f"📤 Evicted model '{name}' ({(entry.size_bytes or 0) / 1e6:.0f} MB)")
+        return True
+
+    def warm_up(self, names: Iterable[str] = None) -> List[threading.Thread]:
+        """Load the given models (default: all) in parallel daemon threads."""
+        threads = []
+        for name in (self.names if names is None else names):
+            if self._entries[name].state in ("ready", "loading"):
+                continue
+            thread = threading.Thread(target=self._warm, args=(name,), name=f"warmup-{name}", daemon=True)
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    def _warm(self, name: str):
+        try:
+            self.get(name)
+        except Exception:
+            pass  # recorded on the entry; the next `get` retries
+
+    def ready(self, names: Iterable[str] = None) -> bool:
+        """Loaded at least once and still loaded, or evicted and reloadable on demand."""
+        return all(self._entries[name].state in ("ready", "evicted")
+                   for name in (self.names if names is None else names))
+
+    def status(self) -> Dict[str, Dict]:
+        return {name: entry.status() for name, entry in self._entries.items()}
+
+    def stats(self) -> Dict:
+        return {"budget_bytes": self.budget_bytes or None, "resident_bytes": self.resident_bytes,
+                "models": self.status()}
+
+
+def warmup_names(setting: str = MODEL_WARMUP) -> List[str]:
+    if setting.strip().lower() == "all":
+        return model_registry.names
+    return [name.strip() for name in setting.split(",") if name.strip()]
+
+
+class RegistryEmbeddings(Embeddings):
+    """LangChain embeddings handle that resolves its model from the registry on first use."""
+
+    def __init__(self, name: str = "labse"):
+        self.name = name
+
+    @property
+    def model(self) -> Embeddings:
+        return model_registry.get(self.name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        from app.embedding_cache import embed_queries
+        return embed_queries(self.model, texts)
+
+
+# ---------- Loaders ----------
+def _hf_token() -> Optional[str]:
+    token = os.getenv("HUGGINGFACE_TOKEN")
+    if token is None:
+        logger.warning("⚠️ HUGGINGFACE_TOKEN is not set; downloading models anonymously")
+    return token
+
+def load_embeddings(backend: str = INFERENCE_BACKEND):
+    from app.embedding_cache import cached_embeddings
+    return cached_embeddings(EMBED_MODEL, backend=backend)
+
+def load_qa(backend: str = INFERENCE_BACKEND):
+    if backend == "onnx":
+        from app.onnx_backend import load_qa_pipeline
+        return load_qa_pipeline(QA_MODEL)
+    from transformers import pipeline
+    return pipeline("question-answering", model=QA_MODEL, tokenizer=QA_MODEL)
+
+def load_translator(model_id: str, backend: str = INFERENCE_BACKEND):
+    token = _hf_token()
+    if backend == "onnx":
+        from app.onnx_backend import load_translation_pipeline
+        return load_translation_pipeline(model_id, token=token)
+    from transformers import pipeline, T5Tokenizer, AutoModelForSeq2SeqLM
+    tokenizer = T5Tokenizer.from_pretrained(model_id, token=token)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_id, token=token)
+    return pipeline("text2text-generation", model=model, tokenizer=tokenizer, device=-1)
+
+
+model_registry = ModelRegistry()
+model_registry.register("labse", EMBED_MODEL, load_embeddings)
+model_registry.register("qa_en", QA_MODEL, load_qa)
+model_registry.register("translate_bn2en", BN_EN_MODEL, lambda: load_translator(BN_EN_MODEL))
+model_registry.register("translate_en2bn", EN_BN_MODEL, lambda: load_translator(EN_BN_MODEL))
+model_registry.pin(name.strip() for name in MODEL_PINNED.split(",") if name.strip())
@@ -0,0 +1,137 @@
+# app/onnx_backend.py
+"""
+Optional int8 ONNX Runtime backend (INFERENCE_BACKEND=onnx).
+
+Each model is exported to ONNX once, dynamically quantized to int8 and cached under
+ONNX_CACHE_DIR; later loads only read the cached artifacts. The returned objects are
+drop-in replacements for the fp32 ones (a transformers pipeline or LangChain embeddings),
+so call sites do not change.
+
+Needs `pip install "optimum[onnxruntime]"` (and sentence-transformers >= 3.2 for LaBSE).
+"""
+
+import os
+import re
+import json
+import shutil
+import logging
+from typing import Optional
+
+# ---------- CONFIG ----------
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "data/onnx_models")
+# avx2 runs on any x86-64 host; avx512_vnni is only fast on CPUs with VNNI (also: avx512, arm64)
+ONNX_QUANT_CONFIG = os.getenv("ONNX_QUANT_CONFIG", "avx2")
+MARKER_FILE = "quantized.json"
+# ----------------------------
+
+logger = logging.getLogger(__name__)
+
+
+def artifact_dir(model_id: str) -> str:
+    slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_id)
+    return os.path.join(ONNX_CACHE_DIR, f"{slug}-int8-{ONNX_QUANT_CONFIG}")
+
+
+def _cached(path: str) -> bool:
+    return os.path.exists(os.path.join(path, MARKER_FILE))
+
+
+def _finish(tmp_dir: str, path: str, model_id: str):
+    """Mark the export complete and move it into place (a half-written export is never picked up)."""
+    files = sorted(f for f in os.listdir(tmp_dir) if f.endswith(".onnx"))
+    with open(os.path.join(tmp_dir, MARKER_FILE), "w", encoding="utf-8") as f:
+        json.dump({"model": model_id, "quantization": ONNX_QUANT_CONFIG, "files": files}, f, indent=2)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_dir, path)
+
+
+def _quantization_config():
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    factory = getattr(AutoQuantizationConfig, ONNX_QUANT_CONFIG, None)
+    if factory is None:
+        raise ValueError(f"❌ Unknown ONNX_QUANT_CONFIG: {ONNX_QUANT_CONFIG}")
+    return factory(is_static=False, per_channel=False)
+
+
+def _export_quantized(model_id: str, ort_class, tokenizer_class, token: Optional[str] = None) -> str:
+    """Export `model_id` with optimum, quantize every ONNX graph to int8, return the artifact dir."""
+    path = artifact_dir(model_id)
+    if _cached(path):
+        return path
+
+    from optimum.onnxruntime import ORTQuantizer
+
+    logger.info(f"📦 Exporting {model_id} to ONNX (int8, {ONNX_QUANT_CONFIG})...")
+    tmp_dir = path + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    ort_class.from_pretrained(model_id, export=True, token=token).save_pretrained(tmp_dir)
+    tokenizer_class.from_pretrained(model_id, token=token).save_pretrained(tmp_dir)
+
+    qconfig = _quantization_config()
+    for file_name in [f for f in os.listdir(tmp_dir) if f.endswith(".onnx")]:
+        quantizer = ORTQuantizer.from_pretrained(tmp_dir, file_name=file_name)
+        quantizer.quantize(save_dir=tmp_dir, quantization_config=qconfig, file_suffix="quantized")
+        os.remove(os.path.join(tmp_dir, file_name))
+    _finish(tmp_dir, path, model_id)
+    return path
+
+
+def load_qa_pipeline(model_id: str):
+    """int8 extractive QA pipeline (same call signature as the fp32 transformers pipeline)."""
+    from transformers import AutoTokenizer, pipeline
+    from optimum.onnxruntime import ORTModelForQuestionAnswering
+
+    path = _export_quantized(model_id, ORTModelForQuestionAnswering, AutoTokenizer)
+    model = ORTModelForQuestionAnswering.from_pretrained(path, file_name="model_quantized.onnx")
+    return pipeline("question-answering", model=model, tokenizer=AutoTokenizer.from_pretrained(path))
+
+
+def load_translation_pipeline(model_id: str, token: Optional[str] = None):
+    """int8 text2text-generation pipeline for a BanglaT5 translation model."""
+    from transformers import T5Tokenizer, pipeline
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    path = _export_quantized(model_id, ORTModelForSeq2SeqLM, T5Tokenizer, token=token)
+    files = set(os.listdir(path))
+    if "decoder_model_merged_quantized.onnx" in files:
+        graphs = {"decoder_file_name": "decoder_model_merged_quantized.onnx"}
+    else:
+        graphs = {"decoder_file_name": "decoder_model_quantized.onnx",
+                  "decoder_with_past_file_name": "decoder_with_past_model_quantized.onnx"}
+    model = ORTModelForSeq2SeqLM.from_pretrained(path, encoder_file_name="encoder_model_quantized.onnx", **graphs)
+    return pipeline("text2text-generation", model=model, tokenizer=T5Tokenizer.from_pretrained(path))
+
+
+def load_sentence_embeddings(model_id: str):
+    """
+    int8 sentence-transformer embeddings. Only the transformer runs in ONNX Runtime;
+    pooling, dense and normalization layers stay in sentence-transformers, so the
+    output matches the fp32 model's post-processing.
+    """
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    path = artifact_dir(model_id)
+    file_name = f"onnx/model_qint8_{ONNX_QUANT_CONFIG}.onnx"
+    if not _cached(path):
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+        logger.info(f"📦 Exporting {model_id} to ONNX (int8, {ONNX_QUANT_CONFIG})...")
+        tmp_dir = path + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        model = SentenceTransformer(model_id, backend="onnx")
+        model.save(tmp_dir)
+        export_dynamic_quantized_onnx_model(model, ONNX_QUANT_CONFIG, tmp_dir)
+        _finish(tmp_dir, path, model_id)
+
+    return HuggingFaceEmbeddings(
+        model_name=path,
+        model_kwargs={"backend": "onnx", "model_kwargs": {"file_name": file_name}},
+    )
+
+
+def artifact_size_mb(model_id: str) -> float:
+    total = 0
+    for root, _, files in os.walk(artifact_dir(model_id)):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files
+                     if f.endswith(".onnx") and ("quantized" in f or "qint8" in f))
+    return total / 1e6
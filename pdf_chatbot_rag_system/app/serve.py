@@ -0,0 +1,204 @@
+# app/serve.py
+"""
+Pre-fork multi-worker server.
+
+`uvicorn main:app --workers N` starts N independent interpreters, each loading LaBSE,
+roberta-squad2, both BanglaT5 models and the index on its own: N copies of everything.
+Here the parent process loads the models and opens the index once, then forks the workers.
+Model weights are never written after loading, so the workers share the parent's pages
+copy-on-write; the FAISS index (and the chunk store, which always is) is memory-mapped, so
+shards loaded or reloaded later in any worker share one copy through the page cache.
+Each worker runs its own event loop, inference executor and batchers on the shared listening
+socket, with its math libraries pinned to --threads intra-op threads so the workers together
+use the cores without oversubscribing them. Workers that die are replaced.
+
+    python -m app.serve --workers 4 --threads 2
+
+Compare `rag_process_memory_bytes{kind="pss"}` on /metrics (summed over workers) against a
+plain multi-worker uvicorn to see the saving. Per-worker state (eval/ingest job status,
+answer cache, metrics) is not shared: use one worker, or sticky routing, for job polling.
+"""
+
+import gc
+import os
+import sys
+import time
+import random
+import signal
+import socket
+import logging
+import argparse
+import threading
+
+# ---------- CONFIG ----------
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.getenv("SERVE_PORT", "8000"))
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", str(os.cpu_count() or 1)))
+SERVE_THREADS = int(os.getenv("SERVE_THREADS", "0"))  # intra-op threads per worker; 0 = cores / workers
+PRELOAD_COLLECTIONS = os.getenv("PRELOAD_COLLECTIONS", "default")  # comma-separated names, "all" or "none"
+RESPAWN_BACKOFF_S = 1.0  # pause before replacing a worker that died right after starting
+MIN_UPTIME_S = 5.0
+BACKLOG = 2048
+# ----------------------------
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("app.serve")
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def threads_per_worker(workers: int, threads: int = SERVE_THREADS) -> int:
+    return threads if threads > 0 else max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def configure_environment(threads: int):
+    """Settings that must be in place before torch / faiss / tokenizers are imported."""
+    for var in THREAD_ENV_VARS:
+        os.environ.setdefault(var, str(threads))
+    os.environ.setdefault("FAISS_MMAP", "1")
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")  # its thread pool does not survive fork
+
+
+def pin_threads(threads: int):
+    """Cap intra-op parallelism of the already imported math libraries in this process."""
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    import faiss
+    faiss.omp_set_num_threads(threads)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload(collection_names: str = PRELOAD_COLLECTIONS):
+    """
+    Import the app and load models and collection shards in this (parent) process.
+    Loading is synchronous: no helper thread may be alive at fork time.
+    """
+    from app import main
+    from app.model_registry import INFERENCE_BACKEND, model_registry, warmup_names
+    from app.vector_store import list_collections
+
+    if INFERENCE_BACKEND == "onnx":
+        # ONNX Runtime sessions own thread pools that a forked child would not have
+        logger.warning("⚠️ INFERENCE_BACKEND=onnx: models load in each worker after fork (not shared)")
+    else:
+        names = warmup_names()
+        if model_registry.budget_bytes > 0:
+            # Evicting a model inherited from the parent frees nothing: share only the pinned ones
+            names = [name for name, status in model_registry.status().items() if name in names and status["pinned"]]
+        for name in names:
+            model_registry.get(name)
+
+    setting = collection_names.strip().lower()
+    names = list_collections() if setting == "all" else [] if setting == "none" else \
+        [name.strip() for name in collection_names.split(",") if name.strip()]
+    for name in names:
+        try:
+            main.collections.get(name)
+        except KeyError:
+            logger.warning(f"⚠️ Collection '{name}' not found, not preloaded")
+    return main.app
+
+
+def run_worker(app, sock: socket.socket, threads: int, slot: int):
+    """Child process: serve on the inherited socket until told to stop."""
+    import uvicorn
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, signal.SIG_DFL)
+    random.seed()  # don't share the parent's random state (log sampling, jitter)
+    gc.enable()
+    pin_threads(threads)
+    logger.info(f"👷 Worker {slot} (pid {os.getpid()}) serving with {threads} intra-op thread(s)")
+    server = uvicorn.Server(uvicorn.Config(app, log_level="info", lifespan="on"))
+    server.run(sockets=[sock])
+
+
+def serve(host: str = SERVE_HOST, port: int = SERVE_PORT, workers: int = SERVE_WORKERS,
+          threads: int = SERVE_THREADS, collection_names: str = PRELOAD_COLLECTIONS):
+    threads = threads_per_worker(workers, threads)
+    configure_environment(threads)
+    sock = bind_socket(host, port)
+
+    start = time.perf_counter()
+    app = preload(collection_names)
+    from app.metrics import process_memory
+    rss = process_memory().get("rss")
+    logger.info(f"📦 Preloaded in {time.perf_counter() - start:.1f}s"
+                + (f", parent RSS {rss / 1e6:.0f} MB" if rss else ""))
+
+    extra = [t.name for t in threading.enumerate() if t is not threading.main_thread()]
+    if extra:
+        logger.warning(f"⚠️ Threads alive at fork time (their locks may be held in workers): {extra}")
+    # Objects surviving until now live for the whole run: keep the collector from touching
+    # (and so copying) their pages in every worker
+    gc.collect()
+    gc.freeze()
+
+    children = {}  # pid → (slot, started)
+    stopping = False
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(app, sock, threads, slot)
+            except BaseException:
+                logger.exception(f"[❌ Worker {slot}] crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = (slot, time.monotonic())
+
+    def stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info(f"🚀 Serving on {host}:{port} with {workers} worker(s) × {threads} thread(s)")
+    for slot in range(workers):
+        spawn(slot)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot, started = children.pop(pid, (None, None))
+        if slot is None or stopping:
+            continue
+        logger.warning(f"⚠️ Worker {slot} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+        if time.monotonic() - started < MIN_UPTIME_S:
+            time.sleep(RESPAWN_BACKOFF_S)
+        spawn(slot)
+
+    sock.close()
+    logger.info("👋 All workers stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-fork multi-worker RAG server")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--threads", type=int, default=SERVE_THREADS,
+                        help="intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--preload", default=PRELOAD_COLLECTIONS,
+                        help='collections opened before forking: comma-separated names, "all" or "none"')
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.threads, args.preload)
@@ -0,0 +1,45 @@
+# app/tracing.py
+"""
+Per-request stage timing.
+
+Pipeline code wraps each stage in `with stage("qa"): ...`. Every stage is recorded in the
+rag_stage_duration_seconds histogram served at /metrics. A caller that wants the
+breakdown of one request runs it inside `with trace() as timings:` and gets
+{stage: seconds} (time spent in the same stage several times, e.g. question and
+context translation, is summed).
+"""
+
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from app.metrics import STAGE_SECONDS
+
+STAGES = ("detect", "embed", "search", "translate", "qa", "back_translate")
+
+_current: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("stage_trace", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _current.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+@contextmanager
+def trace():
+    """Collect stage timings for everything run in this context (same thread or task)."""
+    timings: Dict[str, float] = {}
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
@@ -1,76 +1,583 @@
-import os
-import json
-import logging
-from typing import List
-from langchain.docstore.document import Document
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-
-# ---------- CONFIG ----------
-CHUNKS_JSON_PATH = "data/chunks.json"
-VECTOR_STORE_DIR = "data/faiss_langchain_index"
-EMBED_MODEL = "sentence-transformers/LaBSE"
-# ----------------------------
-
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-def load_chunks_as_documents(json_path: str) -> List[Document]:
-    """Load text chunks from JSON and wrap them as LangChain Documents."""
-    if not os.path.exists(json_path):
-        raise FileNotFoundError(f"❌ Chunk file not found: {json_path}")
-
-    with open(json_path, "r", encoding="utf-8") as f:
-        raw_chunks = json.load(f)
-
-    if not raw_chunks:
-        raise ValueError("❌ Chunk file is empty.")
-
-    documents = [
-        Document(page_content=chunk["text"], metadata=chunk.get("metadata", {}))
-        for chunk in raw_chunks
-    ]
-    return documents
-
-def build_faiss_vector_store(documents: List[Document]) -> FAISS:
-    """Embed documents using HuggingFaceEmbeddings and create a FAISS vector store."""
-    logger.info(f"🔍 Loading embedding model: {EMBED_MODEL}")
-    embeddings = HuggingFaceEmbeddings(model_name=EMBED_MODEL)
-
-    logger.info(f"🔢 Embedding and indexing {len(documents)} documents...")
-    return FAISS.from_documents(documents, embedding=embeddings)
-
-def save_faiss_store(vectorstore: FAISS, save_dir: str):
-    """Save the FAISS vector store to disk."""
-    os.makedirs(save_dir, exist_ok=True)
-    vectorstore.save_local(save_dir)
-    logger.info(f"✅ Vector store saved at: {save_dir}")
-
-def load_faiss_retriever(k: int = 10):
-    """Load the FAISS vector store and return a retriever with configurable top-k."""
-    logger.info("📦 Loading FAISS vector store for retrieval...")
-    embeddings = HuggingFaceEmbeddings(model_name=EMBED_MODEL)
-
-    if not os.path.exists(os.path.join(VECTOR_STORE_DIR, "index.faiss")):
-        raise FileNotFoundError(f"❌ FAISS index not found in directory: {VECTOR_STORE_DIR}")
-
-    vectorstore = FAISS.load_local(VECTOR_STORE_DIR, embeddings, allow_dangerous_deserialization=True)
-    return vectorstore.as_retriever(search_kwargs={"k": k})
-
-def run_vector_store_pipeline():
-    """Main pipeline to generate vector store from chunks.json and save to disk."""
-    logger.info("📂 Loading chunks as LangChain Documents...")
-    docs = load_chunks_as_documents(CHUNKS_JSON_PATH)
-    logger.info(f"✅ Loaded {len(docs)} documents.")
-
-    store = build_faiss_vector_store(docs)
-    save_faiss_store(store, VECTOR_STORE_DIR)
-
-# --- Optional: CLI Test ---
-if __name__ == "__main__":
-    run_vector_store_pipeline()
-    # To test retrieval manually:
-    # retriever = load_faiss_retriever(k=3)
-    # results = retriever.invoke("অনুপমের ভাষায় সুপুরুষ কাকে বলা হয়েছে?")
-    # for i, doc in enumerate(results):
-    #     print(f"Chunk {i+1}: {doc.page_content[:250]}")
+import os
+import re
+import time
+import fcntl
+import uuid
+import shutil
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import faiss
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+from app.model_registry import model_registry, RegistryEmbeddings
+from app.embedding_cache import embed_queries
+from app.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from app.tracing import stage
+from app.chunk_store import ChunkStore
+from app.ann_index import INDEX_TYPE, HNSW_EF_SEARCH, IVF_NPROBE, build_index, apply_search_params
+from app.mcq_index import MCQ_INDEX_PATH
+from app.chunker import read_chunks
+
+# ---------- CONFIG ----------
+CHUNKS_PATH = "data/chunks.jsonl"
+VECTOR_STORE_DIR = "data/faiss_langchain_index"
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")  # "dense", "lexical" or "hybrid"
+HYBRID_CANDIDATES = 2  # each ranker contributes k * HYBRID_CANDIDATES candidates to fusion
+RETRIEVER_K = int(os.getenv("RETRIEVER_K", "10"))  # chunks returned per query
+COLLECTIONS_DIR = "data/collections"
+DEFAULT_COLLECTION = "default"  # the original single index: VECTOR_STORE_DIR (FAISS + ChunkStore) and CHUNKS_PATH (chunks.jsonl)
+MAX_LOADED_COLLECTIONS = int(os.getenv("MAX_LOADED_COLLECTIONS", "8"))  # shards kept in memory (LRU)
+COLLECTION_IDLE_S = float(os.getenv("COLLECTION_IDLE_S", "1800"))  # unload shards unused this long; 0 = never
+FANOUT_WORKERS = int(os.getenv("FANOUT_WORKERS", "4"))  # threads searching shards in parallel
+COLLECTION_CHECK_S = float(os.getenv("COLLECTION_CHECK_S", "2"))  # re-stat loaded shards this often; 0 = never
+FAISS_MMAP = os.getenv("FAISS_MMAP", "0") == "1"  # open read-only indexes memory-mapped (page cache shared across workers)
+# ----------------------------
+
+COLLECTION_NAME = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def load_chunks_as_documents(json_path: str) -> List[Document]:
+    """Load text chunks from the chunk file (JSONL, or a legacy JSON array) and wrap them as LangChain Documents."""
+    try:
+        raw_chunks = list(read_chunks(json_path))
+    except FileNotFoundError:
+        raise FileNotFoundError(f"❌ Chunk file not found: {json_path}")
+
+    if not raw_chunks:
+        raise ValueError("❌ Chunk file is empty.")
+
+    documents = [
+        Document(page_content=chunk["text"], metadata=chunk.get("metadata", {}))
+        for chunk in raw_chunks
+    ]
+    return documents
+
+def build_faiss_vector_store(documents: List[Document], index_type: str = INDEX_TYPE,
+                             embeddings=None, ids: List[str] = None, **index_params) -> FAISS:
+    """
+    Embed documents (reusing cached LaBSE vectors) and create a FAISS vector store
+    backed by the requested index type (flat, hnsw, ivf_flat, ivf_pq, ivf_sq8).
+    """
+    if embeddings is None:
+        embeddings = model_registry.get("labse")
+    ids = ids or [doc.id or str(uuid.uuid4()) for doc in documents]
+
+    logger.info(f"🔢 Embedding and indexing {len(documents)} documents ({index_type})...")
+    vectors = np.asarray(embeddings.embed_documents([doc.page_content for doc in documents]), dtype=np.float32)
+    index = build_index(vectors, index_type, **index_params)
+    docstore = InMemoryDocstore({doc_id: doc for doc_id, doc in zip(ids, documents)})
+    return FAISS(embeddings, index, docstore, dict(enumerate(ids)))
+
+def save_faiss_store(vectorstore: FAISS, save_dir: str):
+    """Save the FAISS index, the memory-mapped chunk store and the lexical index to disk."""
+    os.makedirs(save_dir, exist_ok=True)
+    faiss.write_index(vectorstore.index, os.path.join(save_dir, "index.faiss"))
+    ChunkStore.write_from_vectorstore(save_dir, vectorstore)
+    legacy_pickle = os.path.join(save_dir, "index.pkl")
+    if os.path.exists(legacy_pickle):
+        os.remove(legacy_pickle)  # superseded by the chunk store
+    LexicalIndex.from_vectorstore(vectorstore).save(save_dir)
+    logger.info(f"✅ Vector store saved at: {save_dir}")
+
+def publish_index(staging_dir: str, index_dir: str = VECTOR_STORE_DIR):
+    """
+    Move an index built in `staging_dir` into place at `index_dir`.
+    The replaced index is kept as `<index_dir>.previous` (one generation) instead of being
+    deleted, so a process still reading its memory-mapped files is unaffected.
+    """
+    previous = index_dir + ".previous"
+    if os.path.exists(previous):
+        shutil.rmtree(previous)
+    if os.path.exists(index_dir):
+        os.rename(index_dir, previous)
+    os.rename(staging_dir, index_dir)
+    logger.info(f"🔀 Published index {staging_dir} → {index_dir}")
+
+@contextmanager
+def staged_index(index_dir: str = VECTOR_STORE_DIR):
+    """
+    Staging directory for a replacement of `index_dir`, published in its place (`publish_index`)
+    if the block writes anything and succeeds, removed otherwise. Live index files are never
+    rewritten in place: serving processes may have them memory-mapped.
+    """
+    staging_dir = f"{index_dir}.staging-{uuid.uuid4().hex[:12]}"
+    try:
+        yield staging_dir
+        if os.path.exists(staging_dir):
+            publish_index(staging_dir, index_dir)
+    finally:
+        if os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+@contextmanager
+def index_write_lock(index_dir: str = VECTOR_STORE_DIR):
+    """
+    Exclusive lock for rewriting the index at `index_dir` (a flock on `<index_dir>.lock`), held
+    from reading the current chunks through publishing. Serializes writers across processes,
+    e.g. ingestion jobs for the same collection in different server workers, or a CLI rebuild.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(index_dir)), exist_ok=True)
+    with open(index_dir + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def read_faiss_index(path: str, mmap: bool = False) -> faiss.Index:
+    """
+    Read an index file. With `mmap` the vectors (flat codes, IVF lists) stay in the file and are
+    paged in on demand, so every process serving the same index shares one copy in the page cache.
+    Memory-mapped indexes are read-only.
+    """
+    if not mmap:
+        return faiss.read_index(path)
+    # IO_FLAG_MMAP_IFC (faiss ≥ 1.10) maps flat codes too; older builds only map IVF lists
+    return faiss.read_index(path, getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP))
+
+def load_vector_store(index_dir: str, embeddings, writable: bool = False, mmap: bool = FAISS_MMAP) -> FAISS:
+    """
+    Open a saved vector store. With a chunk store the docstore stays memory-mapped and Documents
+    are built only for search hits; `writable=True` materializes it for add/delete instead.
+    `mmap` also maps the FAISS index itself (read-only stores only).
+    Indexes that still only have index.pkl fall back to LangChain's pickle loader.
+    """
+    if not os.path.exists(os.path.join(index_dir, "index.faiss")):
+        raise FileNotFoundError(f"❌ FAISS index not found in directory: {index_dir}")
+
+    if not ChunkStore.exists(index_dir):
+        logger.warning(f"⚠️ No chunk store in {index_dir}; loading pickled docstore (run `python -m app.chunk_store`)")
+        return FAISS.load_local(index_dir, embeddings, allow_dangerous_deserialization=True)
+
+    index = read_faiss_index(os.path.join(index_dir, "index.faiss"), mmap=mmap and not writable)
+    store = ChunkStore(index_dir)
+    if len(store) != index.ntotal:
+        raise ValueError(f"❌ Chunk store has {len(store)} rows but the FAISS index has {index.ntotal}")
+    if not writable:
+        return FAISS(embeddings, index, store, store.index_to_docstore_id())
+
+    docs = {doc_id: Document(id=doc_id, page_content=text, metadata=metadata)
+            for doc_id, text, metadata in store.iter_rows()}
+    return FAISS(embeddings, index, InMemoryDocstore(docs), dict(enumerate(docs)))
+
+class HybridRetriever:
+    """
+    Retriever combining LaBSE dense search with BM25 over the lexical index.
+    mode="dense": FAISS only; "lexical": BM25 only (no query embedding);
+    "hybrid": both, fused with reciprocal rank fusion.
+    """
+
+    def __init__(self, vectorstore: FAISS, lexical_index: LexicalIndex = None, k: int = 10,
+                 mode: str = RETRIEVAL_MODE, index_version=None):
+        if mode not in ("dense", "lexical", "hybrid"):
+            raise ValueError(f"Unsupported retrieval mode: {mode}")
+        if mode != "dense" and lexical_index is None:
+            logger.warning(f"⚠️ No lexical index available, falling back from '{mode}' to dense retrieval")
+            mode = "dense"
+        self.vectorstore = vectorstore
+        self.lexical_index = lexical_index
+        self.k = k
+        self.mode = mode
+        self.index_version = index_version  # identifies the loaded index, e.g. for cache invalidation
+
+    def _lexical_hits(self, query: str, k: int) -> List[Tuple[Document, float]]:
+        """BM25 hits resolved through the docstore; ids it no longer knows (a stale lexical index) are skipped."""
+        hits = [(self.vectorstore.docstore.search(doc_id), score) for doc_id, score in self.lexical_index.search(query, k)]
+        return [(doc, score) for doc, score in hits if isinstance(doc, Document)]
+
+    def _lexical(self, query: str, k: int) -> List[Document]:
+        return [doc for doc, _ in self._lexical_hits(query, k)]
+
+    def _search_batch(self, vectors, k: int) -> List[List[Tuple[Document, float]]]:
+        """One multi-query FAISS search; hits per query with scores where higher is better."""
+        vectors = np.array(vectors, dtype=np.float32)
+        if getattr(self.vectorstore, "_normalize_L2", False):
+            faiss.normalize_L2(vectors)
+        scores, positions = self.vectorstore.index.search(vectors, k)
+        sign = 1.0 if self.vectorstore.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT else -1.0
+        id_map = self.vectorstore.index_to_docstore_id
+        hits = [[(self.vectorstore.docstore.search(id_map[int(pos)]), sign * float(score))
+                 for pos, score in zip(row, row_scores) if pos >= 0]
+                for row, row_scores in zip(positions, scores)]
+        return [[(doc, score) for doc, score in row if isinstance(doc, Document)] for row in hits]
+
+    def _dense_batch(self, queries: List[str], k: int, vectors=None) -> List[List[Document]]:
+        """Embed all queries in one model call (unless `vectors` are given) and search them in one FAISS call."""
+        if vectors is None:
+            vectors = embed_queries(self.vectorstore.embeddings, queries)
+        return [[doc for doc, _ in hits] for hits in self._search_batch(vectors, k)]
+
+    def _fuse(self, dense: List[Document], lexical: List[Document]) -> List[Document]:
+        return fuse_documents(dense, lexical, self.k)
+
+    def candidates(self, query: str, vector: Optional[List[float]], n: int,
+                   mode: str) -> Tuple[List[Tuple[Document, float]], List[Tuple[Document, float]]]:
+        """Scored dense and lexical candidates (higher is better), for merging with other shards."""
+        dense, lexical = [], []
+        if mode != "lexical":
+            hits = self.vectorstore.similarity_search_with_score_by_vector(vector, k=n)
+            sign = 1.0 if self.vectorstore.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT else -1.0
+            dense = [(doc, sign * float(score)) for doc, score in hits]
+        if mode != "dense" and self.lexical_index is not None:
+            lexical = self._lexical_hits(query, n)
+        return dense, lexical
+
+    def candidates_batch(self, queries: List[str], vectors, n: int,
+                         mode: str) -> List[Tuple[List[Tuple[Document, float]], List[Tuple[Document, float]]]]:
+        """`candidates` for many queries, with one multi-query FAISS search for all of them."""
+        dense = self._search_batch(vectors, n) if mode != "lexical" else [[] for _ in queries]
+        lexical = [[] for _ in queries]
+        if mode != "dense" and self.lexical_index is not None:
+            lexical = [self._lexical_hits(query, n) for query in queries]
+        return list(zip(dense, lexical))
+
+    def invoke(self, query: str, mode: str = None) -> List[Document]:
+        mode = mode or self.mode
+        if mode == "lexical":
+            with stage("search"):
+                return self._lexical(query, self.k)
+
+        with stage("embed"):
+            vector = self.vectorstore.embeddings.embed_query(query)
+        with stage("search"):
+            if mode == "dense":
+                return self.vectorstore.similarity_search_by_vector(vector, k=self.k)
+            n = self.k * HYBRID_CANDIDATES
+            return self._fuse(self.vectorstore.similarity_search_by_vector(vector, k=n), self._lexical(query, n))
+
+    def batch(self, queries: List[str], mode: str = None, vectors=None) -> List[List[Document]]:
+        """
+        Retrieve for many queries at once: one batched embedding call and one multi-query FAISS
+        search. Query `vectors` already computed by the caller are used instead of embedding again.
+        """
+        mode = mode or self.mode
+        if not queries:
+            return []
+        if mode == "lexical":
+            return [self._lexical(query, self.k) for query in queries]
+        if mode == "dense":
+            return self._dense_batch(queries, self.k, vectors)
+
+        n = self.k * HYBRID_CANDIDATES
+        dense = self._dense_batch(queries, n, vectors)
+        return [self._fuse(docs, self._lexical(query, n)) for query, docs in zip(queries, dense)]
+
+def _doc_key(doc: Document) -> str:
+    return doc.id or doc.page_content
+
+def fuse_documents(dense: List[Document], lexical: List[Document], k: int) -> List[Document]:
+    """Reciprocal rank fusion of a dense and a lexical ranking; the top `k` documents."""
+    return fuse_rankings([dense, lexical], k)
+
+def fuse_rankings(document_rankings: List[List[Document]], k: int) -> List[Document]:
+    """Reciprocal rank fusion of any number of document rankings; the top `k` documents."""
+    by_key = {}
+    rankings = []
+    for docs in document_rankings:
+        ranking = []
+        for doc in docs:
+            key = _doc_key(doc)
+            by_key.setdefault(key, doc)
+            ranking.append(key)
+        rankings.append(ranking)
+    return [by_key[key] for key in reciprocal_rank_fusion(rankings)[:k]]
+
+def index_version(index_dir: str) -> int:
+    """Changes whenever the index on disk is rewritten."""
+    return os.stat(os.path.join(index_dir, "index.faiss")).st_mtime_ns
+
+def load_faiss_retriever(k: int = RETRIEVER_K, mode: str = RETRIEVAL_MODE):
+    """Load the FAISS vector store (+ lexical index) and return a retriever with configurable top-k and mode."""
+    logger.info("📦 Loading FAISS vector store for retrieval...")
+    # LaBSE itself is loaded by the model registry on the first query (or during warm-up)
+    embeddings = RegistryEmbeddings("labse")
+
+    vectorstore = load_vector_store(VECTOR_STORE_DIR, embeddings)
+    apply_search_params(vectorstore.index, nprobe=IVF_NPROBE, ef_search=HNSW_EF_SEARCH)
+    lexical_index = LexicalIndex.load(VECTOR_STORE_DIR) if LexicalIndex.exists(VECTOR_STORE_DIR) else None
+    return HybridRetriever(vectorstore, lexical_index, k=k, mode=mode, index_version=index_version(VECTOR_STORE_DIR))
+
+# ---------- Collections ----------
+class CollectionPaths(NamedTuple):
+    index_dir: str
+    chunks_path: str
+    mcq_path: str
+
+def collection_paths(name: str) -> CollectionPaths:
+    """
+    Where a collection lives on disk. The default collection keeps the original layout; any
+    other is data/collections/<name>/{index/, chunks.jsonl, mcq_index.json}.
+    Raises ValueError for names that are not safe directory names.
+    """
+    if name == DEFAULT_COLLECTION:
+        return CollectionPaths(VECTOR_STORE_DIR, CHUNKS_PATH, MCQ_INDEX_PATH)
+    if not COLLECTION_NAME.match(name or ""):
+        raise ValueError(f"Invalid collection name: {name!r} (letters, digits, '-' and '_' only)")
+    base = os.path.join(COLLECTIONS_DIR, name)
+    return CollectionPaths(os.path.join(base, "index"), os.path.join(base, "chunks.jsonl"),
+                           os.path.join(base, "mcq_index.json"))
+
+def collection_exists(name: str) -> bool:
+    try:
+        return os.path.exists(os.path.join(collection_paths(name).index_dir, "index.faiss"))
+    except ValueError:
+        return False
+
+def list_collections() -> List[str]:
+    """Every collection with an index on disk, default first."""
+    names = [DEFAULT_COLLECTION] if collection_exists(DEFAULT_COLLECTION) else []
+    if os.path.isdir(COLLECTIONS_DIR):
+        names += sorted(name for name in os.listdir(COLLECTIONS_DIR)
+                        if name != DEFAULT_COLLECTION and collection_exists(name))
+    return names
+
+def merge_candidates(per_shard, mode: str, k: int, n: int) -> List[Document]:
+    """
+    Merge scored candidates from several shards: dense hits by similarity, lexical hits by
+    rank (RRF over the shards: BM25 scores depend on each shard's IDF and document lengths,
+    so a small collection's scores would otherwise dominate), each cut to `n`, then handled
+    exactly like a single shard's (top `k`, or RRF).
+    """
+    def ranked(pairs) -> List[Document]:
+        unique = {}
+        for doc, score in sorted(pairs, key=lambda pair: pair[1], reverse=True):
+            unique.setdefault(_doc_key(doc), doc)
+        return list(unique.values())[:n]
+
+    dense = ranked(pair for shard_dense, _ in per_shard for pair in shard_dense)
+    lexical = fuse_rankings([[doc for doc, _ in shard_lexical] for _, shard_lexical in per_shard], n)
+    if mode == "dense":
+        return dense[:k]
+    if mode == "lexical":
+        return lexical[:k]
+    return fuse_documents(dense, lexical, k)
+
+class CollectionManager:
+    """
+    Named collections, each an independent shard: FAISS index, chunk store and lexical index.
+    Shards are loaded on first use and unloaded again when more than `max_loaded` are in
+    memory (least recently used first) or when unused for `idle_s`, so a worker only holds
+    the shards that receive traffic. Requests already holding a shard are unaffected.
+    A loaded shard is re-stat'ed at most every `check_s` seconds and reloaded when its index was
+    republished on disk, which is how workers other than the one running an ingestion pick it up.
+    """
+
+    def __init__(self, k: int = RETRIEVER_K, mode: str = RETRIEVAL_MODE,
+                 max_loaded: int = MAX_LOADED_COLLECTIONS, idle_s: float = COLLECTION_IDLE_S,
+                 workers: int = FANOUT_WORKERS, check_s: float = COLLECTION_CHECK_S):
+        self.k = k
+        self.mode = mode
+        self.max_loaded = max_loaded
+        self.idle_s = idle_s
+        self.check_s = check_s
+        # LaBSE itself is loaded by the model registry on the first query (or during warm-up)
+        self.embeddings = RegistryEmbeddings("labse")
+        self._loaded: "OrderedDict[str, list]" = OrderedDict()  # name → [retriever, last used, last checked]
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fanout")
+
+    def _load(self, name: str) -> HybridRetriever:
+        index_dir = collection_paths(name).index_dir
+        vectorstore = load_vector_store(index_dir, self.embeddings)
+        apply_search_params(vectorstore.index, nprobe=IVF_NPROBE, ef_search=HNSW_EF_SEARCH)
+        lexical_index = LexicalIndex.load(index_dir) if LexicalIndex.exists(index_dir) else None
+        return HybridRetriever(vectorstore, lexical_index, k=self.k, mode=self.mode,
+                               index_version=index_version(index_dir))
+
+    def _touch(self, name: str) -> Optional[HybridRetriever]:
+        entry = self._loaded.get(name)
+        if entry is None:
+            return None
+        entry[1] = time.monotonic()
+        self._loaded.move_to_end(name)
+        return entry[0]
+
+    def _check_due(self, name: str) -> bool:
+        entry = self._loaded[name]
+        if self.check_s <= 0 or entry[1] - entry[2] < self.check_s:
+            return False
+        entry[2] = entry[1]
+        return True
+
+    def _republished(self, name: str, retriever: HybridRetriever) -> bool:
+        try:
+            return index_version(collection_paths(name).index_dir) != retriever.index_version
+        except OSError:  # mid-publish (directories being swapped): keep serving what we have
+            return False
+
+    def _evict_locked(self, keep: Iterable[str] = ()):
+        now = time.monotonic()
+        for name in list(self._loaded):  # least recently used first
+            if name in keep:
+                continue
+            idle = self.idle_s > 0 and now - self._loaded[name][1] > self.idle_s
+            if len(self._loaded) > self.max_loaded or idle:
+                del self._loaded[name]
+                logger.info(f"📤 Unloaded collection '{name}'" + (" (idle)" if idle else ""))
+
+    def get(self, name: str) -> HybridRetriever:
+        """The shard's retriever, loading it on first use. Raises KeyError for unknown collections."""
+        with self._lock:
+            retriever = self._touch(name)
+            check = retriever is not None and self._check_due(name)
+            if retriever is not None and not check:
+                return retriever
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        if check:
+            if self._republished(name, retriever):
+                logger.info(f"🔀 Collection '{name}' was republished on disk, reloading")
+                return self.reload(name) or retriever
+            return retriever
+        with load_lock:  # one load per shard, other shards stay available meanwhile
+            with self._lock:
+                retriever = self._touch(name)
+            if retriever is not None:
+                return retriever
+            if not collection_exists(name):
+                raise KeyError(name)
+            logger.info(f"📦 Loading collection '{name}'...")
+            retriever = self._load(name)
+            with self._lock:
+                now = time.monotonic()
+                self._loaded[name] = [retriever, now, now]
+                self._evict_locked(keep=(name,))
+        return retriever
+
+    def reload(self, name: str) -> Optional[HybridRetriever]:
+        """Replace a loaded shard with the index now on disk (after an ingestion publishes it)."""
+        with self._lock:
+            loaded = name in self._loaded
+        if loaded:
+            with self._load_locks.setdefault(name, threading.Lock()):
+                retriever = self._load(name)
+                with self._lock:
+                    now = time.monotonic()
+                    self._loaded[name] = [retriever, now, now]
+                    self._loaded.move_to_end(name)
+            return retriever
+        return None
+
+    def evict(self, name: str) -> bool:
+        with self._lock:
+            return self._loaded.pop(name, None) is not None
+
+    def version(self, names: List[str]) -> tuple:
+        """Index versions for a scope, without loading anything (e.g. for cache keys)."""
+        with self._lock:
+            loaded = {name: entry[0].index_version for name, entry in self._loaded.items()}
+
+        def on_disk(name: str) -> Optional[int]:
+            try:
+                return index_version(collection_paths(name).index_dir)
+            except OSError:  # mid-publish (directories being swapped): no version, so no cache hit
+                return None
+
+        return tuple((name, loaded.get(name) or on_disk(name)) for name in names)
+
+    def scope(self, names: List[str] = None) -> "ShardedRetriever":
+        """
+        Retriever over the given collections (default: all of them), shards resolved now.
+        Shards idle for longer than `idle_s` are unloaded first, so they go even when no new
+        collection is loaded.
+        """
+        names = list(names) if names else list_collections()
+        with self._lock:
+            self._evict_locked(keep=names)
+        return ShardedRetriever(self, names, [self.get(name) for name in names])
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            loaded = {name: {"chunks": retriever.vectorstore.index.ntotal,
+                             "idle_s": round(now - last_used, 1),
+                             "index_version": retriever.index_version}
+                      for name, (retriever, last_used, _) in self._loaded.items()}
+        return {"available": list_collections(), "loaded": loaded,
+                "max_loaded": self.max_loaded, "idle_s": self.idle_s}
+
+class ShardedRetriever:
+    """
+    Retrieval over a fixed set of shards. A single shard is searched directly; with several,
+    the query is embedded once, every shard is searched in parallel on the manager's thread
+    pool and the candidates are merged by score (see `merge_candidates`).
+    """
+
+    def __init__(self, manager: CollectionManager, names: List[str], shards: List[HybridRetriever]):
+        self.manager = manager
+        self.names = names
+        self.shards = shards
+        self.k = manager.k
+        self.mode = manager.mode
+        self.embeddings = manager.embeddings
+        self.index_version = tuple((name, shard.index_version) for name, shard in zip(names, shards))
+
+    @property
+    def vectorstore(self) -> Optional[FAISS]:
+        """The single shard's vector store; None when the scope spans several."""
+        return self.shards[0].vectorstore if len(self.shards) == 1 else None
+
+    def _fan_out(self, query: str, vector, mode: str) -> List[Document]:
+        n = self.k * HYBRID_CANDIDATES if mode == "hybrid" else self.k
+        per_shard = list(self.manager._pool.map(lambda shard: shard.candidates(query, vector, n, mode), self.shards))
+        return merge_candidates(per_shard, mode, self.k, n)
+
+    def invoke(self, query: str, mode: str = None) -> List[Document]:
+        if len(self.shards) == 1:
+            return self.shards[0].invoke(query, mode)
+        mode = mode or self.mode
+        vector = None
+        if mode != "lexical":
+            with stage("embed"):
+                vector = self.embeddings.embed_query(query)
+        with stage("search"):
+            return self._fan_out(query, vector, mode)
+
+    def batch(self, queries: List[str], mode: str = None, vectors=None) -> List[List[Document]]:
+        """
+        Retrieve for many queries: embedded in one call (or taken from `vectors`), then each
+        shard searched once for all of them, in parallel, and the candidates merged per query.
+        """
+        if len(self.shards) == 1:
+            return self.shards[0].batch(queries, mode, vectors)
+        mode = mode or self.mode
+        if not queries:
+            return []
+        if mode != "lexical" and vectors is None:
+            with stage("embed"):
+                vectors = embed_queries(self.embeddings, queries)
+        n = self.k * HYBRID_CANDIDATES if mode == "hybrid" else self.k
+        with stage("search"):
+            per_shard = list(self.manager._pool.map(
+                lambda shard: shard.candidates_batch(queries, vectors, n, mode), self.shards))
+            return [merge_candidates([shard[i] for shard in per_shard], mode, self.k, n)
+                    for i in range(len(queries))]
+
+def run_vector_store_pipeline():
+    """Main pipeline to generate vector store from the chunk file and save to disk."""
+    logger.info("📂 Loading chunks as LangChain Documents...")
+    docs = load_chunks_as_documents(CHUNKS_PATH)
+    logger.info(f"✅ Loaded {len(docs)} documents.")
+
+    store = build_faiss_vector_store(docs)
+    with index_write_lock(VECTOR_STORE_DIR), staged_index(VECTOR_STORE_DIR) as staging_dir:
+        save_faiss_store(store, staging_dir)
+
+# --- Optional: CLI Test ---
+if __name__ == "__main__":
+    run_vector_store_pipeline()
+    # To test retrieval manually:
+    # retriever = load_faiss_retriever(k=3)
+    # results = retriever.invoke("অনুপমের ভাষায় সুপুরুষ কাকে বলা হয়েছে?")
+    # for i, doc in enumerate(results):
+    #     print(f"Chunk {i+1}: {doc.page_content[:250]}")
@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from app.batcher import MicroBatcher
+
+
+def upper_batch(calls):
+    def batch_fn(items):
+        calls.append(list(items))
+        if "" in items:
+            raise ValueError("empty context")
+        return [item.upper() for item in items]
+    return batch_fn
+
+
+def test_concurrent_items_share_one_batch():
+    calls = []
+    batcher = MicroBatcher("test", upper_batch(calls), max_batch_size=3, window_ms=1000)
+    assert batcher.submit_many(["a", "b", "c"]) == ["A", "B", "C"]
+    assert calls == [["a", "b", "c"]]
+    stats = batcher.stats()
+    assert (stats["batches"], stats["items"], stats["batch_size_histogram"]) == (1, 3, {3: 1})
+
+
+def test_batch_is_split_at_max_size():
+    calls = []
+    batcher = MicroBatcher("test", upper_batch(calls), max_batch_size=2, window_ms=1000)
+    assert batcher.submit_many(["a", "b", "c"]) == ["A", "B", "C"]
+    assert calls == [["a", "b"], ["c"]]
+
+
+def test_a_bad_item_only_fails_its_own_caller():
+    calls = []
+    batcher = MicroBatcher("test", upper_batch(calls), max_batch_size=3, window_ms=1000)
+    futures = [batcher.submit_async(item) for item in ("a", "", "c")]
+    assert futures[0].result() == "A"
+    assert futures[2].result() == "C"
+    with pytest.raises(ValueError):
+        futures[1].result()
+    assert calls == [["a", "", "c"], ["a"], [""], ["c"]]
+
+
+def test_wrong_result_count_is_an_error():
+    batcher = MicroBatcher("test", lambda items: [], max_batch_size=1, window_ms=0)
+    with pytest.raises(RuntimeError):
+        batcher.submit("a")
+
+
+def test_callers_on_many_threads_get_their_own_results():
+    batcher = MicroBatcher("test", upper_batch([]), max_batch_size=8, window_ms=5)
+    results = {}
+
+    def call(i):
+        results[i] = batcher.submit(f"q{i}")
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {i: f"Q{i}" for i in range(20)}
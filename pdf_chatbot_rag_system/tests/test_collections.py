@@ -0,0 +1,70 @@
+from langchain_core.documents import Document
+
+from app import vector_store
+from app.vector_store import CollectionManager, merge_candidates
+
+
+def doc(name):
+    return Document(page_content=name, id=name)
+
+
+def test_lexical_hits_merge_by_rank_across_shards():
+    # BM25 scores of a small shard dwarf a large one's; ranks decide, not raw scores
+    big = ([], [(doc("b1"), 3.0), (doc("b2"), 2.0)])
+    small = ([], [(doc("s1"), 40.0), (doc("s2"), 30.0)])
+    merged = [d.id for d in merge_candidates([big, small], "lexical", k=4, n=4)]
+    assert merged[:2] == ["b1", "s1"] and merged[2:] == ["b2", "s2"]
+
+
+def test_dense_hits_merge_by_score_without_duplicates():
+    a = ([(doc("x"), 0.9), (doc("y"), 0.5)], [])
+    b = ([(doc("z"), 0.7), (doc("x"), 0.9)], [])
+    assert [d.id for d in merge_candidates([a, b], "dense", k=3, n=3)] == ["x", "z", "y"]
+
+
+class FakeShard:
+    index_version = 1
+
+
+class Manager(CollectionManager):
+    def _load(self, name):
+        self.loads.append(name)
+        return FakeShard()
+
+
+def manager(monkeypatch, clock, **kwargs):
+    monkeypatch.setattr(vector_store, "collection_exists", lambda name: True)
+    monkeypatch.setattr(vector_store.time, "monotonic", lambda: clock[0])
+    m = Manager(check_s=0, **kwargs)
+    m.loads = []
+    return m
+
+
+def test_least_recently_used_shard_is_evicted(monkeypatch):
+    clock = [0.0]
+    m = manager(monkeypatch, clock, max_loaded=2, idle_s=0)
+    for name in ("a", "b", "a", "c"):
+        clock[0] += 1
+        m.get(name)
+    assert list(m._loaded) == ["a", "c"]
+    assert m.loads == ["a", "b", "c"]
+
+
+def test_idle_shards_unload_without_new_loads(monkeypatch):
+    clock = [0.0]
+    m = manager(monkeypatch, clock, max_loaded=8, idle_s=60)
+    m.scope(["a", "b"])
+    clock[0] = 30
+    m.scope(["a"])
+    clock[0] = 75  # b idle for 75 s, a for 45 s
+    m.scope(["a"])
+    assert list(m._loaded) == ["a"]
+    clock[0] = 200  # a shard in the requested scope is never swept, however idle
+    m.scope(["a"])
+    assert m.loads == ["a", "b"]
+
+
+def test_version_survives_a_missing_index(monkeypatch, tmp_path):
+    monkeypatch.setattr(vector_store, "COLLECTIONS_DIR", str(tmp_path))
+    m = CollectionManager()
+    assert m.version(["nowhere"]) == (("nowhere", None),)
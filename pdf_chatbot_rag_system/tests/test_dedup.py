@@ -0,0 +1,34 @@
+from app.dedup import deduplicate, numbers
+
+STEM = "অনুপমের বিয়ের সময় কল্যাণীর বাবা শম্ভুনাথ সেনের মেয়ের বয়স কত ছিল: "
+
+
+def records(*texts):
+    return [{"id": f"c{i}", "text": text, "metadata": {"page": i}} for i, text in enumerate(texts)]
+
+
+def test_renumbered_repeat_is_folded():
+    kept, stats = deduplicate(records("৪১। " + STEM + "১৫ বছর", "১২। " + STEM + "১৫ বছর"))
+    assert [r["id"] for r in kept] == ["c0"]
+    assert kept[0]["metadata"]["duplicates"] == [{"id": "c1", "page": 1}]
+    assert stats["removed"] == 1
+
+
+def test_chunks_differing_only_in_numbers_are_kept():
+    kept, _ = deduplicate(records(STEM + "১৫ বছর", STEM + "১৬ বছর"))
+    assert len(kept) == 2
+    kept, _ = deduplicate(records("অনুপমের বয়স ২৩ বছর, বিয়ে হয় ১৮৯০ সালে।",
+                                  "অনুপমের বয়স ২৭ বছর, বিয়ে হয় ১৯১০ সালে।"))
+    assert len(kept) == 2
+
+
+def test_numbers_ignore_question_prefix():
+    assert numbers("৪১। বয়স ১৫ বছর") == ("15",)
+    assert numbers("12) age 15\n13. age 16") == ("15", "16")
+
+
+def test_existing_records_are_never_folded():
+    existing = records(STEM + "১৫ বছর", STEM + "১৫ বছর।")
+    kept, stats = deduplicate(records("৭। " + STEM + "১৫ বছর"), existing=existing)
+    assert kept == existing
+    assert stats["removed"] == 1
@@ -0,0 +1,32 @@
+import pytest
+
+from app import language_detect
+from app.language_detect import detect_language, script_counts
+
+
+def test_script_counts():
+    assert script_counts("অনুপমের মামা") == (11, 0, 0)
+    assert script_counts("Who is Anupam's uncle? 42") == (0, 17, 0)
+    assert script_counts("Café ১৯১৫") == (4, 4, 0)  # Bengali digits count, ASCII digits do not
+    assert script_counts("Привет, 世界") == (0, 0, 8)
+    assert script_counts("  ?!. 123 ") == (0, 0, 0)
+
+
+@pytest.mark.parametrize("text, lang", [
+    ("অনুপমের মামা কে?", "bn"),
+    ("Who is Anupam's uncle?", "en"),
+    ("Anupam এর মামা কে?", "bn"),  # Bengali share above LANG_BN_MIN_SHARE
+    ("কে", "bn"),
+    ("Привет, как дела?", "unknown"),
+    ("?", "unknown"),
+    ("", "unknown"),
+])
+def test_detect_language(text, lang):
+    assert detect_language(text) == lang
+
+
+def test_ambiguous_mix_falls_back_to_majority_script(monkeypatch):
+    monkeypatch.setattr(language_detect, "STATISTICAL_FALLBACK", False)
+    # 2 Bengali letters to 22 Latin ones: neither share threshold is met
+    assert detect_language("What does Anupam call মা here") == "en"
+    assert script_counts("What does Anupam call মা here")[:2] == (2, 22)
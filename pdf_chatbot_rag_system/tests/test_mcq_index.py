@@ -0,0 +1,47 @@
+from app.chunker import answer_mcqs, extract_mcq_questions, iter_answer_key, iter_mcq_questions
+from app.mcq_index import McqIndex
+
+UNCLE = "অনুপমের বিয়ের সময় কন্যাপক্ষের সঙ্গে দরদাম কে করেছিলেন?"
+MCQ = "৪১। কাকে অনুপমের ভাগ্য দেবতা বলা হয়েছে? (ক) পিতা (খ) ভাই (গ) মামা (ঘ) শিক্ষক"
+
+
+def test_options_do_not_make_an_answer():
+    [(number, question, options, answer, start, end)] = iter_mcq_questions(MCQ)
+    assert (number, question, answer) == (41, "কাকে অনুপমের ভাগ্য দেবতা বলা হয়েছে?", None)
+    assert options == {"ক": "পিতা", "খ": "ভাই", "গ": "মামা", "ঘ": "শিক্ষক"}
+    assert (start, end) == (0, len(MCQ))
+    assert extract_mcq_questions(MCQ) == []
+
+
+def test_printed_answer():
+    text = MCQ + " উত্তর: গ ব্যাখ্যা: মামাই সংসারের কর্তা। ৪২। অনুপমের বয়স কত? (ক) ২৩ (খ) ২৭ (গ) ৩০ (ঘ) ৩৫"
+    questions = list(iter_mcq_questions(text))
+    assert [(q[0], q[2]["ঘ"], q[3]) for q in questions] == [(41, "শিক্ষক", "গ"), (42, "৩৫", None)]
+    assert extract_mcq_questions(text) == [("কাকে অনুপমের ভাগ্য দেবতা বলা হয়েছে?", "মামা")]
+
+
+def test_answer_key_answers_the_set_before_it():
+    first = (1, "প্রথম প্রশ্ন?", {"ক": "এক", "খ": "দুই"}, "খ")
+    unanswered = [(1, "কোন দ্বীপ?", {"ক": "আন্দামান", "খ": "হাইকু"}, None),
+                  (2, "কে আশীর্বাদ করতে গেল?", {"ক": "হরিশ", "খ": "মামা"}, None),
+                  (2, "আবার দুই?", {"ক": "হ্যাঁ", "খ": "না"}, None)]
+    key = list(iter_answer_key("উত্তরমালা SL Ans ১ ক ২ খ ৩ ক ৪ গ ৫ ক"))
+    assert key == [(1, "ক"), (2, "খ"), (3, "ক"), (4, "গ"), (5, "ক")]
+    pairs = answer_mcqs([([first], []), (unanswered, []), ([], key)])
+    # number 2 occurs twice since the last key: ambiguous, left to the normal pipeline
+    assert pairs == [("প্রথম প্রশ্ন?", "দুই"), ("কোন দ্বীপ?", "আন্দামান")]
+    assert list(iter_answer_key("অনুপমের বয়স ২৩ বছর, ১ ক ২ খ")) == []
+
+
+def test_lookup_exact_and_fuzzy():
+    index = McqIndex([("৪১। " + UNCLE, "মামা"), ("'অপরিচিতা' শব্দের অর্থ কী?", "অচেনা")])
+    assert index.lookup(UNCLE + "?")["answer"] == "মামা"
+    hit = index.lookup(UNCLE.replace("দরদাম", "দরদম"))
+    assert (hit["answer"], hit["edit_distance"]) == ("মামা", 1)
+    assert index.lookup(UNCLE.replace("দরদাম", "দরদ")) is None  # 2 edits; a 53-character question allows one
+
+
+def test_short_questions_match_exactly():
+    index = McqIndex([("'অপরিচিতা' শব্দের অর্থ কী?", "অচেনা")])
+    assert index.lookup("'অপরিচিতা' শব্দের অর্থ কী?")["answer"] == "অচেনা"
+    assert index.lookup("'অপরিচিত' শব্দের অর্থ কী?") is None